@@ -32,6 +32,9 @@ class timekprAdminClient(object):
         # main object for GUI
         self._adminGUI = None
 
+        # users to process in bulk mode (None means single user mode)
+        self._bulkUserList = None
+
     def startTimekprAdminClient(self, *args):
         """Start up timekpr admin (choose gui or cli and start this up)"""
         # check whether we need CLI or GUI
@@ -118,6 +121,15 @@ class timekprAdminClient(object):
         if adminCmd == "--help":
             # fine
             pass
+        # this executes the command for multiple users or all members of the group
+        elif adminCmd in ("--users", "--group"):
+            # check param len
+            if paramLen < paramIdx + 3:
+                # fail
+                adminCmdIncorrect = True
+            else:
+                # execute
+                self.processBulkCommand(adminCmd, args[paramIdx+1], args[paramIdx+2], *args[paramIdx+3:])
         # this gets saved user list from the server
         elif adminCmd == "--userlist":
             # check param len
@@ -141,6 +153,10 @@ class timekprAdminClient(object):
             if paramLen != paramIdx + 2:
                 # fail
                 adminCmdIncorrect = True
+            # bulk mode
+            elif self._bulkUserList is not None:
+                # get user configs
+                self.processBulkUserInformation(cons.TK_CL_INF_FULL)
             else:
                 # get user config
                 result, message, userConfig = self._timekprAdminConnector.getUserConfigurationAndInformation(args[paramIdx+1], cons.TK_CL_INF_FULL)
@@ -158,6 +174,10 @@ class timekprAdminClient(object):
             if paramLen != paramIdx + 2:
                 # fail
                 adminCmdIncorrect = True
+            # bulk mode
+            elif self._bulkUserList is not None:
+                # get user configs
+                self.processBulkUserInformation(cons.TK_CL_INF_RT)
             else:
                 # get user config
                 result, message, userConfig = self._timekprAdminConnector.getUserConfigurationAndInformation(args[paramIdx+1], cons.TK_CL_INF_RT)
@@ -344,6 +364,111 @@ class timekprAdminClient(object):
                 if rCmd not in cmds:
                     log.consoleOut(" ", rCmd, rCmdDesc, "\n")
 
+    # --------------- bulk execution methods --------------- #
+
+    def processBulkCommand(self, pBulkType, pBulkTarget, pAdminCmd, *pParams):
+        """Execute the command for multiple users (comma separated list) or all members of the group"""
+        # defaults
+        result = 0
+        message = ""
+
+        # user list
+        if pBulkType == "--users":
+            # users
+            userList = [rUser.strip() for rUser in pBulkTarget.split(",") if rUser.strip() != ""]
+        else:
+            # group members
+            result, message, userList = self._timekprAdminConnector.getGroupUserList(pBulkTarget)
+
+        # preprocess successful
+        if result == 0:
+            # users to process
+            self._bulkUserList = list(map(str, userList))
+            # execute the command (user name is not used in bulk mode, it's passed to match the command format)
+            self.checkAndExecuteAdminCommands(pAdminCmd, pBulkTarget, *pParams)
+            # back to single user mode
+            self._bulkUserList = None
+        else:
+            # log error
+            log.consoleOut(message)
+
+    def printUserProgress(self, pIdx, pUserName, pResult, pMessage):
+        """Print progress of bulk execution for the user"""
+        # print to console
+        log.consoleOut("[%i/%i] %s: %s" % (pIdx, len(self._bulkUserList), pUserName, "OK" if pResult == 0 else pMessage))
+
+    def processBulkUserInformation(self, pInfoLvl):
+        """Get and print user information for all users in chunks"""
+        # go through users in chunks
+        for rIdx in range(0, len(self._bulkUserList), cons.TK_BULK_USER_CHUNK_SIZE):
+            # get user configs
+            result, message, userResults = self._timekprAdminConnector.getUsersInformation(self._bulkUserList[rIdx:rIdx+cons.TK_BULK_USER_CHUNK_SIZE], pInfoLvl)
+            # call has failed as a whole
+            if len(userResults) < 1 and result != 0:
+                # log error
+                log.consoleOut(message)
+                # that's it
+                break
+            # print results as they come
+            for rUserName, rResult, rMessage, rUserConfig in userResults:
+                # process
+                if rResult == 0:
+                    # process
+                    self.printUserConfig(rUserName, rUserConfig)
+                else:
+                    # log error
+                    log.consoleOut(rMessage)
+
+    def processUserConfiguration(self, pUserName, pChanges):
+        """Set configuration for the user, in bulk mode configuration is set for all users in chunks"""
+        # single user
+        if self._bulkUserList is None:
+            # invoke
+            return self._timekprAdminConnector.setUserConfiguration(pUserName, pChanges)
+
+        # defaults
+        result = 0
+        message = ""
+        failedCnt = 0
+        # go through users in chunks
+        for rIdx in range(0, len(self._bulkUserList), cons.TK_BULK_USER_CHUNK_SIZE):
+            # invoke
+            result, message, userResults = self._timekprAdminConnector.setUsersConfiguration(self._bulkUserList[rIdx:rIdx+cons.TK_BULK_USER_CHUNK_SIZE], pChanges)
+            # call has failed as a whole
+            if len(userResults) < 1 and result != 0:
+                # result
+                return result, message
+            # print progress as results come
+            for rUserIdx, (rUserName, rResult, rMessage) in enumerate(userResults):
+                # failed
+                failedCnt += 1 if rResult != 0 else 0
+                # progress
+                self.printUserProgress(rIdx + rUserIdx + 1, rUserName, rResult, rMessage)
+
+        # result
+        return -1 if failedCnt > 0 else 0, msg.getTranslation("TK_MSG_USER_ADMIN_CHK_USERS_FAILED") % (failedCnt, len(self._bulkUserList)) if failedCnt > 0 else ""
+
+    def processUserControl(self, pUserName, pCall):
+        """Execute control call for the user, in bulk mode the call is executed for every user"""
+        # single user
+        if self._bulkUserList is None:
+            # invoke
+            return pCall(pUserName)
+
+        # defaults
+        failedCnt = 0
+        # go through users
+        for rIdx, rUserName in enumerate(self._bulkUserList):
+            # invoke
+            result, message = pCall(rUserName)
+            # failed
+            failedCnt += 1 if result != 0 else 0
+            # progress
+            self.printUserProgress(rIdx + 1, rUserName, result, message)
+
+        # result
+        return -1 if failedCnt > 0 else 0, msg.getTranslation("TK_MSG_USER_ADMIN_CHK_USERS_FAILED") % (failedCnt, len(self._bulkUserList)) if failedCnt > 0 else ""
+
     # --------------- parameter execution methods --------------- #
 
     def printUserList(self, pUserList):
@@ -412,7 +537,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setAllowedDays(pUserName, dayMap)
+            result, message = self.processUserConfiguration(pUserName, {"ALLOWED_WEEKDAYS": dayMap})
 
         # process
         if result != 0:
@@ -445,7 +570,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setAllowedHours(pUserName, pDayNumber, allowedHours)
+            result, message = self.processUserConfiguration(pUserName, {"ALLOWED_HOURS_%s" % (pDayNumber): allowedHours})
 
         # process
         if result != 0:
@@ -472,7 +597,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setTimeLimitForDays(pUserName, dayLimits)
+            result, message = self.processUserConfiguration(pUserName, {"LIMITS_PER_WEEKDAYS": dayLimits})
 
         # process
         if result != 0:
@@ -497,7 +622,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setTimeLimitForWeek(pUserName, weekLimit)
+            result, message = self.processUserConfiguration(pUserName, {"LIMIT_PER_WEEK": weekLimit})
 
         # process
         if result != 0:
@@ -522,7 +647,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setTimeLimitForMonth(pUserName, monthLimit)
+            result, message = self.processUserConfiguration(pUserName, {"LIMIT_PER_MONTH": monthLimit})
 
         # process
         if result != 0:
@@ -546,7 +671,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setTrackInactive(pUserName, trackInactive)
+            result, message = self.processUserConfiguration(pUserName, {"TRACK_INACTIVE": trackInactive})
 
         # process
         if result != 0:
@@ -570,7 +695,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setHideTrayIcon(pUserName, hideTrayIcon)
+            result, message = self.processUserConfiguration(pUserName, {"HIDE_TRAY_ICON": hideTrayIcon})
 
         # process
         if result != 0:
@@ -596,7 +721,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setLockoutType(pUserName, lockoutType, lockoutWakeFrom, lockoutWakeTo)
+            result, message = self.processUserConfiguration(pUserName, {"LOCKOUT_TYPE": [lockoutType, lockoutWakeFrom, lockoutWakeTo]})
 
         # process
         if result != 0:
@@ -621,7 +746,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setTimeLeft(pUserName, pOperation, limit)
+            result, message = self.processUserControl(pUserName, lambda pCtrlUserName: self._timekprAdminConnector.setTimeLeft(pCtrlUserName, pOperation, limit))
 
         # process
         if result != 0:
@@ -647,7 +772,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeEnabled(pUserName, isPlayTimeEnabled)
+            result, message = self.processUserConfiguration(pUserName, {"PLAYTIME_ENABLED": isPlayTimeEnabled})
 
         # process
         if result != 0:
@@ -671,7 +796,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeLimitOverride(pUserName, isPlayTimeLimitOverride)
+            result, message = self.processUserConfiguration(pUserName, {"PLAYTIME_LIMIT_OVERRIDE_ENABLED": isPlayTimeLimitOverride})
 
         # process
         if result != 0:
@@ -695,7 +820,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeUnaccountedIntervalsEnabled(pUserName, isPlayTimeUnaccountedIntervalsEnabled)
+            result, message = self.processUserConfiguration(pUserName, {"PLAYTIME_UNACCOUNTED_INTERVALS_ENABLED": isPlayTimeUnaccountedIntervalsEnabled})
 
         # process
         if result != 0:
@@ -720,7 +845,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeAllowedDays(pUserName, dayMap)
+            result, message = self.processUserConfiguration(pUserName, {"PLAYTIME_ALLOWED_WEEKDAYS": dayMap})
 
         # process
         if result != 0:
@@ -747,7 +872,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeLimitsForDays(pUserName, dayLimits)
+            result, message = self.processUserConfiguration(pUserName, {"PLAYTIME_LIMITS_PER_WEEKDAYS": dayLimits})
 
         # process
         if result != 0:
@@ -771,7 +896,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeLimitForWeek(pUserName, limit)
+            result, message = self.processUserConfiguration(pUserName, {"PLAYTIME_LIMIT_PER_WEEK": limit})
 
         # process
         if result != 0:
@@ -806,7 +931,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeActivities(pUserName, playTimeActivities)
+            result, message = self.processUserConfiguration(pUserName, {"PLAYTIME_ACTIVITIES": playTimeActivities})
 
         # process
         if result != 0:
@@ -831,7 +956,7 @@ class timekprAdminClient(object):
         # preprocess successful
         if result == 0:
             # invoke
-            result, message = self._timekprAdminConnector.setPlayTimeLeft(pUserName, pOperation, limit)
+            result, message = self.processUserControl(pUserName, lambda pCtrlUserName: self._timekprAdminConnector.setPlayTimeLeft(pCtrlUserName, pOperation, limit))
 
         # process
         if result != 0:
@@ -116,10 +116,8 @@ class timekprAdminGUI(object):
         GLib.timeout_add_seconds(0, self._timekprAdminConnector.initTimekprConnection, False)
         # check connection
         GLib.timeout_add_seconds(0.1, self.checkConnection)
-        # user calculated info retriever
-        GLib.timeout_add_seconds(cons.TK_SAVE_INTERVAL, self.retrieveUserInfoAndConfig, None, cons.TK_CL_INF_SAVED)
-        # user "realtime" info retriever
-        GLib.timeout_add_seconds(cons.TK_POLLTIME, self.retrieveUserInfoAndConfig, None, cons.TK_CL_INF_RT)
+        # user calculated and "realtime" info is refreshed when server informs about changes
+        self._timekprAdminConnector.connectUserInformationSignals(self.receiveUserInformationChanged, self.receiveUserRealtimeInformationChanged)
 
     def checkConnection(self):
         """Check connection on the fly"""
@@ -137,6 +135,8 @@ class timekprAdminGUI(object):
                 # get users
                 GLib.timeout_add_seconds(0, self.getAdminUserList)
                 GLib.timeout_add_seconds(0.1, self.retrieveTimekprConfig)
+                # get realtime information (it's kept up to date by signals afterwards)
+                GLib.timeout_add_seconds(0.1, self.retrieveUsersRealtimeInformation)
         elif not interfacesOk and connecting:
             # status
             self.setTimekprStatus(True, msg.getTranslation("TK_MSG_STATUS_CONNECTING"))
@@ -386,6 +386,11 @@ class timekprAdminGUI(object):
             "TimekprExcludedUsersButtonControlBX"
         ]
 
+        # version of realtime information of users (to skip unchanged information)
+        self._realtimeVersion = 0
+        # realtime information of users (updated by signals)
+        self._realtimeInformation = {}
+
         # sets up limit variables for user configuration (internal config to compare to)
         self._tkSavedCfg = {}
         self._tkSavedCfg["timeTrackInactive"] = False
@@ -951,6 +956,25 @@ class timekprAdminGUI(object):
             # check the connection
             self.checkConnection()
 
+    def retrieveUsersRealtimeInformation(self):
+        """Retrieve realtime information for all users"""
+        # get realtime information
+        result, message, realtimeVersion, usersInformation = self._timekprAdminConnector.getAllUsersRealtimeInformation(self._realtimeVersion)
+
+        # all ok and something has changed since last time
+        if result == 0 and realtimeVersion != self._realtimeVersion:
+            # save version and information
+            self._realtimeVersion = realtimeVersion
+            self._realtimeInformation = {rUserName: dict(rUserInformation) for rUserName, rUserInformation in usersInformation.items()}
+            # refresh selected user
+            self.retrieveUserInfoAndConfig(None, cons.TK_CL_INF_RT)
+        elif result != 0:
+            # status
+            self.setTimekprStatus(False, message)
+
+        # this is called once
+        return False
+
     def retrieveTimekprConfig(self):
         """Retrieve timekpr configuration"""
         # init
@@ -1041,8 +1065,15 @@ class timekprAdminGUI(object):
             # init
             userConfig = {}
 
-            # get list
-            result, message, userConfig = self._timekprAdminConnector.getUserConfigurationAndInformation(userName, pInfoLvl)
+            # realtime information is kept up to date by signals
+            if pInfoLvl == cons.TK_CL_INF_RT:
+                # result
+                result, message = 0, ""
+                # user information (user may not be logged in)
+                userConfig = self._realtimeInformation[userName] if userName in self._realtimeInformation else {}
+            else:
+                # get list
+                result, message, userConfig = self._timekprAdminConnector.getUserConfigurationAndInformation(userName, pInfoLvl)
 
             # all ok
             if result == 0:
@@ -1954,6 +1985,33 @@ class timekprAdminGUI(object):
             # recalc the control state
             self.calculateUserTodayControlAvailability()
 
+    def applyUserConfigurationChangeSet(self, pUserName, pChanges, pSavedCfg, pStatusMessage, pSavedMessage):
+        """Apply set of user configuration changes to server at once (either all or none of them are applied)"""
+        # initial values
+        result = 0
+        message = ""
+
+        # only if something has changed
+        if len(pChanges) > 0:
+            # call server
+            result, message = self._timekprAdminConnector.setUserConfiguration(pUserName, pChanges)
+
+            # successful call
+            if result == 0:
+                # set internal state
+                for rKey, rVal in pSavedCfg.items():
+                    self._tkSavedCfg[rKey] = rVal
+                # print success message (override messages in case more then one option was processed)
+                self.setTimekprStatus(False, pStatusMessage if len(pChanges) < 2 else pSavedMessage)
+            else:
+                # status
+                self.setTimekprStatus(False, message)
+                # check the connection
+                self.checkConnection()
+
+        # result
+        return result
+
     def applyUserLimitConfigurationChanges(self):
         """Apply configuration changes to server"""
         # get what's changed
@@ -1962,99 +2020,62 @@ class timekprAdminGUI(object):
         # get username
         userName = self.getSelectedUserName()
         # initial values
-        result = 0
-        message = ""
-        changeCnt = 0
+        changes = {}
+        savedCfg = {}
+        statusMessage = ""
 
         # loop through all changes
         for rKey, rVal in changeControl.items():
             # changed
             if rVal["st"]:
-                # check what element we have, depending on that call different interface
+                # check what element we have, depending on that add different option
                 # ## week limit ##
                 if rKey == "TimekprUserConfWkMonLimitsLSWK":
-                    # call server
-                    result, message = self._timekprAdminConnector.setTimeLimitForWeek(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["timeLimitWeek"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_WKMONADJUSTTIME_PROCESSED"))
+                    # option
+                    changes["LIMIT_PER_WEEK"] = rVal["val"]
+                    # internal state
+                    savedCfg["timeLimitWeek"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_WKMONADJUSTTIME_PROCESSED")
                 # ## month limit ##
                 elif rKey == "TimekprUserConfWkMonLimitsLSMON":
-                    # call server
-                    result, message = self._timekprAdminConnector.setTimeLimitForMonth(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["timeLimitMonth"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_WKMONADJUSTTIME_PROCESSED"))
+                    # option
+                    changes["LIMIT_PER_MONTH"] = rVal["val"]
+                    # internal state
+                    savedCfg["timeLimitMonth"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_WKMONADJUSTTIME_PROCESSED")
                 # ## day config ##
                 elif rKey == "TimekprUserWeekDaysLSD":
-                    # call server
-                    result, message = self._timekprAdminConnector.setAllowedDays(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["timeLimitDays"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_ALLOWEDDAYS_PROCESSED"))
+                    # option
+                    changes["ALLOWED_WEEKDAYS"] = rVal["val"]
+                    # internal state
+                    savedCfg["timeLimitDays"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_ALLOWEDDAYS_PROCESSED")
                 # ## limits per allowed days ###
                 elif rKey == "TimekprUserWeekDaysLSL":
-                    # call server
-                    result, message = self._timekprAdminConnector.setTimeLimitForDays(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["timeLimitDaysLimits"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_TIMELIMITS_PROCESSED"))
+                    # option
+                    changes["LIMITS_PER_WEEKDAYS"] = rVal["val"]
+                    # internal state
+                    savedCfg["timeLimitDaysLimits"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_TIMELIMITS_PROCESSED")
                 # ## hour allowance activities ###
                 elif rKey == "TimekprHourIntervalsLS":
                     # loop through changed day hours
                     for rDay in rVal["val"]:
-                        # day changed
-                        hrs = None if self._tkSavedCfg["timeLimitDaysHoursActual"][rDay] == self._tkSavedCfg["timeLimitDaysHoursSaved"][rDay] else self._tkSavedCfg["timeLimitDaysHoursActual"][rDay]
                         # hours changed
-                        if hrs is not None:
-                            # call server
-                            result, message = self._timekprAdminConnector.setAllowedHours(userName, rDay, hrs)
-                            # successful call
-                            if result == 0:
-                                # cnt
-                                changeCnt += 1
-                                # set internal state
-                                self._tkSavedCfg["timeLimitDaysHoursSaved"][rDay] = self._tkSavedCfg["timeLimitDaysHoursActual"][rDay].copy()
-                                # status
-                                self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_ALLOWEDHOURS_PROCESSED"))
-                            else:
-                                # finish
-                                break
-                # if all ok
-                if result != 0:
-                    # status
-                    self.setTimekprStatus(False, message)
-                    # that's it
-                    break
+                        if self._tkSavedCfg["timeLimitDaysHoursActual"][rDay] != self._tkSavedCfg["timeLimitDaysHoursSaved"][rDay]:
+                            # option
+                            changes["ALLOWED_HOURS_%s" % (rDay)] = self._tkSavedCfg["timeLimitDaysHoursActual"][rDay]
+                    # internal state
+                    savedCfg["timeLimitDaysHoursSaved"] = {rDay: rHours.copy() for rDay, rHours in self._tkSavedCfg["timeLimitDaysHoursActual"].items()}
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_ALLOWEDHOURS_PROCESSED")
 
-        # fine
-        if result != 0:
-            # check the connection
-            self.checkConnection()
-        # override messages in case more then one option was processed
-        elif changeCnt > 1:
-            # status
-            self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_USER_LIMIT_CONFIGURATION_SAVED"))
+        # apply all changes at once
+        self.applyUserConfigurationChangeSet(userName, changes, savedCfg, statusMessage, msg.getTranslation("TK_MSG_STATUS_USER_LIMIT_CONFIGURATION_SAVED"))
 
         # recalc the control state
         self.calculateUserConfigControlAvailability()
@@ -2067,103 +2088,66 @@ class timekprAdminGUI(object):
         # get username
         userName = self.getSelectedUserName()
         # initial values
-        result = 0
-        message = ""
-        changeCnt = 0
+        changes = {}
+        savedCfg = {}
+        statusMessage = ""
 
         # loop through all changes
         for rKey, rVal in changeControl.items():
             # changed
             if rVal["st"]:
-                # check what element we have, depending on that call different interface
+                # check what element we have, depending on that add different option
                 # ## PlayTime enabled ##
                 if rKey == "TimekprUserPlayTimeEnableCB":
-                    # call server
-                    result, message = self._timekprAdminConnector.setPlayTimeEnabled(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["playTimeEnabled"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_PT_ENABLEMENT_PROCESSED"))
+                    # option
+                    changes["PLAYTIME_ENABLED"] = rVal["val"]
+                    # internal state
+                    savedCfg["playTimeEnabled"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_PT_ENABLEMENT_PROCESSED")
                 # ## PlayTime override enabled ##
                 elif rKey == "TimekprUserPlayTimeOverrideEnableCB":
-                    # call server
-                    result, message = self._timekprAdminConnector.setPlayTimeLimitOverride(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["playTimeOverrideEnabled"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_PT_OVERRIDE_PROCESSED"))
+                    # option
+                    changes["PLAYTIME_LIMIT_OVERRIDE_ENABLED"] = rVal["val"]
+                    # internal state
+                    savedCfg["playTimeOverrideEnabled"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_PT_OVERRIDE_PROCESSED")
                 # ## PlayTime allowed during unaccounted intervals ##
                 elif rKey == "TimekprUserPlayTimeUnaccountedIntervalsEnabledCB":
-                    # call server
-                    result, message = self._timekprAdminConnector.setPlayTimeUnaccountedIntervalsEnabled(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["playTimeUnaccountedIntervalsEnabled"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_PT_ALLOWED_UNLIMITED_INTERVALS_PROCESSED"))
+                    # option
+                    changes["PLAYTIME_UNACCOUNTED_INTERVALS_ENABLED"] = rVal["val"]
+                    # internal state
+                    savedCfg["playTimeUnaccountedIntervalsEnabled"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_PT_ALLOWED_UNLIMITED_INTERVALS_PROCESSED")
                 # ## PlayTime day config ##
                 elif rKey == "TimekprUserPlayTimeLimitsLSD":
-                    # call server
-                    result, message = self._timekprAdminConnector.setPlayTimeAllowedDays(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["playTimeLimitDays"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_PT_ALLOWEDDAYS_PROCESSED"))
+                    # option
+                    changes["PLAYTIME_ALLOWED_WEEKDAYS"] = rVal["val"]
+                    # internal state
+                    savedCfg["playTimeLimitDays"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_PT_ALLOWEDDAYS_PROCESSED")
                 # ## PlayTime limits per allowed days ###
                 elif rKey == "TimekprUserPlayTimeLimitsLSL":
-                    # call server
-                    result, message = self._timekprAdminConnector.setPlayTimeLimitsForDays(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["playTimeLimitDaysLimits"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_PT_TIMELIMITS_PROCESSED"))
+                    # option
+                    changes["PLAYTIME_LIMITS_PER_WEEKDAYS"] = rVal["val"]
+                    # internal state
+                    savedCfg["playTimeLimitDaysLimits"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_PT_TIMELIMITS_PROCESSED")
                 # ## PlayTime activities ###
                 elif rKey == "TimekprUserPlayTimeProcessesLS":
-                    # call server
-                    result, message = self._timekprAdminConnector.setPlayTimeActivities(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["playTimeActivities"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_PT_ACTIVITIES_PROCESSED"))
+                    # option
+                    changes["PLAYTIME_ACTIVITIES"] = rVal["val"]
+                    # internal state
+                    savedCfg["playTimeActivities"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_PT_ACTIVITIES_PROCESSED")
 
-                # if all ok
-                if result != 0:
-                    # status
-                    self.setTimekprStatus(False, message)
-                    # that's it
-                    break
-
-        # fine
-        if result != 0:
-            # check the connection
-            self.checkConnection()
-        # override messages in case more then one option was processed
-        elif changeCnt > 1:
-            # status
-            self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_USER_PT_LIMIT_CONFIGURATION_SAVED"))
+        # apply all changes at once
+        self.applyUserConfigurationChangeSet(userName, changes, savedCfg, statusMessage, msg.getTranslation("TK_MSG_STATUS_USER_PT_LIMIT_CONFIGURATION_SAVED"))
 
         # recalc the control state
         self.calculateUserPlayTimeConfigControlAvailability()
@@ -2176,68 +2160,43 @@ class timekprAdminGUI(object):
         # get username
         userName = self.getSelectedUserName()
         # initial values
-        result = 0
-        message = ""
-        changeCnt = 0
+        changes = {}
+        savedCfg = {}
+        statusMessage = ""
 
         # loop through all changes
         for rKey, rVal in changeControl.items():
             # changed
             if rVal["st"]:
-                # check what element we have, depending on that call different interface
+                # check what element we have, depending on that add different option
                 # ## Track inactive enabled ##
                 if rKey == "TimekprUserConfTodaySettingsTrackInactiveCB":
-                    # call server
-                    result, message = self._timekprAdminConnector.setTrackInactive(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["timeTrackInactive"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_TRACKINACTIVE_PROCESSED"))
+                    # option
+                    changes["TRACK_INACTIVE"] = rVal["val"]
+                    # internal state
+                    savedCfg["timeTrackInactive"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_TRACKINACTIVE_PROCESSED")
                 # ## Hide try icon enabled ##
                 elif rKey == "TimekprUserConfTodaySettingsHideTrayIconCB":
-                    # call server
-                    result, message = self._timekprAdminConnector.setHideTrayIcon(userName, rVal["val"])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["timeHideTrayIcon"] = rVal["val"]
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_HIDETRAYICON_PROCESSED"))
+                    # option
+                    changes["HIDE_TRAY_ICON"] = rVal["val"]
+                    # internal state
+                    savedCfg["timeHideTrayIcon"] = rVal["val"]
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_HIDETRAYICON_PROCESSED")
                 # ## Lockout type / interval ##
                 elif rKey == "TimekprUserConfAddOptsLockoutType":
-                    # call server
-                    result, message = self._timekprAdminConnector.setLockoutType(userName, rVal["val"][0], rVal["val"][1], rVal["val"][2])
-                    # successful call
-                    if result == 0:
-                        # cnt
-                        changeCnt += 1
-                        # set internal state
-                        self._tkSavedCfg["timeLockoutType"] =  rVal["val"][0]
-                        self._tkSavedCfg["timeWakeInterval"] = "%s;%s" % ( rVal["val"][1],  rVal["val"][2])
-                        # print success message
-                        self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_LOCKOUTTYPE_PROCESSED"))
+                    # option
+                    changes["LOCKOUT_TYPE"] = [rVal["val"][0], rVal["val"][1], rVal["val"][2]]
+                    # internal state
+                    savedCfg["timeLockoutType"] = rVal["val"][0]
+                    savedCfg["timeWakeInterval"] = "%s;%s" % (rVal["val"][1], rVal["val"][2])
+                    # success message
+                    statusMessage = msg.getTranslation("TK_MSG_STATUS_LOCKOUTTYPE_PROCESSED")
 
-                # if all ok
-                if result != 0:
-                    # status
-                    self.setTimekprStatus(False, message)
-                    # that's it
-                    break
-
-        # fine
-        if result != 0:
-            # check the connection
-            self.checkConnection()
-        # override messages in case more then one option was processed
-        elif changeCnt > 1:
-            # status
-            self.setTimekprStatus(False, msg.getTranslation("TK_MSG_STATUS_USER_ADDOPTS_CONFIGURATION_SAVED"))
+        # apply all changes at once
+        self.applyUserConfigurationChangeSet(userName, changes, savedCfg, statusMessage, msg.getTranslation("TK_MSG_STATUS_USER_ADDOPTS_CONFIGURATION_SAVED"))
 
         # recalc the control state
         self.calculateUserAdditionalConfigControlAvailability()
@@ -2359,6 +2318,30 @@ class timekprAdminGUI(object):
         # process setting
         self.applyTimekprConfigurationChanges()
 
+    # --------------- user information change DBUS signal methods --------------- #
+
+    def receiveUserInformationChanged(self, pUserName, pChangedFields):
+        """Saved configuration or control of the user has changed on server"""
+        # refresh only if this user is selected
+        if pUserName == self.getSelectedUserName():
+            # refresh saved information
+            self.retrieveUserInfoAndConfig(pUserName, cons.TK_CL_INF_SAVED)
+
+    def receiveUserRealtimeInformationChanged(self, pUserName, pChangedInformation):
+        """Realtime information of the user has changed on server (only changed values are received)"""
+        # no values means that user is not tracked anymore
+        if len(pChangedInformation) < 1:
+            # remove
+            self._realtimeInformation.pop(pUserName, None)
+        else:
+            # merge changed values
+            self._realtimeInformation.setdefault(pUserName, {}).update(pChangedInformation)
+
+        # refresh only if this user is selected
+        if pUserName == self.getSelectedUserName():
+            # refresh realtime information
+            self.retrieveUserInfoAndConfig(pUserName, cons.TK_CL_INF_RT)
+
     # --------------- user selection GTK signal methods --------------- #
 
     def userSelectionChanged(self, evt, pInfoLvl=None):
@@ -34,6 +34,9 @@ class timekprAdminConnector(object):
         self._timekprObject = None
         self._timekprUserAdminDbusInterface = None
         self._timekprAdminDbusInterface = None
+        # signals
+        self._userInformationSignal = None
+        self._userRealtimeInformationSignal = None
 
     def initTimekprConnection(self, pTryOnce, pRescheduleConnection=False):
         """Init dbus (connect to timekpr for info)"""
@@ -125,6 +128,28 @@ class timekprAdminConnector(object):
         """Initialize the return codes for calls"""
         return -2 if pInit else -1 if pCall else 0, msg.getTranslation("TK_MSG_STATUS_INTERFACE_NOTREADY") if pInit else msg.getTranslation("TK_MSG_DBUS_COMMUNICATION_COMMAND_NOT_ACCEPTED") if pCall else ""
 
+    # --------------- user information change signals --------------- #
+
+    def connectUserInformationSignals(self, pInformationHandler, pRealtimeInformationHandler):
+        """Connect to signals which inform about changes of saved and realtime user information (signals are received from bus, so they survive reconnects)"""
+        # connect only once
+        if self._userInformationSignal is None:
+            # connect to signal
+            self._userInformationSignal = self._timekprBus.add_signal_receiver(
+                path             = cons.TK_DBUS_SERVER_PATH,
+                handler_function = pInformationHandler,
+                dbus_interface   = cons.TK_DBUS_USER_ADMIN_INTERFACE,
+                signal_name      = "userInformationChanged")
+
+        # connect only once
+        if self._userRealtimeInformationSignal is None:
+            # connect to signal
+            self._userRealtimeInformationSignal = self._timekprBus.add_signal_receiver(
+                path             = cons.TK_DBUS_SERVER_PATH,
+                handler_function = pRealtimeInformationHandler,
+                dbus_interface   = cons.TK_DBUS_USER_ADMIN_INTERFACE,
+                signal_name      = "userRealtimeInformationChanged")
+
     # --------------- user configuration info population methods --------------- #
 
     def getUserList(self):
@@ -177,6 +202,32 @@ class timekprAdminConnector(object):
         # result
         return result, message, userConfig
 
+    def getAllUsersRealtimeInformation(self, pKnownVersion):
+        """Get realtime information for all users from server (information is returned only if it has changed since known version)"""
+        # defaults
+        result, message = self.initReturnCodes(pInit=True, pCall=False)
+        realtimeVersion = pKnownVersion
+        usersInformation = {}
+
+        # if we have end-point
+        if self._timekprUserAdminDbusInterface is not None:
+            # defaults
+            result, message = self.initReturnCodes(pInit=False, pCall=True)
+
+            # notify through dbus
+            try:
+                # call dbus method
+                result, message, realtimeVersion, usersInformation = self._timekprUserAdminDbusInterface.getAllUsersRealtimeInformation(dbus.UInt64(pKnownVersion))
+            except Exception as ex:
+                # exception
+                result, message = self.formatException(str(ex), __name__, self.getAllUsersRealtimeInformation.__name__)
+
+                # we cannot send notif through dbus, we need to reschedule connecton
+                self.initTimekprConnection(False, True)
+
+        # result
+        return result, message, realtimeVersion, usersInformation
+
     # --------------- user configuration set methods --------------- #
 
     def setAllowedDays(self, pUserName, pDayList):
@@ -589,6 +640,161 @@ class timekprAdminConnector(object):
         # result
         return result, message
 
+    # --------------- user configuration batch set methods --------------- #
+
+    def _prepareUserConfigurationChanges(self, pChanges):
+        """Prepare user configuration changes for transfer (values are variants, so their types have to be explicit)"""
+        # result
+        changes = dbus.Dictionary(signature="sv")
+        # loop through changes
+        for rOpt, rVal in pChanges.items():
+            # day lists and lockout type (with wakeup interval)
+            if rOpt in ("ALLOWED_WEEKDAYS", "PLAYTIME_ALLOWED_WEEKDAYS", "LOCKOUT_TYPE"):
+                changes[rOpt] = dbus.Array(list(map(str, rVal)), signature="s")
+            # limit lists
+            elif rOpt in ("LIMITS_PER_WEEKDAYS", "PLAYTIME_LIMITS_PER_WEEKDAYS"):
+                changes[rOpt] = dbus.Array(list(map(int, rVal)), signature="i")
+            # allowed hours for the day
+            elif "ALLOWED_HOURS_" in rOpt:
+                changes[rOpt] = dbus.Dictionary({str(rHour): dbus.Dictionary({rKey: int(rMin) for rKey, rMin in rHourVal.items()}, signature="si") for rHour, rHourVal in rVal.items()}, signature="sa{si}")
+            # activities
+            elif rOpt == "PLAYTIME_ACTIVITIES":
+                changes[rOpt] = dbus.Array([dbus.Array(list(map(str, rAct)), signature="s") for rAct in rVal], signature="as")
+            # flags
+            elif isinstance(rVal, bool):
+                changes[rOpt] = dbus.Boolean(rVal)
+            # limits
+            else:
+                changes[rOpt] = dbus.Int32(rVal)
+        # result
+        return changes
+
+    def setUserConfiguration(self, pUserName, pChanges):
+        """Set multiple user configuration options at once"""
+        # initial values
+        result, message = self.initReturnCodes(pInit=True, pCall=False)
+
+        # if we have end-point
+        if self._timekprUserAdminDbusInterface is not None:
+            # defaults
+            result, message = self.initReturnCodes(pInit=False, pCall=True)
+
+            # notify through dbus
+            try:
+                # call dbus method
+                result, message = self._timekprUserAdminDbusInterface.setUserConfiguration(pUserName, self._prepareUserConfigurationChanges(pChanges))
+            except Exception as ex:
+                # exception
+                result, message = self.formatException(str(ex), __name__, self.setUserConfiguration.__name__)
+
+                # we cannot send notif through dbus, we need to reschedule connecton
+                self.initTimekprConnection(False, True)
+
+        # result
+        return result, message
+
+    # --------------- bulk user configuration methods --------------- #
+
+    def getGroupUserList(self, pGroupName):
+        """Get user names of group members from server"""
+        # defaults
+        result, message = self.initReturnCodes(pInit=True, pCall=False)
+        userList = []
+
+        # if we have end-point
+        if self._timekprUserAdminDbusInterface is not None:
+            # defaults
+            result, message = self.initReturnCodes(pInit=False, pCall=True)
+
+            # notify through dbus
+            try:
+                # call dbus method
+                result, message, userList = self._timekprUserAdminDbusInterface.getGroupUserList(pGroupName)
+            except Exception as ex:
+                # exception
+                result, message = self.formatException(str(ex), __name__, self.getGroupUserList.__name__)
+
+                # we cannot send notif through dbus, we need to reschedule connecton
+                self.initTimekprConnection(False, True)
+
+        # result
+        return result, message, userList
+
+    def getUsersInformation(self, pUserNames, pInfoLvl):
+        """Get configuration and information for multiple users from server"""
+        # defaults
+        result, message = self.initReturnCodes(pInit=True, pCall=False)
+        userResults = []
+
+        # if we have end-point
+        if self._timekprUserAdminDbusInterface is not None:
+            # defaults
+            result, message = self.initReturnCodes(pInit=False, pCall=True)
+
+            # notify through dbus
+            try:
+                # call dbus method
+                result, message, userResults = self._timekprUserAdminDbusInterface.getUsersInformation(dbus.Array(pUserNames, signature="s"), pInfoLvl)
+            except Exception as ex:
+                # exception
+                result, message = self.formatException(str(ex), __name__, self.getUsersInformation.__name__)
+
+                # we cannot send notif through dbus, we need to reschedule connecton
+                self.initTimekprConnection(False, True)
+
+        # result
+        return result, message, userResults
+
+    def setUsersConfiguration(self, pUserNames, pChanges):
+        """Set the same user configuration options for multiple users at once"""
+        # defaults
+        result, message = self.initReturnCodes(pInit=True, pCall=False)
+        userResults = []
+
+        # if we have end-point
+        if self._timekprUserAdminDbusInterface is not None:
+            # defaults
+            result, message = self.initReturnCodes(pInit=False, pCall=True)
+
+            # notify through dbus
+            try:
+                # call dbus method
+                result, message, userResults = self._timekprUserAdminDbusInterface.setUsersConfiguration(dbus.Array(pUserNames, signature="s"), self._prepareUserConfigurationChanges(pChanges))
+            except Exception as ex:
+                # exception
+                result, message = self.formatException(str(ex), __name__, self.setUsersConfiguration.__name__)
+
+                # we cannot send notif through dbus, we need to reschedule connecton
+                self.initTimekprConnection(False, True)
+
+        # result
+        return result, message, userResults
+
+    def setGroupConfiguration(self, pGroupName, pChanges):
+        """Set the same user configuration options for all group members at once"""
+        # defaults
+        result, message = self.initReturnCodes(pInit=True, pCall=False)
+        userResults = []
+
+        # if we have end-point
+        if self._timekprUserAdminDbusInterface is not None:
+            # defaults
+            result, message = self.initReturnCodes(pInit=False, pCall=True)
+
+            # notify through dbus
+            try:
+                # call dbus method
+                result, message, userResults = self._timekprUserAdminDbusInterface.setGroupConfiguration(pGroupName, self._prepareUserConfigurationChanges(pChanges))
+            except Exception as ex:
+                # exception
+                result, message = self.formatException(str(ex), __name__, self.setGroupConfiguration.__name__)
+
+                # we cannot send notif through dbus, we need to reschedule connecton
+                self.initTimekprConnection(False, True)
+
+        # result
+        return result, message, userResults
+
     # --------------- timekpr configuration info population / set methods --------------- #
 
     def getTimekprConfiguration(self):
@@ -9,6 +9,7 @@ from dbus.mainloop.glib import DBusGMainLoop
 DBusGMainLoop(set_as_default=True)
 from datetime import timedelta
 import os
+import time
 import dbus
 from gi.repository import GLib
 
@@ -46,6 +47,10 @@ class timekprClient(object):
         # init logging
         log.setLogging(self._timekprClientConfig.getClientLogLevel(), cons.TK_LOG_TEMP_DIR, cons.TK_LOG_OWNER_CLIENT, self._userName)
 
+        # last received time left (priority, information) and when it was received (time is counted down between signals)
+        self._timeLeftReceived = None
+        self._timeLeftReceivedAt = None
+
 
     def startTimekprClient(self):
         """Start up timekpr (choose appropriate gui and start this up)"""
@@ -76,6 +81,9 @@ class timekprClient(object):
         # periodic log flusher
         GLib.timeout_add_seconds(cons.TK_POLLTIME, self.autoFlushLogFile)
 
+        # count down time left between signals
+        GLib.timeout_add_seconds(cons.TK_POLLTIME, self.countDownTimeLeft)
+
         # start main loop
         self._mainLoop.run()
 
@@ -229,8 +237,42 @@ class timekprClient(object):
 
     # --------------- worker methods (from dbus) --------------- #
 
+    def countDownTimeLeft(self):
+        """Count down time left between signals (server may send time left only when it changes at configured granularity)"""
+        # only when time is being counted (older servers do not tell that)
+        if self._timeLeftReceived is not None and self._timeLeftReceived[1].get(cons.TK_CTRL_CNTNG, 0) > 0:
+            # time passed since signal
+            timePassed = int(time.monotonic() - self._timeLeftReceivedAt)
+            # signal was not received in this polling cycle
+            if timePassed >= cons.TK_POLLTIME:
+                # copy of received information
+                timeInformation = dict(self._timeLeftReceived[1])
+                # count down time left
+                for rKey in (cons.TK_CTRL_LEFTD, cons.TK_CTRL_LEFT):
+                    timeInformation[rKey] = max(timeInformation[rKey] - timePassed, 0)
+                # count up time spent
+                for rKey in (cons.TK_CTRL_SPENT, cons.TK_CTRL_SPENTW, cons.TK_CTRL_SPENTM):
+                    timeInformation[rKey] += timePassed
+                # PlayTime is counted when activities are running
+                if timeInformation.get(cons.TK_CTRL_PTLSTC, 0) > 0 and cons.TK_CTRL_PTLPD in timeInformation:
+                    timeInformation[cons.TK_CTRL_PTLPD] = max(timeInformation[cons.TK_CTRL_PTLPD] - timePassed, 0)
+                    timeInformation[cons.TK_CTRL_PTSPD] += timePassed
+                # process counted down values
+                self.processTimeLeft(self._timeLeftReceived[0], timeInformation)
+
+        # repeat
+        return True
+
     def receiveTimeLeft(self, pPriority, pTimeInformation):
         """Receive the signal and process the data to user"""
+        # save for count down
+        self._timeLeftReceived = (pPriority, pTimeInformation)
+        self._timeLeftReceivedAt = time.monotonic()
+        # process
+        self.processTimeLeft(pPriority, pTimeInformation)
+
+    def processTimeLeft(self, pPriority, pTimeInformation):
+        """Process time left and show it to user"""
         # check which options are available
         timeLeft = (pTimeInformation[cons.TK_CTRL_LEFT] if cons.TK_CTRL_LEFT in pTimeInformation else 0)
         playTimeLeft = (pTimeInformation[cons.TK_CTRL_PTLPD] if cons.TK_CTRL_PTLSTC in pTimeInformation and cons.TK_CTRL_PTLPD in pTimeInformation and cons.TK_CTRL_PTTLO in pTimeInformation else None)
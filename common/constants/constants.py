@@ -44,6 +44,13 @@ TK_LOG_OWNER_ADMIN = 2
 TK_LOG_OWNER_ADMIN_SU = 3
 # default event count for log file flush
 TK_LOG_AUTO_FLUSH_EVT_CNT = 42
+# max lines kept in memory while they are not written (oldest lines are dropped)
+TK_LOG_BUFFER_MAX_LINES = 10000
+# log file rotation by size (bytes) and age (seconds), rotated file count and compression (0 - rotation is disabled, server log is rotated by logrotate)
+TK_LOG_ROTATE_SIZE = 10 * 1024 * 1024
+TK_LOG_ROTATE_AGE = 7 * 24 * 60 * 60
+TK_LOG_ROTATE_CNT = 3
+TK_LOG_ROTATE_COMPRESS = True
 
 # client config and default values
 TK_CL_NOTIF_MAX = 60
@@ -57,6 +64,8 @@ TK_CL_NOTIF_SND_NAME_IMPORTANT = "dialog-warning"
 TK_CL_INF_FULL = "F"
 TK_CL_INF_SAVED = "S"
 TK_CL_INF_RT = "R"
+# user control (saved) information fields which change when time spent is saved or adjusted
+TK_CL_INF_CONTROL_FIELDS = ("TIME_SPENT_BALANCE", "TIME_SPENT_DAY", "TIME_SPENT_WEEK", "TIME_SPENT_MONTH", "TIME_LEFT_DAY", "PLAYTIME_LEFT_DAY", "PLAYTIME_SPENT_DAY", "PLAYTIME_SPENT_WEEK")
 
 # ## files and locations ##
 # users and login configuration
@@ -64,6 +73,12 @@ TK_USERS_FILE = "/etc/passwd"
 TK_USER_LIMITS_FILE = [ "/etc/login.defs", "/usr/etc/login.defs" ]
 # backup extension
 TK_BACK_EXT = ".prev"
+# temporary file extension (for atomic saves)
+TK_TEMP_EXT = ".tmp"
+# time spent journal extension
+TK_JOURNAL_EXT = ".journal"
+# max count of parsed user config / control files kept in memory
+TK_PARSED_CONFIG_CACHE_SIZE = 64
 # log files
 TK_LOG_USER = "<USER>"
 TK_LOG_FILE = "timekpr.log"
@@ -101,9 +116,14 @@ TK_LOCALIZATION_DIR_DEV = "../resource/locale"
 TK_MAX_RETRIES = 5
 # max symbols to search for pattern in cmdline for PlayTime
 TK_MAX_CMD_SRCH = 512
+# interval for PlayTime process list consistency check (when processes are tracked by kernel events)
+TK_PLAYTIME_PROC_CHECK_INTERVAL = 300
+# receive buffer size for PlayTime process events (events are read once per poll)
+TK_PLAYTIME_PROC_EVT_BUFFER = 4 * 1024 * 1024
 
 # ## dbus ##
 # common
+TK_DBUS_DBUS_INTERFACE = "org.freedesktop.DBus"
 TK_DBUS_PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
 
 # login1
@@ -130,6 +150,8 @@ TK_DBUS_USER_NOTIF_INTERFACE = "com.timekpr.server.user.notifications"
 TK_DBUS_USER_LIMITS_INTERFACE = "com.timekpr.server.user.limits"
 TK_DBUS_USER_SESSION_ATTRIBUTE_INTERFACE = "com.timekpr.server.user.sessionattributes"
 TK_DBUS_USER_ADMIN_INTERFACE = "com.timekpr.server.user.admin"
+# time properties of the user (published on limits interface)
+TK_DBUS_USER_TIME_PROPERTIES = ("TimeLeftToday", "TimeLeftContinuous", "TimeSpentDay", "TimeSpentWeek", "TimeSpentMonth", "PlayTimeLeftToday", "PlayTimeActiveActivityCount")
 
 # actual user session validation and control
 TK_CTRL_SCR_N = "scrs"
@@ -143,6 +165,10 @@ TK_SCR_XDGCD_OVERRIDE = [
 
 # DBUS performance measurement
 TK_DBUS_ANSWER_TIME = 3
+# login1 state (users, sessions, properties) is kept up to date by signals, but full resync is done at this interval (in seconds)
+TK_DBUS_L1_RESYNC_TIME = 300
+# login1 properties which are not announced via PropertiesChanged (they change along with the rest, so they are invalidated)
+TK_DBUS_L1_NONEMITTING_PROPS = ("State",)
 
 # user and their restriction constants
 TK_CTRL_UID = "UID"      # user id
@@ -170,8 +196,8 @@ TK_CTRL_WKUPF = "/sys/class/rtc/rtc0/wakealarm"
 # session properties
 TK_CTRL_DBUS_SESS_OBJ = "SESSION_OBJECT"
 TK_CTRL_DBUS_SESS_IF = "SESSION_INTERFACE"
-TK_CTRL_DBUS_SESS_PROP_IF = "SESSION_PROPERTIES_INTERFACE"
 TK_CTRL_DBUS_SESS_PROP = "SESSION_STATIC_PROPERTIES"
+TK_CTRL_DBUS_SESS_PATH = "SESSION_PATH"
 
 # limit configuration
 TK_CTRL_NDAY = "NEXTDAY"     # next day idx
@@ -202,6 +228,7 @@ TK_CTRL_INT = "INTERVALS"    # intervals of time available to user
 TK_CTRL_TRACK = "TRACKI"     # whether to track inactive sessions
 TK_CTRL_HIDEI = "HIDEI"      # whether to hide timekpr icon
 TK_CTRL_TNL = "TNL"          # time not limited
+TK_CTRL_CNTNG = "CNTNG"      # whether time is being counted (clients count down between time left signals)
 TK_CTRL_PTTLE = "PTTLE"      # PlayTime enabled
 TK_CTRL_PTCNT = "PTCNT"      # PlayTime counters
 TK_CTRL_PTSPD = "PTSPD"      # time spent for PlayTime
@@ -258,6 +285,8 @@ TK_PT_NOTIFICATION_LEVELS = "180[1]"
 # ## user PlayTime defaults ##
 # enabled
 TK_PLAYTIME_ENABLED = False
+# whether PlayTime processes of users with filters are listed from their systemd cgroups (cgroup v2) instead of all processes
+TK_PLAYTIME_CGROUP_MONITOR_ENABLED = False
 # default value for allowed week days
 TK_PLAYTIME_ALLOWED_WEEKDAYS = "1;2;3;4;5;6;7"
 # how much PlayTime is allowed per allowed days
@@ -277,6 +306,18 @@ TK_TERMINATION_TIME = 15
 TK_FINAL_COUNTDOWN_TIME = 10
 # time left for final warning time
 TK_FINAL_NOTIFICATION_TIME = 60
+# how many users are evaluated concurrently (1 - one after another)
+TK_USER_EVALUATION_THREADS = 1
+TK_USER_EVALUATION_THREADS_MAX = 32
+# whether users are evaluated only when their deadlines come (instead of every polling cycle)
+TK_USER_EVALUATION_SCHEDULER = False
+# granularity (in seconds) of time left which clients see, signals are sent only when it's crossed (0 - signals are sent every polling cycle)
+TK_TIMELEFT_SIGNAL_GRANULARITY = 0
+TK_TIMELEFT_SIGNAL_GRANULARITY_MAX = TK_LIMIT_PER_HOUR
+# max seconds user evaluation can be deferred (must be well below sleep detection time, which is 15 polling cycles)
+TK_USER_EVALUATION_MAX_DEFERRAL = TK_POLLTIME * 10
+# buckets (in seconds) for next deadline distribution statistics
+TK_USER_EVALUATION_DEADLINE_BUCKETS = (TK_POLLTIME, 10, 20, TK_USER_EVALUATION_MAX_DEFERRAL)
 # default value for tracking inactive sessions
 TK_TRACK_INACTIVE = False
 # default value for tracking inactive sessions
@@ -355,8 +396,12 @@ TK_USER_ADMIN_COMMANDS = {
     "--setplaytimealloweddays"              : "%s:\n    %s" % (msg.getTranslation("TK_MSG_USER_ADMIN_CMD_SETPLAYTIMEALLOWEDDAYS"), "timekpra --setplaytimealloweddays 'testuser' '1;2;3;4;5'"),
     "--setplaytimelimits"                   : "%s:\n    %s" % (msg.getTranslation("TK_MSG_USER_ADMIN_CMD_SETPLAYTIMELIMITS"), "timekpra --setplaytimelimits 'testuser' '1800;1800;1800;1800;3600'"),
     "--setplaytimeactivities"               : "%s:\n    %s" % (msg.getTranslation("TK_MSG_USER_ADMIN_CMD_SETPLAYTIMEACTIVITIES"), "timekpra --setplaytimeactivities 'testuser' 'DOOMEternalx64vk.exe[Doom Eternal];csgo_linux[CS: GO];firefox[Firefox browser]'"),
-    "--setplaytimeleft"                     : "%s:\n    %s" % (msg.getTranslation("TK_MSG_USER_ADMIN_CMD_SETPLAYTIMELEFT"), "timekpra --setplaytimeleft 'testuser' '+' 3600")
+    "--setplaytimeleft"                     : "%s:\n    %s" % (msg.getTranslation("TK_MSG_USER_ADMIN_CMD_SETPLAYTIMELEFT"), "timekpra --setplaytimeleft 'testuser' '+' 3600"),
+    "--users"                               : "%s:\n    %s" % (msg.getTranslation("TK_MSG_USER_ADMIN_CMD_USERS"), "timekpra --users 'testuser,testuser2' --settimelimitweek '50000'"),
+    "--group"                               : "%s:\n    %s" % (msg.getTranslation("TK_MSG_USER_ADMIN_CMD_GROUP"), "timekpra --group 'students' --setalloweddays '1;2;3;4;5'")
 }
+# users processed in one bulk request (progress is printed after each chunk)
+TK_BULK_USER_CHUNK_SIZE = 25
 
 
 def getNotificationPrioriy(pPriority):
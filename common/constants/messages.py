@@ -50,6 +50,8 @@ def initMessages():
     _messages["TK_MSG_USER_ADMIN_CMD_SETPLAYTIMELIMITS"] = {"s": _("==> set PlayTime limits for all allowed days, the number of values must not exceed the allowed PlayTime allowed days for the user, example")}
     _messages["TK_MSG_USER_ADMIN_CMD_SETPLAYTIMEACTIVITIES"] = {"s": _("==> set PlayTime activity process masks, for which the time is accounted, example")}
     _messages["TK_MSG_USER_ADMIN_CMD_SETPLAYTIMELEFT"] = {"s": _("==> set PlayTime left for the user at the current moment of time: \"+\" (add time), \"-\" (subtract time), \"=\" (set exact time available), example (add one hour)")}
+    _messages["TK_MSG_USER_ADMIN_CMD_USERS"] = {"s": _("==> execute any of user commands for multiple users at once (user name is not specified for the command itself), example")}
+    _messages["TK_MSG_USER_ADMIN_CMD_GROUP"] = {"s": _("==> execute any of user commands for all members of the group at once (user name is not specified for the command itself), example")}
 
     # ## this defines messages for use in configuration validation ##
     _messages["TK_MSG_ADMIN_CHK_CTRLSESSIONS_NONE"] = {"s": _("Control sessions types are not passed")}
@@ -138,6 +140,9 @@ def initMessages():
     _messages["TK_MSG_USER_ADMIN_CHK_PT_TIMELIMIT_OPERATION_INVALID"] = {"s": _("User's \"%%s\" PlayTime operation can be one of these: - + =")}
     _messages["TK_MSG_USER_ADMIN_CHK_PT_TIMELIMIT_INVALID"] = {"s": _("User's \"%%s\" set PlayTime limit is not correct")}
     _messages["TK_MSG_USER_ADMIN_CHK_PT_TIMELIMIT_INVALID_SET"] = {"s": _("User's \"%%s\" PlayTime time limit is not correct and cannot be set")}
+    _messages["TK_MSG_USER_ADMIN_CHK_CHANGES_NONE"] = {"s": _("User's \"%%s\" configuration changes are not passed")}
+    _messages["TK_MSG_USER_ADMIN_CHK_CHANGES_INVALID"] = {"s": _("User's \"%%s\" configuration option \"%%s\" is not supported")}
+    _messages["TK_MSG_USER_ADMIN_CHK_USERS_FAILED"] = {"s": _("Request failed for %%s of %%s users")}
 
     # ## this defines messages for use in configuration loader ##
     # TRANSLATORS: this message must be 80 symbols long at max
@@ -155,6 +160,7 @@ def initMessages():
     _messages["TK_MSG_CONFIG_LOADER_USERCONFIG_NOTFOUND"] = {"s": _("User \"%%s\" configuration is not found")}
     _messages["TK_MSG_CONFIG_LOADER_USERCONTROL_NOTFOUND"] = {"s": _("User \"%%s\" control file is not found")}
     _messages["TK_MSG_CONFIG_LOADER_USER_NOTFOUND"] = {"s": _("User \"%%s\" is not found")}
+    _messages["TK_MSG_CONFIG_LOADER_GROUP_NOTFOUND"] = {"s": _("Group \"%%s\" is not found")}
 
     # ## this defines messages for use in notifications ##
     _messages["TK_MSG_STATUS_CONNECTED"] = {"s": _("Connected")}
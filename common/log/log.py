@@ -6,6 +6,11 @@ Created on Aug 28, 2018
 
 # imports
 from datetime import datetime
+import collections
+import threading
+import shutil
+import gzip
+import time
 import os
 
 # timekpr imports
@@ -15,10 +20,22 @@ from timekpr.common.constants import constants as cons
 _LOG_LEVEL = cons.TK_LOG_LEVEL_INFO
 # logging to file
 _LOG_FILE = None
-# logging buffer (before we know where to put log file)
+# logging buffer (before we know where to put log file), it's a bounded ring (oldest lines are dropped when it's full)
 _LOG_PEND_EVT_CNT = 0
 _LOG_PEND_FLUSH_CNT = 0
-_LOG_BUFFER = []
+_LOG_BUFFER = collections.deque(maxlen=cons.TK_LOG_BUFFER_MAX_LINES)
+_LOG_BUFFER_LOCK = threading.Lock()
+_LOG_DROPPED_CNT = 0
+_LOG_DROPPED_REPORTED_CNT = 0
+# log writer (writes buffer to file in separate thread, file is kept open)
+_LOG_WRITER = None
+_LOG_WRITER_WAKEUP = threading.Event()
+_LOG_WRITE_LOCK = threading.Lock()
+_LOG_FILE_HANDLE = None
+_LOG_FILE_OPENED = None
+# log rotation (size, age)
+_LOG_ROTATE_SIZE = 0
+_LOG_ROTATE_AGE = 0
 
 # log names
 def _getLogFileName(pWho, pUserName):
@@ -31,29 +48,115 @@ def _getLogFileName(pWho, pUserName):
 
 def _output(pText):
     """Print to console and/or file"""
-    global _LOG_FILE, _LOG_PEND_EVT_CNT, _LOG_BUFFER
+    global _LOG_FILE, _LOG_PEND_EVT_CNT, _LOG_BUFFER, _LOG_DROPPED_CNT
 
     # format text
     logText = "%s: %s" % (datetime.now().strftime(cons.TK_LOG_DATETIME_FORMAT), pText)
-    # prepare a line for file
-    _LOG_BUFFER.append("%s\n" % (logText))
+    # buffer is swapped by writer, so it's accessed under lock
+    with _LOG_BUFFER_LOCK:
+        # buffer is full, oldest line will be dropped
+        if len(_LOG_BUFFER) >= cons.TK_LOG_BUFFER_MAX_LINES:
+            _LOG_DROPPED_CNT += 1
+        # prepare a line for file
+        _LOG_BUFFER.append("%s\n" % (logText))
 
     # in development mode, we spit out in console as well
     if cons.TK_DEV_ACTIVE:
         print(logText)
     # log only if enough calls are passed to log
     if _LOG_PEND_EVT_CNT >= cons.TK_LOG_AUTO_FLUSH_EVT_CNT:
-        # write buffers to log file
+        # ask writer to write buffers to log file
+        _LOG_WRITER_WAKEUP.set()
+
+
+def _executeLogWriter():
+    """Write buffers to log file when asked or periodically (this runs in a separate thread)"""
+    # write forever
+    while True:
+        # wait for the request or the time
+        _LOG_WRITER_WAKEUP.wait(cons.TK_POLLTIME)
+        _LOG_WRITER_WAKEUP.clear()
+        # write
         flushLogFile()
 
 
+def _openLogFile():
+    """Open log file (if it's not opened yet or it was moved / removed by someone else)"""
+    global _LOG_FILE_HANDLE, _LOG_FILE_OPENED
+    # file is opened, check that it's still the same file
+    if _LOG_FILE_HANDLE is not None:
+        try:
+            # same file
+            if os.path.samestat(os.fstat(_LOG_FILE_HANDLE.fileno()), os.stat(_LOG_FILE)):
+                return
+        except Exception:
+            pass
+        # reopen
+        _closeLogFile()
+
+    # open log file (append mode keeps writing at the end even if file is truncated by logrotate)
+    _LOG_FILE_HANDLE = open(_LOG_FILE, "a")
+    _LOG_FILE_OPENED = time.time()
+
+
+def _closeLogFile():
+    """Close log file"""
+    global _LOG_FILE_HANDLE
+    # close
+    if _LOG_FILE_HANDLE is not None:
+        try:
+            _LOG_FILE_HANDLE.close()
+        except Exception:
+            pass
+        # closed
+        _LOG_FILE_HANDLE = None
+
+
+def _rotateLogFile():
+    """Rotate log file if it's too large or too old (rotated files are renamed to file.1, file.2, ..., optionally compressed)"""
+    # check size and age
+    if not ((_LOG_ROTATE_SIZE > 0 and _LOG_FILE_HANDLE.tell() >= _LOG_ROTATE_SIZE) or (_LOG_ROTATE_AGE > 0 and time.time() - _LOG_FILE_OPENED >= _LOG_ROTATE_AGE and _LOG_FILE_HANDLE.tell() > 0)):
+        return
+
+    # close current file
+    _closeLogFile()
+    # extension for rotated files
+    ext = ".gz" if cons.TK_LOG_ROTATE_COMPRESS else ""
+    # shift rotated files (oldest is overwritten)
+    for rIdx in range(cons.TK_LOG_ROTATE_CNT - 1, 0, -1):
+        # rotated file exists
+        if os.path.isfile("%s.%i%s" % (_LOG_FILE, rIdx, ext)):
+            os.replace("%s.%i%s" % (_LOG_FILE, rIdx, ext), "%s.%i%s" % (_LOG_FILE, rIdx + 1, ext))
+    # rotate current file
+    os.replace(_LOG_FILE, "%s.1" % (_LOG_FILE))
+    # compress
+    if cons.TK_LOG_ROTATE_COMPRESS:
+        # compress and remove uncompressed file
+        with open("%s.1" % (_LOG_FILE), "rb") as fileIn, gzip.open("%s.1%s" % (_LOG_FILE, ext), "wb") as fileOut:
+            shutil.copyfileobj(fileIn, fileOut)
+        os.remove("%s.1" % (_LOG_FILE))
+    # open new file
+    _openLogFile()
+
+
 def setLogging(pLogLevel, pLogDir, pWho, pUserName):
     """Set up logging (this function expects 4 tuples: log level, log directory, log owner and username"""
-    global _LOG_FILE
+    global _LOG_FILE, _LOG_WRITER, _LOG_ROTATE_SIZE, _LOG_ROTATE_AGE
     # set up level
     setLogLevel(pLogLevel)
     # set up file
-    _LOG_FILE = os.path.join(pLogDir, _getLogFileName(pWho, pUserName))
+    with _LOG_WRITE_LOCK:
+        # file
+        _LOG_FILE = os.path.join(pLogDir, _getLogFileName(pWho, pUserName))
+        # file may have changed
+        _closeLogFile()
+        # server log is rotated by logrotate, others are rotated by us
+        _LOG_ROTATE_SIZE = cons.TK_LOG_ROTATE_SIZE if pWho != cons.TK_LOG_OWNER_SRV else 0
+        _LOG_ROTATE_AGE = cons.TK_LOG_ROTATE_AGE if pWho != cons.TK_LOG_OWNER_SRV else 0
+    # start writer
+    if _LOG_WRITER is None:
+        _LOG_WRITER = threading.Thread(target=_executeLogWriter, name="timekprLogWriter", daemon=True)
+        _LOG_WRITER.start()
 
 
 def isLoggingActive():
@@ -85,15 +188,24 @@ def setLogLevel(pLvl):
     _LOG_LEVEL = pLvl
 
 
-def log(pLvl, pText):
+def getDroppedLineCount():
+    """Return how many log lines were dropped (in total) because they could not be written in time"""
+    global _LOG_DROPPED_CNT
+    # return
+    return _LOG_DROPPED_CNT
+
+
+def log(pLvl, pText, *args):
     """Print to console"""
+    """Text can be passed already formatted or as format string with arguments,
+        in the latter case text is formatted only when the level is enabled, e.g. log(cons.TK_LOG_LEVEL_DEBUG, "user: %s", userName)"""
     global _LOG_LEVEL, _LOG_PEND_EVT_CNT
     # check debug level and output
     if pLvl <= _LOG_LEVEL:
         # add to pending event cnt
         _LOG_PEND_EVT_CNT += 1
-        # redirect to output
-        _output(pText)
+        # redirect to output (format only if arguments are passed)
+        _output(pText % args if len(args) > 0 else pText)
 
 
 def autoFlushLogFile():
@@ -105,28 +217,57 @@ def autoFlushLogFile():
 
     # when the time has come, just flush the log file
     if _LOG_PEND_FLUSH_CNT >= cons.TK_POLLTIME:
-        # flush the log
-        flushLogFile()
+        # ask writer to flush the log
+        _LOG_WRITER_WAKEUP.set()
 
 
 def flushLogFile():
-    """This will flush the log file to file"""
+    """This will flush the log file to file (this is called by writer and when logging finishes)"""
     # iport globals
-    global _LOG_FILE, _LOG_BUFFER, _LOG_PEND_EVT_CNT, _LOG_PEND_FLUSH_CNT
-    # we can only flush if there is a file
-    if _LOG_FILE is not None and len(_LOG_BUFFER) > 0:
-        try:
-            # open log file
-            with open(_LOG_FILE, "a") as logFile:
+    global _LOG_FILE, _LOG_BUFFER, _LOG_PEND_EVT_CNT, _LOG_PEND_FLUSH_CNT, _LOG_DROPPED_CNT, _LOG_DROPPED_REPORTED_CNT
+    # one writer at a time
+    with _LOG_WRITE_LOCK:
+        # we can only flush if there is a file
+        if _LOG_FILE is not None and len(_LOG_BUFFER) > 0:
+            # take lines to write, new lines go to a fresh buffer
+            with _LOG_BUFFER_LOCK:
+                logLines = _LOG_BUFFER
+                _LOG_BUFFER = collections.deque(maxlen=cons.TK_LOG_BUFFER_MAX_LINES)
+                droppedCnt = _LOG_DROPPED_CNT
+            # def
+            isWritten = False
+            try:
+                # open log file
+                _openLogFile()
+                # inform about dropped lines (since last write)
+                if droppedCnt > _LOG_DROPPED_REPORTED_CNT:
+                    _LOG_FILE_HANDLE.write("%s: WARNING: %i log lines were dropped, because log could not be written in time\n" % (datetime.now().strftime(cons.TK_LOG_DATETIME_FORMAT), droppedCnt - _LOG_DROPPED_REPORTED_CNT))
                 # write whole buffer to log file
-                logFile.writelines(_LOG_BUFFER)
+                _LOG_FILE_HANDLE.writelines(logLines)
+                _LOG_FILE_HANDLE.flush()
                 # reset
                 _LOG_PEND_EVT_CNT = 0
                 _LOG_PEND_FLUSH_CNT = 0
-                _LOG_BUFFER.clear()
-        except Exception as ex:
-            # spit out to console
-            consoleOut("ERROR, CAN NOT WRITE TO LOG DUE TO:\n%s" % (ex))
+                _LOG_DROPPED_REPORTED_CNT = droppedCnt
+                isWritten = True
+                # rotate if needed
+                _rotateLogFile()
+            except Exception as ex:
+                # lines were not written, put them back in front of new lines (oldest are dropped if buffer is full)
+                if not isWritten:
+                    with _LOG_BUFFER_LOCK:
+                        # dropped
+                        _LOG_DROPPED_CNT += max(0, len(logLines) + len(_LOG_BUFFER) - cons.TK_LOG_BUFFER_MAX_LINES)
+                        # restore
+                        logLines.extend(_LOG_BUFFER)
+                        _LOG_BUFFER = logLines
+                # retry only when next flush is due (not on every log line)
+                _LOG_PEND_EVT_CNT = 0
+                _LOG_PEND_FLUSH_CNT = 0
+                # file will be reopened next time
+                _closeLogFile()
+                # spit out to console
+                consoleOut("ERROR, CAN NOT WRITE TO LOG DUE TO:\n%s" % (ex))
 
 
 def consoleOut(*args):
@@ -9,8 +9,12 @@ import configparser
 from datetime import datetime
 import re
 import os
-import shutil
+import stat
 import getpass
+import copy
+import tempfile
+import threading
+from collections import OrderedDict
 
 # timekpr imports
 from timekpr.common.log import log
@@ -24,87 +28,202 @@ RE_KEYFINDER = re.compile("^ *([A-Z]+[A-Z_]+[0-9]*) *=.*$")
 RE_ARRAYKEYFINDER = re.compile("^##([A-Z]+[A-Z_]+)##.*$")
 
 
-def _saveConfigFile(pConfigFile, pKeyValuePairs):
-    """Save the config file using custom helper function"""
+# cached config file templates (file lines, file signature after last save, values saved)
+_CONFIG_TEMPLATES = {}
+# cached parsed config values shared by all instances (file: (file signature, values)), least recently used are evicted first
+_PARSED_CONFIG_CACHE = OrderedDict()
+_PARSED_CONFIG_CACHE_LOCK = threading.Lock()
+
+
+def _getConfigFileSignature(pConfigFile):
+    """Get config file signature (inode, modification time, size, mode and owner) to detect changes made by others"""
+    # stat file
+    fileStat = os.stat(pConfigFile)
+    # result
+    return (fileStat.st_ino, fileStat.st_mtime_ns, fileStat.st_size, fileStat.st_mode, fileStat.st_uid, fileStat.st_gid)
+
+
+def _getParsedConfigFromCache(pConfigFile):
+    """Get file signature and copy of parsed values if they are cached and file has not changed since then"""
+    global _PARSED_CONFIG_CACHE
+    # def
+    values = None
+    # file signature
+    try:
+        signature = _getConfigFileSignature(pConfigFile)
+    except OSError:
+        # no file, no cache
+        return None, None
+    # check cache
+    with _PARSED_CONFIG_CACHE_LOCK:
+        # cached values
+        cachedConfig = _PARSED_CONFIG_CACHE.get(pConfigFile)
+        # file has not changed
+        if cachedConfig is not None and cachedConfig[0] == signature:
+            # recently used
+            _PARSED_CONFIG_CACHE.move_to_end(pConfigFile)
+            # copy, so changes to values do not affect the cache
+            values = copy.deepcopy(cachedConfig[1])
+    # result
+    return signature, values
+
+
+def _putParsedConfigToCache(pConfigFile, pSignature, pValues):
+    """Cache parsed values for the file signature (file as it was before parsing)"""
+    global _PARSED_CONFIG_CACHE
+    # no signature, no cache
+    if pSignature is None:
+        return
+    # cache
+    with _PARSED_CONFIG_CACHE_LOCK:
+        # copy, so changes to values do not affect the cache
+        _PARSED_CONFIG_CACHE[pConfigFile] = (pSignature, copy.deepcopy(pValues))
+        _PARSED_CONFIG_CACHE.move_to_end(pConfigFile)
+        # evict least recently used
+        while len(_PARSED_CONFIG_CACHE) > cons.TK_PARSED_CONFIG_CACHE_SIZE:
+            _PARSED_CONFIG_CACHE.popitem(last=False)
+
+
+def _prepareConfigFileLines(pSrcLines, pKeyValuePairs):
+    """Prepare config file lines with the values applied"""
     global RE_KEYFINDER, RE_ARRAYKEYFINDER
-    # edit control file (using alternate method because configparser looses comments in the process)
-    # make a backup of the file
-    shutil.copy(pConfigFile, pConfigFile + cons.TK_BACK_EXT)
-    # read backup and write actual config file
-    with open(pConfigFile + cons.TK_BACK_EXT, "r") as srcFile, open(pConfigFile, "w") as dstFile:
-        # destination file
-        dstLines = []
-        # read line and do manipulations
-        for rLine in srcFile:
-            # def line
-            line = rLine
-            # if line matches parameter pattern, we look up for that key in our value list
-            if RE_KEYFINDER.match(rLine):
-                # check whether we can find the value for it
-                key = RE_KEYFINDER.sub(r"\1", rLine.rstrip())
-                # if key exists
-                if key in pKeyValuePairs:
-                    # in case of placeholder (value = None), just keep the line, else replace it
-                    if pKeyValuePairs[key] is not None:
-                        # now get the value
-                        dstLines.append("%s = %s\n" % (key, pKeyValuePairs[key]))
-                        # do not add original line
-                        line = None
-                else:
-                    # do not add unknown options
+    # destination file
+    dstLines = []
+    # read line and do manipulations
+    for rLine in pSrcLines:
+        # def line
+        line = rLine
+        # if line matches parameter pattern, we look up for that key in our value list
+        if RE_KEYFINDER.match(rLine):
+            # check whether we can find the value for it
+            key = RE_KEYFINDER.sub(r"\1", rLine.rstrip())
+            # if key exists
+            if key in pKeyValuePairs:
+                # in case of placeholder (value = None), just keep the line, else replace it
+                if pKeyValuePairs[key] is not None:
+                    # now get the value
+                    dstLines.append("%s = %s\n" % (key, pKeyValuePairs[key]))
+                    # do not add original line
                     line = None
-            # search for variable options
-            elif RE_ARRAYKEYFINDER.match(rLine):
-                # check whether we can find the value for it
-                key = RE_ARRAYKEYFINDER.sub(r"\1", rLine.rstrip())
-                # now get the value
-                dstLines.append("%s" % (rLine))
-                # if key exists
-                if key in pKeyValuePairs:
-                    # append array of values
-                    for rVal in pKeyValuePairs[key]:
-                        # now get the value
-                        dstLines.append("%s\n" % (rVal))
-                # do not add original line
+            else:
+                # do not add unknown options
                 line = None
+        # search for variable options
+        elif RE_ARRAYKEYFINDER.match(rLine):
+            # check whether we can find the value for it
+            key = RE_ARRAYKEYFINDER.sub(r"\1", rLine.rstrip())
+            # now get the value
+            dstLines.append("%s" % (rLine))
+            # if key exists
+            if key in pKeyValuePairs:
+                # append array of values
+                for rVal in pKeyValuePairs[key]:
+                    # now get the value
+                    dstLines.append("%s\n" % (rVal))
+            # do not add original line
+            line = None
+
+        # append if there is a line
+        if line is not None:
+            # add line
+            dstLines.append(line)
+
+    # result
+    return dstLines
 
-            # append if there is a line
-            if line is not None:
-                # add line
-                dstLines.append(line)
 
-        # save config lines back to file
-        dstFile.writelines(dstLines)
+def _saveConfigFile(pConfigFile, pKeyValuePairs):
+    """Save the config file using custom helper function (returns bytes written)"""
+    global _CONFIG_TEMPLATES
+    # edit control file (using alternate method because configparser looses comments in the process)
+    # current signature of the file
+    signature = _getConfigFileSignature(pConfigFile)
+    # cached template of the file (it's valid only if nobody else has changed the file since we saved it)
+    template = _CONFIG_TEMPLATES.get(pConfigFile)
+    # file was changed by someone else (or not yet read), read it
+    if template is None or template[1] != signature:
+        # read file
+        with open(pConfigFile, "r") as srcFile:
+            # template
+            template = (srcFile.readlines(), signature, None)
+    # nothing has changed since the last save
+    elif template[2] == pKeyValuePairs:
+        # logging
+        log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "config file \"%s\" has not changed, save skipped" % (pConfigFile))
+        # nothing to do
+        return 0
+
+    # prepare lines to write
+    dstLines = _prepareConfigFileLines(template[0], pKeyValuePairs)
+    # unique temporary file (in the same directory, so it can be renamed atomically, concurrent saves do not share it)
+    tmpFd, tmpConfigFile = tempfile.mkstemp(dir=os.path.dirname(pConfigFile) or ".", prefix=os.path.basename(pConfigFile) + ".", suffix=cons.TK_TEMP_EXT)
+
+    try:
+        # write new file in full
+        with os.fdopen(tmpFd, "w") as dstFile:
+            # save config lines to file
+            dstFile.writelines(dstLines)
+            # make sure data is on the disk before rename
+            dstFile.flush()
+            os.fsync(dstFile.fileno())
+        # preserve permissions and owner of the original file
+        os.chmod(tmpConfigFile, stat.S_IMODE(signature[3]))
+        os.chown(tmpConfigFile, signature[4], signature[5])
+        # replace the original file
+        os.replace(tmpConfigFile, pConfigFile)
+    except OSError as ex:
+        # logging (original file is left untouched)
+        log.log(cons.TK_LOG_LEVEL_INFO, "ERROR: could not save config file \"%s\" (%s)", pConfigFile, ex)
+        # remove temporary file
+        try:
+            os.remove(tmpConfigFile)
+        except OSError:
+            pass
+        # fail
+        raise
+
+    # make the rename durable as well
+    try:
+        # open directory
+        dirFd = os.open(os.path.dirname(pConfigFile) or ".", os.O_RDONLY)
+        try:
+            # sync directory
+            os.fsync(dirFd)
+        finally:
+            os.close(dirFd)
+    except OSError:
+        # not all filesystems support this
+        pass
+
+    # cache what was saved (template is the file as it is saved now)
+    _CONFIG_TEMPLATES[pConfigFile] = (dstLines, _getConfigFileSignature(pConfigFile), dict(pKeyValuePairs))
+
+    # result
+    return _CONFIG_TEMPLATES[pConfigFile][1][2]
 
 
 def _loadAndPrepareConfigFile(pConfigFileParser, pConfigFile, pLoadOnly=False):
-    """Try to load config file, if that fails, try to read backup file"""
+    """Try to load config file (files are saved atomically, so there is no backup to fall back to)"""
     # by default fail
     result = False
-    # process primary and backup files
-    for rFile in (pConfigFile, pConfigFile + cons.TK_BACK_EXT):
-        # if file is ok
-        if os.path.isfile(rFile) and os.path.getsize(rFile) != 0:
-            # copy file back to original (if this is backup file)
-            if rFile != pConfigFile and not pLoadOnly:
-                shutil.copy(rFile, pConfigFile)
-            # read config
-            try:
-                # read config file
-                pConfigFileParser.read(pConfigFile)
-                # success
-                result = True
-                break
-            except Exception:
-                # not load only
-                if not pLoadOnly:
-                    # fail, move corrupted file
-                    os.rename(rFile, "%s.invalid" % (rFile))
-        else:
-            # we do not need empty files
-            if os.path.isfile(rFile) and not pLoadOnly:
-                # remove empty file
-                os.remove(rFile)
+    # if file is ok
+    if os.path.isfile(pConfigFile) and os.path.getsize(pConfigFile) != 0:
+        # read config
+        try:
+            # read config file
+            pConfigFileParser.read(pConfigFile)
+            # success
+            result = True
+        except Exception:
+            # not load only
+            if not pLoadOnly:
+                # fail, move corrupted file
+                os.rename(pConfigFile, "%s.invalid" % (pConfigFile))
+    else:
+        # we do not need empty files
+        if os.path.isfile(pConfigFile) and not pLoadOnly:
+            # remove empty file
+            os.remove(pConfigFile)
 
     # result
     return result
@@ -211,6 +330,17 @@ class timekprConfig(object):
         # read
         param = "TIMEKPR_FINAL_NOTIFICATION_TIME"
         resultValue, self._timekprConfig[param] = _readAndNormalizeValue(self._timekprConfigParser.getint, section, param, pDefaultValue=cons.TK_FINAL_NOTIFICATION_TIME, pCheckValue=None, pOverallSuccess=resultValue)
+        # read
+        param = "TIMEKPR_USER_EVALUATION_THREADS"
+        resultValue, self._timekprConfig[param] = _readAndNormalizeValue(self._timekprConfigParser.getint, section, param, pDefaultValue=cons.TK_USER_EVALUATION_THREADS, pCheckValue=cons.TK_USER_EVALUATION_THREADS_MAX, pOverallSuccess=resultValue)
+        self._timekprConfig[param] = max(self._timekprConfig[param], 1)
+        # read
+        param = "TIMEKPR_USER_EVALUATION_SCHEDULER"
+        resultValue, self._timekprConfig[param] = _readAndNormalizeValue(self._timekprConfigParser.getboolean, section, param, pDefaultValue=cons.TK_USER_EVALUATION_SCHEDULER, pCheckValue=None, pOverallSuccess=resultValue)
+        # read
+        param = "TIMEKPR_TIMELEFT_SIGNAL_GRANULARITY"
+        resultValue, self._timekprConfig[param] = _readAndNormalizeValue(self._timekprConfigParser.getint, section, param, pDefaultValue=cons.TK_TIMELEFT_SIGNAL_GRANULARITY, pCheckValue=cons.TK_TIMELEFT_SIGNAL_GRANULARITY_MAX, pOverallSuccess=resultValue)
+        self._timekprConfig[param] = max(self._timekprConfig[param], 0)
 
         # session section
         section = "SESSION"
@@ -254,6 +384,9 @@ class timekprConfig(object):
         # read
         param = "TIMEKPR_PLAYTIME_ENHANCED_ACTIVITY_MONITOR_ENABLED"
         resultValue, self._timekprConfig[param] = _readAndNormalizeValue(self._timekprConfigParser.getboolean, section, param, pDefaultValue=cons.TK_PLAYTIME_ENABLED, pCheckValue=None, pOverallSuccess=resultValue)
+        # read
+        param = "TIMEKPR_PLAYTIME_CGROUP_MONITOR_ENABLED"
+        resultValue, self._timekprConfig[param] = _readAndNormalizeValue(self._timekprConfigParser.getboolean, section, param, pDefaultValue=cons.TK_PLAYTIME_CGROUP_MONITOR_ENABLED, pCheckValue=None, pOverallSuccess=resultValue)
 
         # if we could not read some values, save what we could + defaults
         if not resultValue:
@@ -322,6 +455,20 @@ class timekprConfig(object):
         param = "TIMEKPR_FINAL_NOTIFICATION_TIME"
         self._timekprConfigParser.set(section, "# this defines a time interval prior to termination of user sessions when timekpr will send one final warning about time left")
         self._timekprConfigParser.set(section, "%s" % (param), str(self._timekprConfig[param]) if pReuseValues else str(cons.TK_FINAL_NOTIFICATION_TIME))
+        # set up param
+        param = "TIMEKPR_USER_EVALUATION_THREADS"
+        self._timekprConfigParser.set(section, "# this defines how many users are evaluated concurrently in one polling cycle (1 - one after another, more - concurrently using a pool of threads)")
+        self._timekprConfigParser.set(section, "%s" % (param), str(self._timekprConfig[param]) if pReuseValues else str(cons.TK_USER_EVALUATION_THREADS))
+        # set up param
+        param = "TIMEKPR_USER_EVALUATION_SCHEDULER"
+        self._timekprConfigParser.set(section, "# this defines whether users are evaluated only when their next deadline comes (limit, hour or interval boundary, notification, save time)")
+        self._timekprConfigParser.set(section, "#   or their sessions change, instead of evaluating every user every polling cycle")
+        self._timekprConfigParser.set(section, "%s" % (param), str(self._timekprConfig[param]) if pReuseValues else str(cons.TK_USER_EVALUATION_SCHEDULER))
+        # set up param
+        param = "TIMEKPR_TIMELEFT_SIGNAL_GRANULARITY"
+        self._timekprConfigParser.set(section, "# this defines granularity of time left in seconds, time left is sent to clients only when it crosses the granularity (e.g. 60 - minute changes),")
+        self._timekprConfigParser.set(section, "#   priority or state changes or clients request it, clients count down in between (0 - time left is sent every polling cycle)")
+        self._timekprConfigParser.set(section, "%s" % (param), str(self._timekprConfig[param]) if pReuseValues else str(cons.TK_TIMELEFT_SIGNAL_GRANULARITY))
 
         section = "SESSION"
         self._timekprConfigParser.add_section(section)
@@ -370,6 +517,11 @@ class timekprConfig(object):
         param = "TIMEKPR_PLAYTIME_ENHANCED_ACTIVITY_MONITOR_ENABLED"
         self._timekprConfigParser.set(section, "# whether PlayTime activity monitor will use process command line, including arguments, for monitoring processes (by default only uses the process name)")
         self._timekprConfigParser.set(section, "%s" % (param), str(self._timekprConfig[param]) if pReuseValues else str(cons.TK_PLAYTIME_ENABLED))
+        # set up param
+        param = "TIMEKPR_PLAYTIME_CGROUP_MONITOR_ENABLED"
+        self._timekprConfigParser.set(section, "# whether PlayTime activity monitor lists processes of users with activities from their systemd cgroups (user-<uid>.slice, cgroup v2 only) instead of all processes")
+        self._timekprConfigParser.set(section, "# (faster on busy systems, but processes started outside user slice, e.g. by cron or system services, are not monitored)")
+        self._timekprConfigParser.set(section, "%s" % (param), str(self._timekprConfig[param]) if pReuseValues else str(cons.TK_PLAYTIME_CGROUP_MONITOR_ENABLED))
 
         # save the file
         with open(self._configFile, "w") as fp:
@@ -407,6 +559,15 @@ class timekprConfig(object):
         # final notification time (final warning before terminating session)
         param = "TIMEKPR_FINAL_NOTIFICATION_TIME"
         values[param] = str(self._timekprConfig[param])
+        # user evaluation threads (how many users are evaluated concurrently)
+        param = "TIMEKPR_USER_EVALUATION_THREADS"
+        values[param] = str(self._timekprConfig[param])
+        # user evaluation scheduler (evaluate users only when deadlines come)
+        param = "TIMEKPR_USER_EVALUATION_SCHEDULER"
+        values[param] = str(self._timekprConfig[param])
+        # time left signal granularity (send time left only when granularity is crossed)
+        param = "TIMEKPR_TIMELEFT_SIGNAL_GRANULARITY"
+        values[param] = str(self._timekprConfig[param])
         # which session types to control
         param = "TIMEKPR_SESSION_TYPES_CTRL"
         values[param] = str(self._timekprConfig[param])
@@ -422,6 +583,9 @@ class timekprConfig(object):
         # whether PlayTime enhanced activity monitor is enabled
         param = "TIMEKPR_PLAYTIME_ENHANCED_ACTIVITY_MONITOR_ENABLED"
         values[param] = str(self._timekprConfig[param])
+        # whether PlayTime processes are listed from user cgroups
+        param = "TIMEKPR_PLAYTIME_CGROUP_MONITOR_ENABLED"
+        values[param] = str(self._timekprConfig[param])
         # ## pass placeholders for directories ##
         # config dir
         param = "TIMEKPR_CONFIG_DIR"
@@ -468,6 +632,15 @@ class timekprConfig(object):
             # log
             param = "TIMEKPR_FINAL_NOTIFICATION_TIME"
             log.log(cons.TK_LOG_LEVEL_INFO, "  %s=%s" % (param, str(self._timekprConfig[param])))
+            # log
+            param = "TIMEKPR_USER_EVALUATION_THREADS"
+            log.log(cons.TK_LOG_LEVEL_INFO, "  %s=%s" % (param, str(self._timekprConfig[param])))
+            # log
+            param = "TIMEKPR_USER_EVALUATION_SCHEDULER"
+            log.log(cons.TK_LOG_LEVEL_INFO, "  %s=%s" % (param, str(self._timekprConfig[param])))
+            # log
+            param = "TIMEKPR_TIMELEFT_SIGNAL_GRANULARITY"
+            log.log(cons.TK_LOG_LEVEL_INFO, "  %s=%s" % (param, str(self._timekprConfig[param])))
 
             # log
             param = "TIMEKPR_SESSION_TYPES_CTRL"
@@ -486,6 +659,9 @@ class timekprConfig(object):
             # log
             param = "TIMEKPR_PLAYTIME_ENHANCED_ACTIVITY_MONITOR_ENABLED"
             log.log(cons.TK_LOG_LEVEL_INFO, "  %s=%s" % (param, str(self._timekprConfig[param])))
+            # log
+            param = "TIMEKPR_PLAYTIME_CGROUP_MONITOR_ENABLED"
+            log.log(cons.TK_LOG_LEVEL_INFO, "  %s=%s" % (param, str(self._timekprConfig[param])))
         # fail
         except Exception:
             # log
@@ -547,6 +723,27 @@ class timekprConfig(object):
         # result
         return self._timekprConfig[param]
 
+    def getTimekprUserEvaluationThreads(self):
+        """Get user evaluation thread count"""
+        # param
+        param = "TIMEKPR_USER_EVALUATION_THREADS"
+        # result
+        return self._timekprConfig[param]
+
+    def getTimekprUserEvaluationScheduler(self):
+        """Get whether user evaluation scheduler is enabled"""
+        # param
+        param = "TIMEKPR_USER_EVALUATION_SCHEDULER"
+        # result
+        return self._timekprConfig[param]
+
+    def getTimekprTimeLeftSignalGranularity(self):
+        """Get time left signal granularity"""
+        # param
+        param = "TIMEKPR_TIMELEFT_SIGNAL_GRANULARITY"
+        # result
+        return self._timekprConfig[param]
+
     def getTimekprSessionsCtrl(self):
         """Get sessions to control"""
         # param
@@ -610,11 +807,23 @@ class timekprConfig(object):
         # result
         return self._timekprConfig[param]
 
+    def getTimekprPlayTimeCgroupMonitorEnabled(self):
+        """Return whether PlayTime processes are listed from user cgroups"""
+        # param
+        param = "TIMEKPR_PLAYTIME_CGROUP_MONITOR_ENABLED"
+        # result
+        return self._timekprConfig[param]
+
     def getTimekprLastModified(self):
         """Get last file modification time"""
         # result
         return datetime.fromtimestamp(os.path.getmtime(self._configFile))
 
+    def getTimekprMainConfigFile(self):
+        """Get main config file"""
+        # result
+        return self._configFile
+
     def setTimekprLogLevel(self, pLogLevel):
         """Set logging level"""
         # result
@@ -650,6 +859,16 @@ class timekprConfig(object):
         # result
         self._timekprConfig["TIMEKPR_FINAL_NOTIFICATION_TIME"] = pFinalNotificationTimeSecs
 
+    def setTimekprUserEvaluationThreads(self, pUserEvaluationThreads):
+        """Set user evaluation thread count"""
+        # result
+        self._timekprConfig["TIMEKPR_USER_EVALUATION_THREADS"] = pUserEvaluationThreads
+
+    def setTimekprUserEvaluationScheduler(self, pUserEvaluationScheduler):
+        """Set whether user evaluation scheduler is enabled"""
+        # result
+        self._timekprConfig["TIMEKPR_USER_EVALUATION_SCHEDULER"] = bool(pUserEvaluationScheduler)
+
     def setTimekprSessionsCtrl(self, pSessionsCtrl):
         """Set sessions to control"""
         self._timekprConfig["TIMEKPR_SESSION_TYPES_CTRL"] = ";".join(pSessionsCtrl)
@@ -698,6 +917,17 @@ class timekprUserConfig(object):
         """Read user timekpr config file"""
         log.log(cons.TK_LOG_LEVEL_DEBUG, "start load user configuration")
 
+        # reuse already parsed values if file has not changed
+        signature, cachedConfig = _getParsedConfigFromCache(self._configFile)
+        # cached
+        if cachedConfig is not None:
+            # use cached values
+            self._timekprUserConfig = cachedConfig
+            # logging
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "finish load user configuration (cached)")
+            # result
+            return True
+
         # user config section
         section = self._userName
         # try to load config file
@@ -802,6 +1032,10 @@ class timekprUserConfig(object):
 
         log.log(cons.TK_LOG_LEVEL_DEBUG, "finish load user configuration")
 
+        # cache values only when file was parsed as is
+        if result and resultValue:
+            _putParsedConfigToCache(self._configFile, signature, self._timekprUserConfig)
+
         # result
         return result
 
@@ -1299,6 +1533,17 @@ class timekprUserControl(object):
         """Read user control config file"""
         log.log(cons.TK_LOG_LEVEL_DEBUG, "start loading user control (%s)" % (self._userName))
 
+        # reuse already parsed values if file has not changed
+        signature, cachedControl = _getParsedConfigFromCache(self._configFile)
+        # cached
+        if cachedControl is not None:
+            # use cached values
+            self._timekprUserControl = cachedControl
+            # logging
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "finish loading user control (cached)")
+            # result
+            return True
+
         # directory section
         section = self._userName
         # try to load config file
@@ -1357,6 +1602,10 @@ class timekprUserControl(object):
 
         log.log(cons.TK_LOG_LEVEL_DEBUG, "finish loading user control")
 
+        # cache values only when file was parsed as is
+        if result and resultValue:
+            _putParsedConfigToCache(self._configFile, signature, self._timekprUserControl)
+
         # result
         return result
 
@@ -1415,7 +1664,7 @@ class timekprUserControl(object):
         log.log(cons.TK_LOG_LEVEL_INFO, "finish init user control")
 
     def saveControl(self):
-        """Save configuration"""
+        """Save configuration (returns bytes written)"""
         log.log(cons.TK_LOG_LEVEL_INFO, "start save user (%s) control" % (self._userName))
 
         # init dict
@@ -1447,10 +1696,13 @@ class timekprUserControl(object):
         values[param] = str(int(self._timekprUserControl[param]))
 
         # edit control file (using alternate method because configparser looses comments in the process)
-        _saveConfigFile(self._configFile, values)
+        bytesWritten = _saveConfigFile(self._configFile, values)
 
         log.log(cons.TK_LOG_LEVEL_INFO, "finish save user control")
 
+        # result
+        return bytesWritten
+
     def logUserControl(self):
         """Log user control config file"""
         # log
@@ -1573,6 +1825,101 @@ class timekprUserControl(object):
         # result
         self._timekprUserControl["LAST_CHECKED"] = pEffectiveDatetime
 
+    def applyUserTimeSpentJournal(self, pJournalEntries):
+        """Apply time spent journal entries which were not saved yet (newer than last check time), returns count of applied entries"""
+        # def
+        entriesApplied = 0
+        # go through entries
+        for rDatetime, rHour, rTimeSpent, rPlayTimeBalance, rPlayTimeSpent in pJournalEntries:
+            # entry is already accounted in saved values
+            if rDatetime <= self._timekprUserControl["LAST_CHECKED"]:
+                continue
+            # control date components changed
+            dayChanged, weekChanged, monthChanged = self.getUserDateComponentChanges(rDatetime)
+            # reset day values
+            if dayChanged:
+                self._timekprUserControl["TIME_SPENT_BALANCE"] = self._timekprUserControl["TIME_SPENT_DAY"] = 0
+                self._timekprUserControl["PLAYTIME_SPENT_BALANCE"] = self._timekprUserControl["PLAYTIME_SPENT_DAY"] = 0
+            # reset week values
+            if weekChanged:
+                self._timekprUserControl["TIME_SPENT_WEEK"] = self._timekprUserControl["PLAYTIME_SPENT_WEEK"] = 0
+            # reset month values
+            if monthChanged:
+                self._timekprUserControl["TIME_SPENT_MONTH"] = 0
+            # time spent
+            for rParam in ("TIME_SPENT_BALANCE", "TIME_SPENT_DAY", "TIME_SPENT_WEEK", "TIME_SPENT_MONTH"):
+                self._timekprUserControl[rParam] += rTimeSpent
+            # PlayTime spent
+            self._timekprUserControl["PLAYTIME_SPENT_BALANCE"] += rPlayTimeBalance
+            self._timekprUserControl["PLAYTIME_SPENT_DAY"] += rPlayTimeSpent
+            self._timekprUserControl["PLAYTIME_SPENT_WEEK"] += rPlayTimeSpent
+            # entry is accounted
+            self._timekprUserControl["LAST_CHECKED"] = rDatetime
+            entriesApplied += 1
+        # result
+        return entriesApplied
+
+
+class timekprUserControlJournal(object):
+    """Class will provide append-only time spent journal, which keeps time spent between saves of user control file"""
+
+    def __init__(self, pDirectory, pUserName):
+        """Initialize journal"""
+        # initialize class variables
+        self._journalFile = os.path.join(pDirectory, "%s.time%s" % (pUserName, cons.TK_JOURNAL_EXT))
+        self._userName = pUserName
+        # journal file handle (kept open while user is tracked)
+        self._journalFileHandle = None
+
+    def appendEntry(self, pDatetime, pHour, pTimeSpent, pPlayTimeBalance, pPlayTimeSpent):
+        """Append time spent entry to journal and make it durable"""
+        # open journal for appending
+        if self._journalFileHandle is None:
+            self._journalFileHandle = open(self._journalFile, "a")
+        # write the entry
+        self._journalFileHandle.write("%s;%i;%i;%i;%i\n" % (pDatetime.strftime(cons.TK_DATETIME_FORMAT), pHour, pTimeSpent, pPlayTimeBalance, pPlayTimeSpent))
+        # make sure it's on the disk
+        self._journalFileHandle.flush()
+        os.fdatasync(self._journalFileHandle.fileno())
+
+    def readEntries(self):
+        """Read journal entries (datetime, hour, time spent, PlayTime balance, PlayTime spent)"""
+        # def
+        entries = []
+        # nothing to read
+        if not os.path.isfile(self._journalFile):
+            return entries
+        # read the journal
+        with open(self._journalFile, "r") as journalFile:
+            # go through lines
+            for rLine in journalFile:
+                try:
+                    # split the values
+                    values = rLine.rstrip("\n").split(";")
+                    # entry
+                    entries.append((datetime.strptime(values[0], cons.TK_DATETIME_FORMAT), int(values[1]), int(values[2]), int(values[3]), int(values[4])))
+                except Exception:
+                    # last entry may be incomplete in case of power loss
+                    log.log(cons.TK_LOG_LEVEL_INFO, "WARNING: invalid time spent journal entry for user \"%s\" skipped: %s" % (self._userName, rLine.rstrip("\n")))
+        # result
+        return entries
+
+    def truncateJournal(self):
+        """Truncate journal (entries are saved in user control file)"""
+        # truncate open journal
+        if self._journalFileHandle is not None:
+            os.ftruncate(self._journalFileHandle.fileno(), 0)
+        # truncate journal on the disk
+        elif os.path.isfile(self._journalFile) and os.path.getsize(self._journalFile) != 0:
+            os.truncate(self._journalFile, 0)
+
+    def closeJournal(self):
+        """Close journal"""
+        # close
+        if self._journalFileHandle is not None:
+            self._journalFileHandle.close()
+            self._journalFileHandle = None
+
     def setUserPlayTimeSpentBalance(self, pTimeSpent):
         """Set PlayTime balance for day (including bonues)"""
         # result
@@ -4,13 +4,9 @@ Created on Aug 28, 2018
 @author: mjasnik
 """
 
-# defaults
-_START_TIME = None
-_END_TIME = None
-_RESULT = 0
-
 # imports
 from datetime import datetime
+import threading
 import os
 import pwd
 import inspect
@@ -26,6 +22,9 @@ except (ImportError, ValueError):
 from timekpr.common.constants import constants as cons
 from timekpr.common.log import log
 
+# time measurement (kept per thread, because users are evaluated concurrently)
+_TIMING = threading.local()
+
 
 # this is needed for debugging purposes
 def whoami():
@@ -62,23 +61,18 @@ def getNormalizedUserNames(pUID=None, pUser=None):
 
 def measureTimeElapsed(pStart=False, pStop=False, pResult=False):
     """Calculate the time difference in the simplest manner"""
-    # init globals (per import)
-    global _START_TIME
-    global _END_TIME
-    global _RESULT
-
     # set up start
     if pStart:
-        _START_TIME = datetime.now()
+        _TIMING.start = datetime.now()
     # set up end
     if pStop:
         # calc seconds and finish stuff
-        _END_TIME = datetime.now()
-        _RESULT = (_END_TIME - _START_TIME).total_seconds()
-        _START_TIME = _END_TIME
+        _TIMING.end = datetime.now()
+        _TIMING.result = (_TIMING.end - _TIMING.start).total_seconds()
+        _TIMING.start = _TIMING.end
 
     # return
-    return _RESULT
+    return getattr(_TIMING, "result", 0)
 
 
 def measureDBUSTimeElapsed(pStart=False, pStop=False, pPrintToConsole=False, pDbusIFName=""):
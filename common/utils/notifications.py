@@ -32,6 +32,17 @@ class timekprNotificationManager(dbus.service.Object):
         self._lastNotified = datetime.now().replace(microsecond=0)
         self._notificationLvl = -1
         self._prevNotificationLvl = -1
+        # values of last time left signal which clients see (time values at granularity) and last time left
+        self._timeLeftSignalState = None
+        self._timeLeftPrev = None
+        # time left signal statistics
+        self._timeLeftSignalsSent = self._timeLeftSignalsSuppressed = 0
+        # prepared time limits (they are prepared only when configuration version changes) and statistics
+        self._timeLimits = None
+        self._timeLimitsVersion = None
+        self._timeLimitsHits = self._timeLimitsRebuilds = 0
+        # time properties (the whole dict is replaced on change, so it's safe to read from main loop)
+        self._timeProperties = {rProperty: 0 for rProperty in cons.TK_DBUS_USER_TIME_PROPERTIES}
 
         # ## define notifications levels
         # notifications are calculated as more than specified limit in ascending order, e.g. if there is 2400 seconds
@@ -76,6 +87,41 @@ class timekprNotificationManager(dbus.service.Object):
         # un-init DBUS
         super().remove_from_connection()
 
+    def getTimeLeftSignalStatistics(self):
+        """Get time left signals sent and suppressed since last call (statistics are reset)"""
+        # result
+        result = (self._timeLeftSignalsSent, self._timeLeftSignalsSuppressed)
+        # reset
+        self._timeLeftSignalsSent = self._timeLeftSignalsSuppressed = 0
+        # result
+        return result
+
+    def getNotificationLevels(self):
+        """Get time left values at which notification level changes"""
+        # levels
+        return tuple(rLimit[cons.TK_NOTIF_LEFT]() for rLimit in self._notificationLimits)
+
+    def _processTimeProperties(self, pTimeValues):
+        """Update time properties and inform about the changed ones"""
+        # new values (PlayTime values exist only when it's enabled)
+        timeProperties = {
+            "TimeLeftToday": int(pTimeValues[cons.TK_CTRL_LEFTD]),
+            "TimeLeftContinuous": int(pTimeValues[cons.TK_CTRL_LEFT]),
+            "TimeSpentDay": int(pTimeValues[cons.TK_CTRL_SPENTD]),
+            "TimeSpentWeek": int(pTimeValues[cons.TK_CTRL_SPENTW]),
+            "TimeSpentMonth": int(pTimeValues[cons.TK_CTRL_SPENTM]),
+            "PlayTimeLeftToday": int(pTimeValues[cons.TK_CTRL_PTLPD]) if cons.TK_CTRL_PTLPD in pTimeValues else 0,
+            "PlayTimeActiveActivityCount": int(pTimeValues[cons.TK_CTRL_PTLSTC]) if cons.TK_CTRL_PTLSTC in pTimeValues else 0
+        }
+        # changed values
+        changedProperties = dbus.Dictionary({rProperty: dbus.Int32(rValue) for rProperty, rValue in timeProperties.items() if self._timeProperties[rProperty] != rValue}, signature="sv")
+        # replace
+        self._timeProperties = timeProperties
+
+        # inform clients about changed values only
+        if len(changedProperties) > 0:
+            self.PropertiesChanged(cons.TK_DBUS_USER_LIMITS_INTERFACE, changedProperties, dbus.Array(signature="s"))
+
     def processTimeLeft(self, pForce, pTimeValues):
         """Process notifications and send signals if needed"""
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start processTimeLeft")
@@ -117,11 +163,31 @@ class timekprNotificationManager(dbus.service.Object):
             timeLeft[cons.TK_CTRL_PTLPD] = int(pTimeValues[cons.TK_CTRL_PTLPD])
             timeLeft[cons.TK_CTRL_PTLSTC] = int(pTimeValues[cons.TK_CTRL_PTLSTC])
 
+        # whether time is being counted (it decreases)
+        timeLeft[cons.TK_CTRL_CNTNG] = (1 if self._timeLeftPrev is not None and timeLeft[cons.TK_CTRL_LEFT] < self._timeLeftPrev else 0)
+        self._timeLeftPrev = timeLeft[cons.TK_CTRL_LEFT]
+
         # save calculated urgency (calculated may get overridden by uacc)
         notifUrgency = cons.TK_PRIO_UACC if pTimeValues[cons.TK_CTRL_UACC] else self._notificationLimits[self._notificationLvl][cons.TK_NOTIF_URGENCY]
 
-        # inform clients about time left in any case
-        self.timeLeft(notifUrgency, timeLeft)
+        # time left granularity
+        granularity = self._timekprConfig.getTimekprTimeLeftSignalGranularity()
+        # values which clients see (time left at granularity, time spent is counted by clients between signals)
+        signalState = (notifUrgency,) + tuple((rValue // granularity if rKey in (cons.TK_CTRL_LEFTD, cons.TK_CTRL_LEFT, cons.TK_CTRL_PTLPD) else rValue) for rKey, rValue in timeLeft.items() if rKey not in (cons.TK_CTRL_SPENT, cons.TK_CTRL_SPENTW, cons.TK_CTRL_SPENTM, cons.TK_CTRL_SLEEP, cons.TK_CTRL_PTSPD)) if granularity > 0 else None
+
+        # inform clients about time left when requested, every time (no granularity) or when values which clients see have changed
+        if pForce or signalState is None or signalState != self._timeLeftSignalState:
+            # save state
+            self._timeLeftSignalState = signalState
+            # inform
+            self.timeLeft(notifUrgency, timeLeft)
+            # statistics
+            self._timeLeftSignalsSent += 1
+        else:
+            # statistics
+            self._timeLeftSignalsSuppressed += 1
+        # update time properties
+        self._processTimeProperties(pTimeValues)
 
         # if notification levels changed (and it was not the first iteration)
         if (pForce) or (self._notificationLvl != self._prevNotificationLvl) or (abs((effectiveDatetime - self._lastNotified).total_seconds()) >= self._notificationLimits[self._notificationLvl][cons.TK_NOTIF_INTERVAL]() and not pTimeValues[cons.TK_CTRL_UACC]):
@@ -138,11 +204,28 @@ class timekprNotificationManager(dbus.service.Object):
                 # limit
                 self.timeLeftNotification(notifUrgency, max(pTimeValues[cons.TK_CTRL_LEFT], 0), max(pTimeValues[cons.TK_CTRL_LEFTD], 0), pTimeValues[cons.TK_CTRL_LIMITD])
 
-        log.log(cons.TK_LOG_LEVEL_DEBUG, "time left, tlrow: %i, tleftd: %i, tlimd: %i, notification lvl: %s, priority: %s, force: %s" % (pTimeValues[cons.TK_CTRL_LEFT], pTimeValues[cons.TK_CTRL_LEFTD], pTimeValues[cons.TK_CTRL_LIMITD], self._notificationLvl, notifUrgency, str(pForce)))
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "time left, tlrow: %i, tleftd: %i, tlimd: %i, notification lvl: %s, priority: %s, force: %s", pTimeValues[cons.TK_CTRL_LEFT], pTimeValues[cons.TK_CTRL_LEFTD], pTimeValues[cons.TK_CTRL_LIMITD], self._notificationLvl, notifUrgency, pForce)
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "finish processTimeLeft")
 
-    def processTimeLimits(self, pTimeLimits):
-        """Enable sending out the limits config"""
+    def isTimeLimitsPrepared(self, pVersion):
+        """Whether time limits are prepared for configuration version"""
+        # result
+        return self._timeLimits is not None and self._timeLimitsVersion == pVersion
+
+    def getTimeLimitsStatistics(self):
+        """Get how many times prepared time limits were used and how many times they were prepared"""
+        # result
+        return self._timeLimitsHits, self._timeLimitsRebuilds
+
+    def resendTimeLimits(self):
+        """Send out prepared limits config again"""
+        # statistics
+        self._timeLimitsHits += 1
+        # process
+        self.timeLimits(cons.TK_PRIO_LOW, self._timeLimits)
+
+    def processTimeLimits(self, pTimeLimits, pVersion):
+        """Enable sending out the limits config (it's kept for configuration version, so it can be sent again)"""
         # dbus dict for holding days
         timeLimits = dbus.Dictionary(signature="sv")
 
@@ -180,6 +263,12 @@ class timekprNotificationManager(dbus.service.Object):
         if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
             log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "TLDB: %s" % (str(timeLimits)))
 
+        # keep prepared limits
+        self._timeLimits = timeLimits
+        self._timeLimitsVersion = pVersion
+        # statistics
+        self._timeLimitsRebuilds += 1
+
         # process
         self.timeLimits(cons.TK_PRIO_LOW, timeLimits)
 
@@ -215,6 +304,39 @@ class timekprNotificationManager(dbus.service.Object):
         # this just passes time back
         pass
 
+    # --------------- DBUS / communication methods (time properties) --------------- #
+
+    @dbus.service.method(cons.TK_DBUS_PROPERTIES_INTERFACE, in_signature="ss", out_signature="v")
+    def Get(self, pInterfaceName, pPropertyName):
+        """Get time property"""
+        # current values
+        timeProperties = self._timeProperties
+        # check property
+        if pInterfaceName != cons.TK_DBUS_USER_LIMITS_INTERFACE or pPropertyName not in timeProperties:
+            raise dbus.exceptions.DBusException("Unknown property \"%s\" for interface \"%s\"" % (pPropertyName, pInterfaceName), name="org.freedesktop.DBus.Error.UnknownProperty")
+        # result
+        return dbus.Int32(timeProperties[pPropertyName])
+
+    @dbus.service.method(cons.TK_DBUS_PROPERTIES_INTERFACE, in_signature="s", out_signature="a{sv}")
+    def GetAll(self, pInterfaceName):
+        """Get all time properties (other interfaces do not have properties)"""
+        # current values
+        timeProperties = self._timeProperties if pInterfaceName == cons.TK_DBUS_USER_LIMITS_INTERFACE else {}
+        # result
+        return dbus.Dictionary({rProperty: dbus.Int32(rValue) for rProperty, rValue in timeProperties.items()}, signature="sv")
+
+    @dbus.service.method(cons.TK_DBUS_PROPERTIES_INTERFACE, in_signature="ssv", out_signature="")
+    def Set(self, pInterfaceName, pPropertyName, pValue):
+        """Set time property (all properties are read only)"""
+        # not allowed
+        raise dbus.exceptions.DBusException("Property \"%s\" for interface \"%s\" is read only" % (pPropertyName, pInterfaceName), name="org.freedesktop.DBus.Error.PropertyReadOnly")
+
+    @dbus.service.signal(cons.TK_DBUS_PROPERTIES_INTERFACE, signature="sa{sv}as")
+    def PropertiesChanged(self, pInterfaceName, pChangedProperties, pInvalidatedProperties):
+        """Send out signal"""
+        # this just passes changed properties back
+        pass
+
     # --------------- DBUS / communication methods (notifications) --------------- #
 
     @dbus.service.signal(cons.TK_DBUS_USER_NOTIF_INTERFACE, signature="siii")
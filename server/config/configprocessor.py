@@ -27,6 +27,8 @@ class timekprUserConfigurationProcessor(object):
         self._userName = pUserName
         self._timekprUserConfig = None
         self._timekprUserControl = None
+        # whether multiple changes are applied in one go (config is loaded and saved once)
+        self._batchUpdate = False
 
     def loadAndCheckUserConfiguration(self):
         """Load the user configuration (to verify whether user config exists and is readable)"""
@@ -34,6 +36,11 @@ class timekprUserConfigurationProcessor(object):
         result = 0
         message = ""
 
+        # config is already loaded for batch update
+        if self._batchUpdate and self._timekprUserConfig is not None:
+            # result
+            return result, message
+
         # user config
         self._timekprUserConfig = timekprUserConfig(self._configDir, self._userName)
 
@@ -46,6 +53,13 @@ class timekprUserConfigurationProcessor(object):
         # result
         return result, message
 
+    def _saveUserConfiguration(self):
+        """Save the user configuration (save is postponed till all changes are applied for batch update)"""
+        # save only when not in batch update
+        if not self._batchUpdate:
+            # save config
+            self._timekprUserConfig.saveUserConfiguration()
+
     def loadAndCheckUserControl(self):
         """Load the user control saved state (to verify whether user control exists and is readable)"""
         # result
@@ -322,7 +336,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -401,7 +415,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -452,7 +466,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -498,7 +512,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -544,7 +558,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -591,7 +605,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -633,7 +647,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -675,7 +689,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -789,7 +803,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -835,7 +849,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -881,7 +895,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -937,7 +951,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -988,7 +1002,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -1030,7 +1044,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -1081,7 +1095,7 @@ class timekprUserConfigurationProcessor(object):
             # if we are still fine
             if result == 0:
                 # save config
-                self._timekprUserConfig.saveUserConfiguration()
+                self._saveUserConfiguration()
 
         # result
         return result, message
@@ -1152,6 +1166,81 @@ class timekprUserConfigurationProcessor(object):
         # result
         return result, message
 
+    def checkAndSetUserConfiguration(self, pChanges):
+        """Validate and set up multiple configuration options for the user at once"""
+        """Validate all changes for the user, the configuration is saved only once and only when all changes are correct
+            server expects a dict where keys are the same as in saved user information and values are the same as for separate set methods:
+                ALLOWED_WEEKDAYS, LIMITS_PER_WEEKDAYS, ALLOWED_HOURS_<day number or ALL>, TRACK_INACTIVE, HIDE_TRAY_ICON,
+                LOCKOUT_TYPE (list of type, wakeup hour from, wakeup hour to), LIMIT_PER_WEEK, LIMIT_PER_MONTH,
+                PLAYTIME_ENABLED, PLAYTIME_LIMIT_OVERRIDE_ENABLED, PLAYTIME_UNACCOUNTED_INTERVALS_ENABLED,
+                PLAYTIME_ALLOWED_WEEKDAYS, PLAYTIME_LIMITS_PER_WEEKDAYS, PLAYTIME_LIMIT_PER_WEEK, PLAYTIME_ACTIVITIES"""
+        # option processors
+        optionProcessors = {
+            "ALLOWED_WEEKDAYS": self.checkAndSetAllowedDays,
+            "LIMITS_PER_WEEKDAYS": self.checkAndSetTimeLimitForDays,
+            "TRACK_INACTIVE": lambda pVal: self.checkAndSetTrackInactive(bool(pVal)),
+            "HIDE_TRAY_ICON": lambda pVal: self.checkAndSetHideTrayIcon(bool(pVal)),
+            "LOCKOUT_TYPE": lambda pVal: self.checkAndSetLockoutType(*pVal),
+            "LIMIT_PER_WEEK": self.checkAndSetTimeLimitForWeek,
+            "LIMIT_PER_MONTH": self.checkAndSetTimeLimitForMonth,
+            "PLAYTIME_ENABLED": lambda pVal: self.checkAndSetPlayTimeEnabled(bool(pVal)),
+            "PLAYTIME_LIMIT_OVERRIDE_ENABLED": lambda pVal: self.checkAndSetPlayTimeLimitOverride(bool(pVal)),
+            "PLAYTIME_UNACCOUNTED_INTERVALS_ENABLED": lambda pVal: self.checkAndSetPlayTimeUnaccountedIntervalsEnabled(bool(pVal)),
+            "PLAYTIME_ALLOWED_WEEKDAYS": self.checkAndSetPlayTimeAllowedDays,
+            "PLAYTIME_LIMITS_PER_WEEKDAYS": self.checkAndSetPlayTimeLimitsForDays,
+            "PLAYTIME_LIMIT_PER_WEEK": self.checkAndSetPlayTimeLimitForWeek,
+            "PLAYTIME_ACTIVITIES": self.checkAndSetPlayTimeActivities
+        }
+        # allowed hours are passed per day (day is validated when hours are set)
+        hoursOpt = "ALLOWED_HOURS_"
+
+        # check if we have this user
+        result, message = self.loadAndCheckUserConfiguration()
+
+        # if we are still fine
+        if result != 0:
+            # result
+            pass
+        # if we have no changes
+        elif pChanges is None or len(pChanges) < 1:
+            # result
+            result = -1
+            message = msg.getTranslation("TK_MSG_USER_ADMIN_CHK_CHANGES_NONE") % (self._userName)
+        else:
+            # unsupported option
+            for rOpt in pChanges:
+                # check
+                if str(rOpt) not in optionProcessors and not str(rOpt).startswith(hoursOpt):
+                    # result
+                    result = -1
+                    message = msg.getTranslation("TK_MSG_USER_ADMIN_CHK_CHANGES_INVALID") % (self._userName, str(rOpt))
+                    break
+
+        # if all is correct, we apply the changes
+        if result == 0:
+            # config is loaded and saved only once
+            self._batchUpdate = True
+            # apply changes (hours for ALL days first, so specific days can override them)
+            for rOpt in sorted(pChanges, key=lambda pOpt: str(pOpt) != "%sALL" % (hoursOpt)):
+                # validate and set
+                if str(rOpt).startswith(hoursOpt):
+                    result, message = self.checkAndSetAllowedHours(str(rOpt)[len(hoursOpt):], pChanges[rOpt])
+                else:
+                    result, message = optionProcessors[str(rOpt)](pChanges[rOpt])
+                # nothing is saved when any of the changes is not correct
+                if result != 0:
+                    break
+            # batch is finished
+            self._batchUpdate = False
+
+            # if we are still fine
+            if result == 0:
+                # save config
+                self._saveUserConfiguration()
+
+        # result
+        return result, message
+
 
 class timekprConfigurationProcessor(object):
     """Validate and update configuration data for timekpr server"""
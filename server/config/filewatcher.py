@@ -0,0 +1,122 @@
+"""
+Created on Oct 17, 2026
+"""
+
+# imports
+import os
+import re
+import threading
+from gi.repository import Gio
+
+# timekpr imports
+from timekpr.common.log import log
+from timekpr.common.constants import constants as cons
+
+
+class timekprFileWatcher(object):
+    """Watches main config, user config and work directories (inotify via Gio) and marks affected users / main config as changed"""
+
+    def __init__(self, pMainConfigFile, pConfigDir, pWorkDir):
+        """Initialize watcher"""
+        # directories and files
+        self._mainConfigDir = os.path.dirname(os.path.abspath(pMainConfigFile))
+        self._mainConfigFileName = os.path.basename(pMainConfigFile)
+        self._configDir = os.path.abspath(pConfigDir)
+        self._workDir = os.path.abspath(pWorkDir)
+        # user config and control file patterns
+        self._userConfigFinder = re.compile("^%s$" % (re.escape(cons.TK_USER_CONFIG_FILE).replace("%s", "(.+)")))
+        self._userControlFinder = re.compile("^(.+)\\.time$")
+        # directory monitors
+        self._monitors = []
+        # changes (they are accessed from main loop and worker threads)
+        self._changeLock = threading.Lock()
+        self._mainConfigChanged = False
+        self._changedUsers = set()
+
+    def startWatching(self):
+        """Start watching directories, returns whether watching is possible"""
+        # go through unique directories
+        for rDir in sorted(set((self._mainConfigDir, self._configDir, self._workDir))):
+            try:
+                # monitor directory (renames are reported as such, so atomic saves are seen as well)
+                monitor = Gio.File.new_for_path(rDir).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+                monitor.connect("changed", self._fileChanged)
+                # save monitor (it must be referenced to work)
+                self._monitors.append(monitor)
+            except Exception as ex:
+                # logging
+                log.log(cons.TK_LOG_LEVEL_INFO, "WARNING: could not watch directory \"%s\" (%s), file changes will be checked on saves" % (rDir, str(ex)))
+                # stop watching completely
+                self.stopWatching()
+                # fail
+                return False
+
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "watching %i directories for config and control changes" % (len(self._monitors)))
+        # success
+        return True
+
+    def stopWatching(self):
+        """Stop watching directories"""
+        # cancel all monitors
+        for rMonitor in self._monitors:
+            rMonitor.cancel()
+        # clear
+        self._monitors.clear()
+
+    def isWatching(self):
+        """Whether directories are watched"""
+        # result
+        return len(self._monitors) > 0
+
+    def _fileChanged(self, pMonitor, pFile, pOtherFile, pEventType):
+        """File in watched directory has changed (this is called from main loop)"""
+        # check the file and the other file (in case of rename)
+        for rFile in (pFile, pOtherFile):
+            # no file
+            if rFile is None or rFile.get_parent() is None:
+                continue
+            # file name and directory
+            fileName = rFile.get_basename()
+            fileDir = rFile.get_parent().get_path()
+            # main config
+            if fileDir == self._mainConfigDir and fileName == self._mainConfigFileName:
+                # changed
+                with self._changeLock:
+                    self._mainConfigChanged = True
+                # logging
+                log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "main config change detected (event: %s)" % (str(pEventType)))
+                continue
+            # user config or control
+            userName = None
+            # user config
+            if fileDir == self._configDir and self._userConfigFinder.match(fileName):
+                userName = self._userConfigFinder.sub(r"\1", fileName)
+            # user control
+            elif fileDir == self._workDir and self._userControlFinder.match(fileName):
+                userName = self._userControlFinder.sub(r"\1", fileName)
+            # user file has changed
+            if userName is not None:
+                # changed
+                with self._changeLock:
+                    self._changedUsers.add(userName)
+                # logging
+                log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "user \"%s\" config or control change detected (event: %s)" % (userName, str(pEventType)))
+
+    def isMainConfigChanged(self):
+        """Whether main config has changed since last check (change is reset)"""
+        # get and reset
+        with self._changeLock:
+            mainConfigChanged = self._mainConfigChanged
+            self._mainConfigChanged = False
+        # result
+        return mainConfigChanged
+
+    def getChangedUsers(self):
+        """Get users whose config or control has changed since last check (changes are reset)"""
+        # get and reset
+        with self._changeLock:
+            changedUsers = self._changedUsers
+            self._changedUsers = set()
+        # result
+        return changedUsers
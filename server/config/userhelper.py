@@ -9,6 +9,7 @@ import fileinput
 import re
 import os
 import pwd
+import grp
 import re
 from glob import glob
 
@@ -216,3 +217,22 @@ class timekprUserStore(object):
 
         # finish
         return(userList)
+
+    def getGroupUserList(self, pGroupName):
+        """Get names of valid users who are members of the group (either listed in group or having it as primary group)"""
+        # get group (raises KeyError if group does not exist)
+        group = grp.getgrnam(pGroupName)
+        # explicit members
+        members = set(group.gr_mem)
+        # result
+        userList = []
+
+        # iterate through all usernames
+        for rUser in pwd.getpwall():
+            # member of the group and user is ours
+            if (rUser.pw_name in members or rUser.pw_gid == group.gr_gid) and isUserValid(rUser.pw_uid, rUser.pw_name, rUser.pw_shell):
+                # add user
+                userList.append(rUser.pw_name)
+
+        # finish
+        return sorted(userList)
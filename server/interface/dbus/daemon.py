@@ -7,11 +7,13 @@ Created on Aug 28, 2018
 # import section
 import os
 from gi.repository import GLib
-from dbus.mainloop.glib import DBusGMainLoop
+from dbus.mainloop.glib import DBusGMainLoop, threads_init
 import dbus.service
 import time
 import threading
 import traceback
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 
 # timekpr imports
@@ -22,13 +24,17 @@ from timekpr.common.utils.config import timekprConfig
 from timekpr.common.utils import misc
 from timekpr.server.user.userdata import timekprUser
 from timekpr.server.user.playtime import timekprPlayTimeConfig
+from timekpr.server.user.savescheduler import timekprSaveScheduler
 from timekpr.server.config.configprocessor import timekprUserConfigurationProcessor
 from timekpr.server.config.configprocessor import timekprConfigurationProcessor
 from timekpr.server.config.userhelper import timekprUserStore
 from timekpr.server.config import userhelper
+from timekpr.server.config.filewatcher import timekprFileWatcher
 from timekpr.common.constants import messages as msg
 
 # default dbus
+# users may be evaluated concurrently (login1 calls and signals are made from evaluation threads too)
+threads_init()
 DBusGMainLoop(set_as_default=True)
 
 
@@ -72,6 +78,22 @@ class timekprDaemon(dbus.service.Object):
         self._timekprUserRestrictionList = {}
         # PlayTime config
         self._timekprPlayTimeConfig = None
+        # pool of threads for concurrent user evaluation (and its size)
+        self._timekprUserEvaluationPool = None
+        self._timekprUserEvaluationPoolSize = None
+        # user evaluation schedule (priority queue of deadlines) and actual deadlines with user state versions
+        self._timekprUserSchedule = []
+        self._timekprUserDeadlines = {}
+        # save scheduler (spreads saves of time spent across save interval)
+        self._timekprSaveScheduler = timekprSaveScheduler()
+        # config and control file watcher (and last modification time of main config)
+        self._timekprFileWatcher = None
+        self._timekprConfigLastModified = None
+        # realtime information of all users (it's prepared by worker and read from main loop, hence the lock) and its version
+        # (version starts from daemon start time in upper bits, so versions known to clients before restart are not reused)
+        self._timekprRealtimeInformation = {}
+        self._timekprRealtimeVersion = int(time.time()) << 32
+        self._timekprRealtimeLock = threading.Lock()
 
         # ## initialization ##
         # configuration init
@@ -92,6 +114,11 @@ class timekprDaemon(dbus.service.Object):
 
         # PT config
         self._timekprPlayTimeConfig = timekprPlayTimeConfig(self._timekprConfig)
+
+        # watch config and control files for changes
+        self._timekprFileWatcher = timekprFileWatcher(self._timekprConfig.getTimekprMainConfigFile(), self._timekprConfig.getTimekprConfigDir(), self._timekprConfig.getTimekprWorkDir())
+        self._timekprFileWatcher.startWatching()
+        self._timekprConfigLastModified = self._timekprConfig.getTimekprLastModified()
         log.log(cons.TK_LOG_LEVEL_DEBUG, "finish init daemon data")
 
     def finishTimekpr(self, signal=None, frame=None):
@@ -123,6 +150,9 @@ class timekprDaemon(dbus.service.Object):
         # def
         execLen = timedelta(0, 0, 0)
         execCnt = 0
+        # time left signal statistics
+        signalStatisticsStart = time.monotonic()
+        timeLeftSignalsSent = timeLeftSignalsSuppressed = 0
         # we execute tasks until not asked to stop
         while not self._finishExecution:
             # perf
@@ -147,11 +177,46 @@ class timekprDaemon(dbus.service.Object):
             execCnt += 1
             execLen += perf
 
-            log.log(cons.TK_LOG_LEVEL_INFO, "--- end working on users (ela: %s) ---" % (str(perf)))
-            log.log(cons.TK_LOG_LEVEL_DEBUG, "--- perf: avg ela: %s, loadavg: %s, %s, %s ---" % (str(execLen/execCnt), lavg[0], lavg[1], lavg[2]))
+            log.log(cons.TK_LOG_LEVEL_INFO, "--- end working on users (ela: %s) ---", perf)
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "--- perf: avg ela: %s, loadavg: %s, %s, %s ---", execLen / execCnt, lavg[0], lavg[1], lavg[2])
+            # login1 bus call statistics
+            if self._timekprLoginManager is not None:
+                # calls made / saved
+                busCallsMade, busCallsSaved = self._timekprLoginManager.getBusCallStatistics()
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "--- perf: login1 bus calls made: %i, saved: %i ---", busCallsMade, busCallsSaved)
+            # save statistics (once a minute)
+            saveStatistics = self._timekprSaveScheduler.getStatistics()
+            if saveStatistics is not None:
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "--- perf: saves in last minute, written: %i, saved: %i, bytes written: %i ---", *saveStatistics)
+            # time left signal statistics (accounted every cycle, so users who left are accounted too)
+            for rUser in self._timekprUserList.values():
+                # sent / suppressed
+                signalsSent, signalsSuppressed = rUser.getTimeLeftSignalStatistics()
+                timeLeftSignalsSent += signalsSent
+                timeLeftSignalsSuppressed += signalsSuppressed
+            # once an hour
+            if time.monotonic() - signalStatisticsStart >= cons.TK_LIMIT_PER_HOUR:
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "--- perf: time left signals in last hour, sent: %i, suppressed: %i ---", timeLeftSignalsSent, timeLeftSignalsSuppressed)
+                # reset
+                signalStatisticsStart = time.monotonic()
+                timeLeftSignalsSent = timeLeftSignalsSuppressed = 0
             # take a polling pause (try to do that exactly every 3 secs)
             time.sleep(self._timekprConfig.getTimekprPollTime() - min(time.time() - dtsm, self._timekprConfig.getTimekprPollTime() / 2))
 
+        # shut down user evaluation pool
+        if self._timekprUserEvaluationPool is not None:
+            self._timekprUserEvaluationPool.shutdown(wait=True)
+        # stop watching files
+        self._timekprFileWatcher.stopWatching()
+
+        # flush time spent for all users
+        for rUserName in self._timekprUserList:
+            # save with error catch (so one user does not prevent saves for others)
+            try:
+                self._timekprUserList[rUserName].saveSpent()
+            except Exception:
+                log.log(cons.TK_LOG_LEVEL_INFO, "ERROR saving user \"%s\" at shutdown:\n%s" % (rUserName, traceback.format_exc()))
+
         log.log(cons.TK_LOG_LEVEL_INFO, "worker shut down")
         # finish logging
         log.flushLogFile()
@@ -191,6 +256,13 @@ class timekprDaemon(dbus.service.Object):
             self._timekprUserList.clear()
             # delete termination list as well
             self._timekprUserRestrictionList.clear()
+            # delete schedule as well
+            self._timekprUserSchedule.clear()
+            self._timekprUserDeadlines.clear()
+            self._timekprSaveScheduler.unregisterAllUsers()
+
+        # apply config and control changes made by others
+        self._applyFileChanges()
 
         # if global switch is enabled, we need to refresh processes at some iterval (method determines that by itself)
         if self._timekprConfig.getTimekprPlayTimeEnabled():
@@ -202,15 +274,15 @@ class timekprDaemon(dbus.service.Object):
             # login manager is system user, we do these checks only for system users
             if not userhelper.isUserValid(userDict[cons.TK_CTRL_UID], userDict[cons.TK_CTRL_UNAME]):
                 # sys user
-                log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: system or mismatched user \"%s\" explicitly excluded" % (rUserName))
+                log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: system or mismatched user \"%s\" explicitly excluded", rUserName)
                 # try to get login manager VT (if not already found)
                 self._timekprLoginManager.determineLoginManagerVT(rUserName, userDict[cons.TK_CTRL_UPATH])
             # if username is in exclusion list, additionally verify that username is not a sysuser / login manager (this is somewhat obsolete now)
             elif rUserName in self._timekprConfig.getTimekprUsersExcl() and rUserName not in userhelper.getTimekprLoginManagers():
-                log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: user \"%s\" explicitly excluded" % (rUserName))
+                log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: user \"%s\" explicitly excluded", rUserName)
             # if not in, we add it
             elif rUserName not in self._timekprUserList:
-                log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: we have a new user \"%s\"" % (rUserName))
+                log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: we have a new user \"%s\"", rUserName)
                 # add user
                 self._timekprUserList[rUserName] = timekprUser(
                     self._timekprBusName,
@@ -218,84 +290,71 @@ class timekprDaemon(dbus.service.Object):
                     userDict[cons.TK_CTRL_UNAME],
                     userDict[cons.TK_CTRL_UPATH],
                     self._timekprConfig,
-                    self._timekprPlayTimeConfig
+                    self._timekprPlayTimeConfig,
+                    self._timekprLoginManager
                 )
 
                 # adjust config
                 self._timekprUserList[rUserName].adjustLimitsFromConfig()
-                # adjust time spent
-                self._timekprUserList[rUserName].adjustTimeSpentFromControl()
+                # adjust time spent (replay time spent which was not saved before)
+                self._timekprUserList[rUserName].adjustTimeSpentFromControl(pReplayJournal=True)
+                # schedule saves
+                self._timekprSaveScheduler.registerUser(rUserName)
 
         # session list to remove
         removableUsers = [rUserName for rUserName in self._timekprUserList if rUserName not in userList]
 
         # get rid of users which left
         for rUserName in removableUsers:
-            log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: user \"%s\" has gone" % (rUserName))
+            log.log(cons.TK_LOG_LEVEL_INFO, "NOTE: user \"%s\" has gone", rUserName)
             # save everything for the user
             self._timekprUserList[rUserName].saveSpent()
             self._timekprUserList[rUserName].deInitUser()
             # delete users that left
             self._timekprUserList.pop(rUserName)
+            # remove from schedule (queue entries are discarded when they come)
+            self._timekprUserDeadlines.pop(rUserName, None)
+            self._timekprSaveScheduler.unregisterUser(rUserName)
             # remove if exists
             if rUserName in self._timekprUserRestrictionList:
                 # delete from killing list as well
                 self._timekprUserRestrictionList.pop(rUserName)
 
-        # go through all users
-        for rUserName in self._timekprUserList:
-            # init variables for user
-            self._timekprUserList[rUserName].refreshTimekprRuntimeVariables()
-
-            # adjust time spent
-            userActiveEffective, userActiveActual, userScreenLocked = self._timekprUserList[rUserName].adjustTimeSpentActual(self._timekprConfig)
-            # recalculate time left
-            self._timekprUserList[rUserName].recalculateTimeLeft()
-            # process actual user session variable validation
-            self._timekprUserList[rUserName].revalidateUserSessionAttributes()
-
-            # get stats for user
-            timeLeftArray = self._timekprUserList[rUserName].getTimeLeft()
-            timeLeftToday = timeLeftArray[0]
-            timeLeftInARow = timeLeftArray[1]
-            timeHourUnaccounted = timeLeftArray[6]
-            timePTActivityCnt = 0
-
-            # PlayTime left validation
-            if self._timekprConfig.getTimekprPlayTimeEnabled():
-                # get time left for PLayTime
-                timeLeftPT, isPTEnabled, isPTAccounted, isPTActive = self._timekprUserList[rUserName].getPlayTimeLeft()
-                # enabled and active for user
-                if isPTEnabled and isPTActive:
-                    # if there is no time left (compare to almost ultimate answer)
-                    # or hour is unaccounted and PT is not allowed in those hours
-                    if (isPTAccounted and timeLeftPT < 0.0042) or (timeHourUnaccounted and not self._timekprUserList[rUserName].getUserPlayTimeUnaccountedIntervalsEnabled()):
-                        # killing processes
-                        self._timekprPlayTimeConfig.killPlayTimeProcesses(self._timekprUserList[rUserName].getUserId())
-                    else:
-                        # active count
-                        timePTActivityCnt = self._timekprPlayTimeConfig.getMatchedUserProcessCnt(self._timekprUserList[rUserName].getUserId())
-            # set process count (in case PT was disable in-flight or it has changed)
-            self._timekprUserList[rUserName].setPlayTimeActiveActivityCnt(timePTActivityCnt)
-
-            # logging
-            log.log(cons.TK_LOG_LEVEL_DEBUG, "user \"%s\", active: %s/%s/%s (act/eff/lck), huacc: %s, tleft: %i" % (rUserName, str(userActiveActual), str(userActiveEffective), str(userScreenLocked), str(timeHourUnaccounted), timeLeftInARow))
+        # evaluate users (one after another or concurrently) and merge the results afterwards
+        userEvaluations = self._evaluateUsers()
+        # save users whose save is due
+        self._saveUsers()
+        # refresh in-memory realtime information
+        realtimeChanges = self._refreshRealtimeInformation()
+        # inform admin clients about changed realtime information (only changed values are sent, no values means that user is not tracked anymore)
+        for rUserName, rChangedFields in realtimeChanges.items():
+            self.userRealtimeInformationChanged(rUserName, dbus.Dictionary({rKey: self._timekprRealtimeInformation[rUserName][rKey] for rKey in rChangedFields}, signature="sv"))
+
+        # go through all evaluated users
+        for rUserName in userEvaluations:
+            # evaluation results
+            userActiveEffective, userActiveActual, userScreenLocked, timeLeftToday, timeLeftInARow, timeHourUnaccounted, isPTKillNeeded = userEvaluations[rUserName]
+
+            # PlayTime processes are killed here, not in evaluation threads (process cache is shared by all users)
+            if isPTKillNeeded:
+                # killing processes
+                self._timekprPlayTimeConfig.killPlayTimeProcesses(self._timekprUserList[rUserName].getUserId())
 
             # process actions if user is in the restrictions list
             if rUserName in self._timekprUserRestrictionList:
                 # (internal idle killing switch) + user is not active + there is a time available today (opposing to in a row)
                 if ((not userActiveActual and timeLeftToday > self._timekprConfig.getTimekprTerminationTime()) or timeHourUnaccounted) and self._timekprUserRestrictionList[rUserName][cons.TK_CTRL_RESTY] in (cons.TK_CTRL_RES_T, cons.TK_CTRL_RES_K, cons.TK_CTRL_RES_D):
-                    log.log(cons.TK_LOG_LEVEL_INFO, "SAVING user \"%s\" from ending his sessions / shutdown" % (rUserName))
+                    log.log(cons.TK_LOG_LEVEL_INFO, "SAVING user \"%s\" from ending his sessions / shutdown", rUserName)
                     # remove from death list
                     self._timekprUserRestrictionList.pop(rUserName)
                 # if restricted time has passed for hard restrictions, we need to lift the restriction
                 elif (timeLeftInARow > self._timekprConfig.getTimekprTerminationTime() or timeHourUnaccounted) and self._timekprUserRestrictionList[rUserName][cons.TK_CTRL_RESTY] in (cons.TK_CTRL_RES_T, cons.TK_CTRL_RES_K, cons.TK_CTRL_RES_D):
-                    log.log(cons.TK_LOG_LEVEL_INFO, "RELEASING terminate / kill / shutdown from user \"%s\"" % (rUserName))
+                    log.log(cons.TK_LOG_LEVEL_INFO, "RELEASING terminate / kill / shutdown from user \"%s\"", rUserName)
                     # remove from restriction list
                     self._timekprUserRestrictionList.pop(rUserName)
                 # if restricted time has passed for soft restrictions, we need to lift the restriction
                 elif (timeLeftInARow > self._timekprConfig.getTimekprTerminationTime() or timeHourUnaccounted) and self._timekprUserRestrictionList[rUserName][cons.TK_CTRL_RESTY] in (cons.TK_CTRL_RES_L, cons.TK_CTRL_RES_S, cons.TK_CTRL_RES_W):
-                    log.log(cons.TK_LOG_LEVEL_INFO, "RELEASING lock / suspend from user \"%s\"" % (rUserName))
+                    log.log(cons.TK_LOG_LEVEL_INFO, "RELEASING lock / suspend from user \"%s\"", rUserName)
                     # remove from restriction list
                     self._timekprUserRestrictionList.pop(rUserName)
                 # update restriction stats
@@ -314,7 +373,7 @@ class timekprDaemon(dbus.service.Object):
 
             # if user has very few time left, we need to enforce limits: Lock screen / Sleep computer / Shutdown computer / Terminate sessions
             if timeLeftInARow <= self._timekprConfig.getTimekprTerminationTime() and not timeHourUnaccounted and rUserName not in self._timekprUserRestrictionList and userActiveActual:
-                log.log(cons.TK_LOG_LEVEL_DEBUG, "INFO: user \"%s\" has got restrictions..." % (rUserName))
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "INFO: user \"%s\" has got restrictions...", rUserName)
                 # add user to restrictions list
                 self._timekprUserRestrictionList[rUserName] = {
                     cons.TK_CTRL_UPATH: self._timekprUserList[rUserName].getUserPathOnBus(),  # user path on dbus
@@ -333,6 +392,257 @@ class timekprDaemon(dbus.service.Object):
 
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "finish checkUsers")
 
+    def _evaluateUsers(self):
+        """Evaluate users (all or only scheduled ones), one after another or concurrently using a pool of threads"""
+        # perf
+        dts = time.time()
+        # users to evaluate
+        userNames = self._getScheduledUsers() if self._timekprConfig.getTimekprUserEvaluationScheduler() else list(self._timekprUserList)
+        # thread count
+        poolSize = min(self._timekprConfig.getTimekprUserEvaluationThreads(), len(userNames))
+        # result
+        userEvaluations = {}
+
+        # evaluate one after another
+        if poolSize <= 1:
+            # go through all users
+            for rUserName in userNames:
+                # evaluate
+                userEvaluations[rUserName] = self._evaluateUser(rUserName)
+        else:
+            # (re)create pool if size has changed
+            if self._timekprUserEvaluationPoolSize != self._timekprConfig.getTimekprUserEvaluationThreads():
+                # shut down previous pool (evaluations of the same user must not overlap)
+                if self._timekprUserEvaluationPool is not None:
+                    self._timekprUserEvaluationPool.shutdown(wait=True)
+                # new pool
+                self._timekprUserEvaluationPoolSize = self._timekprConfig.getTimekprUserEvaluationThreads()
+                self._timekprUserEvaluationPool = ThreadPoolExecutor(max_workers=self._timekprUserEvaluationPoolSize, thread_name_prefix="timekpr-user")
+                log.log(cons.TK_LOG_LEVEL_INFO, "INFO: users will be evaluated concurrently using %i threads", self._timekprUserEvaluationPoolSize)
+            # submit all users
+            userFutures = {rUserName: self._timekprUserEvaluationPool.submit(self._evaluateUser, rUserName) for rUserName in userNames}
+            # wait for all evaluations to finish (none of them is left running in case of an error)
+            wait(userFutures.values())
+            # results (errors are passed through)
+            for rUserName, rFuture in userFutures.items():
+                # result
+                userEvaluations[rUserName] = rFuture.result()
+
+        # perf (timing is the second to last element of evaluation result)
+        if log.isDebugEnabled():
+            # slowest
+            slowestUser = max(userEvaluations, key=lambda rUserName: userEvaluations[rUserName][-2]) if len(userEvaluations) > 0 else None
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "--- perf: evaluated %i of %i users using %i threads, ela: %.3fs, slowest: %s (%.3fs) ---", len(userEvaluations), len(self._timekprUserList), max(poolSize, 1), time.time() - dts, slowestUser, userEvaluations[slowestUser][-2] if slowestUser is not None else 0)
+
+        # schedule next evaluation
+        if self._timekprConfig.getTimekprUserEvaluationScheduler():
+            # schedule
+            self._scheduleUsers({rUserName: rEvaluation[-1] for rUserName, rEvaluation in userEvaluations.items()})
+
+        # result (without the timing and next evaluation delay)
+        return {rUserName: rEvaluation[:-2] for rUserName, rEvaluation in userEvaluations.items()}
+
+    def _getScheduledUsers(self):
+        """Get users whose evaluation deadline has come (or whose state has changed)"""
+        # now
+        dtm = time.monotonic()
+        # users to evaluate
+        userNames = set()
+
+        # users whose deadlines have come (entries which are not actual anymore are discarded)
+        while len(self._timekprUserSchedule) > 0 and self._timekprUserSchedule[0][0] <= dtm:
+            # deadline
+            deadline, userName = heapq.heappop(self._timekprUserSchedule)
+            # actual deadline
+            if userName in self._timekprUserDeadlines and self._timekprUserDeadlines[userName][0] == deadline:
+                userNames.add(userName)
+
+        # go through all users
+        for rUserName in self._timekprUserList:
+            # evaluation request has to be consumed for every user
+            evaluationRequested = self._timekprUserList[rUserName].isEvaluationRequested()
+            # not scheduled yet, restricted, requested or sessions have changed
+            if rUserName not in self._timekprUserDeadlines or rUserName in self._timekprUserRestrictionList or evaluationRequested or self._timekprUserDeadlines[rUserName][1] != self._timekprUserList[rUserName].getUserStateVersion():
+                userNames.add(rUserName)
+
+        # result (in the same order as users)
+        return [rUserName for rUserName in self._timekprUserList if rUserName in userNames]
+
+    def _scheduleUsers(self, pEvaluationDelays):
+        """Schedule next evaluation for evaluated users"""
+        # now
+        dtm = time.monotonic()
+
+        # go through evaluated users
+        for rUserName, rDelay in pEvaluationDelays.items():
+            # deadline
+            deadline = dtm + rDelay
+            # save deadline and user state version at the time of evaluation
+            self._timekprUserDeadlines[rUserName] = (deadline, self._timekprUserList[rUserName].getUserStateVersion())
+            # add to schedule
+            heapq.heappush(self._timekprUserSchedule, (deadline, rUserName))
+
+        # compact the queue when there are too many entries which are not actual anymore
+        if len(self._timekprUserSchedule) > len(self._timekprUserDeadlines) * 2:
+            # rebuild
+            self._timekprUserSchedule = [(rDeadline[0], rUserName) for rUserName, rDeadline in self._timekprUserDeadlines.items()]
+            heapq.heapify(self._timekprUserSchedule)
+
+        # statistics
+        if log.isDebugEnabled():
+            # next deadline distribution
+            deadlineDistribution = [0 for rBucket in cons.TK_USER_EVALUATION_DEADLINE_BUCKETS]
+            # go through actual deadlines
+            for rDeadline, rStateVersion in self._timekprUserDeadlines.values():
+                # find the bucket
+                for rIdx, rBucket in enumerate(cons.TK_USER_EVALUATION_DEADLINE_BUCKETS):
+                    # deadline fits
+                    if rDeadline - dtm <= rBucket or rIdx == len(cons.TK_USER_EVALUATION_DEADLINE_BUCKETS) - 1:
+                        deadlineDistribution[rIdx] += 1
+                        break
+            # log
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "--- perf: schedule queue depth: %i, next deadlines: %s ---", len(self._timekprUserSchedule), ", ".join(["<=%is: %i" % (rBucket, rCnt) for rBucket, rCnt in zip(cons.TK_USER_EVALUATION_DEADLINE_BUCKETS, deadlineDistribution)]))
+
+    def _applyFileChanges(self):
+        """Apply main config, user config and control changes made by others (files are checked only when changes are detected by watcher)"""
+        # main config has changed (modification time is checked, because saves made by us are seen by watcher too)
+        if self._timekprFileWatcher.isMainConfigChanged() and self._timekprConfig.getTimekprLastModified() != self._timekprConfigLastModified:
+            # logging
+            log.log(cons.TK_LOG_LEVEL_INFO, "main config changed, reloading")
+            # reload
+            self._timekprConfig.loadMainConfiguration()
+            self._timekprConfig.logMainConfiguration()
+            self._timekprConfigLastModified = self._timekprConfig.getTimekprLastModified()
+        # go through users whose files have changed
+        for rUserName in self._timekprFileWatcher.getChangedUsers():
+            # only tracked users
+            if rUserName in self._timekprUserList:
+                # reload if modified (modification time is checked, because saves made by us are seen by watcher too)
+                if self._timekprUserList[rUserName].checkUserFilesModified():
+                    # inform admin clients (anything might have changed)
+                    self.userInformationChanged(rUserName, dbus.Array(signature="s"))
+
+    def _refreshRealtimeInformation(self):
+        """Refresh realtime information for all users and increase the version if anything has changed, returns changed fields per user"""
+        # changed fields per user
+        changedUsers = {}
+        # realtime information
+        realtimeInformation = {}
+
+        # go through users
+        for rUserName, rUser in self._timekprUserList.items():
+            # get in-memory values
+            realtimeInformation[rUserName] = {}
+            self._getUserActualTimeInformation(rUser, realtimeInformation[rUserName])
+            # previous values
+            prevInformation = self._timekprRealtimeInformation.get(rUserName, {})
+            # changed fields
+            changedFields = [rKey for rKey, rVal in realtimeInformation[rUserName].items() if prevInformation.get(rKey) != rVal]
+            # user has changed
+            if len(changedFields) > 0:
+                changedUsers[rUserName] = changedFields
+
+        # users who have gone
+        for rUserName in self._timekprRealtimeInformation:
+            # gone (nothing to report)
+            if rUserName not in realtimeInformation:
+                changedUsers[rUserName] = []
+
+        # something has changed
+        if len(changedUsers) > 0:
+            # replace
+            with self._timekprRealtimeLock:
+                self._timekprRealtimeInformation = realtimeInformation
+                self._timekprRealtimeVersion += 1
+
+        # result
+        return changedUsers
+
+    def _saveUsers(self):
+        """Save time spent for users whose save is due (saves are spread across save interval, unchanged values are not written)"""
+        # whether files are checked for external modifications on save (not needed when they are watched)
+        checkFilesModified = not self._timekprFileWatcher.isWatching()
+        # go through users whose save is due
+        for rUserName in self._timekprSaveScheduler.getDueUsers(max(self._timekprConfig.getTimekprSaveTime(), self._timekprConfig.getTimekprPollTime())):
+            # user
+            savedUser = self._timekprUserList[rUserName]
+            # files need to be checked for external modifications before save (if not watched)
+            if checkFilesModified and savedUser.checkUserFilesModified():
+                # inform admin clients (anything might have changed)
+                self.userInformationChanged(rUserName, dbus.Array(signature="s"))
+            # save only if time spent has changed
+            if savedUser.isTimeSpentChanged():
+                # save with error catch (so one user does not prevent saves for others, save is retried next time)
+                try:
+                    bytesWritten = savedUser.saveSpent(False)
+                except Exception:
+                    # logging
+                    log.log(cons.TK_LOG_LEVEL_INFO, "ERROR saving user \"%s\":\n%s", rUserName, traceback.format_exc())
+                    # nothing written
+                    bytesWritten = 0
+            else:
+                # nothing written
+                bytesWritten = 0
+            # account save
+            self._timekprSaveScheduler.accountSave(bytesWritten)
+            # saved control has changed
+            if bytesWritten > 0:
+                # inform admin clients
+                self.userInformationChanged(rUserName, cons.TK_CL_INF_CONTROL_FIELDS)
+
+    def _evaluateUser(self, pUserName):
+        """Evaluate user (account time spent, calculate time left and process PlayTime), this may run concurrently for different users"""
+        # perf
+        dts = time.time()
+        # user
+        evaluatedUser = self._timekprUserList[pUserName]
+        # init variables for user
+        evaluatedUser.refreshTimekprRuntimeVariables()
+
+        # adjust time spent
+        userActiveEffective, userActiveActual, userScreenLocked = evaluatedUser.adjustTimeSpentActual(self._timekprConfig)
+        # recalculate time left
+        evaluatedUser.recalculateTimeLeft()
+        # process actual user session variable validation
+        evaluatedUser.revalidateUserSessionAttributes()
+
+        # get stats for user
+        timeLeftArray = evaluatedUser.getTimeLeft()
+        timeLeftToday = timeLeftArray[0]
+        timeLeftInARow = timeLeftArray[1]
+        timeHourUnaccounted = timeLeftArray[6]
+        timePTActivityCnt = 0
+        timeLeftPTScheduled = None
+        isPTKillNeeded = False
+
+        # PlayTime left validation
+        if self._timekprConfig.getTimekprPlayTimeEnabled():
+            # get time left for PLayTime
+            timeLeftPT, isPTEnabled, isPTAccounted, isPTActive = evaluatedUser.getPlayTimeLeft()
+            # PlayTime deadlines are scheduled only when it's accounted
+            timeLeftPTScheduled = timeLeftPT if isPTEnabled and isPTAccounted else None
+            # enabled and active for user
+            if isPTEnabled and isPTActive:
+                # if there is no time left (compare to almost ultimate answer)
+                # or hour is unaccounted and PT is not allowed in those hours
+                if (isPTAccounted and timeLeftPT < 0.0042) or (timeHourUnaccounted and not evaluatedUser.getUserPlayTimeUnaccountedIntervalsEnabled()):
+                    # processes are killed after evaluation
+                    isPTKillNeeded = True
+                else:
+                    # active count
+                    timePTActivityCnt = self._timekprPlayTimeConfig.getMatchedUserProcessCnt(evaluatedUser.getUserId())
+        # set process count (in case PT was disable in-flight or it has changed)
+        evaluatedUser.setPlayTimeActiveActivityCnt(timePTActivityCnt)
+
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "user \"%s\", active: %s/%s/%s (act/eff/lck), huacc: %s, tleft: %i", pUserName, userActiveActual, userActiveEffective, userScreenLocked, timeHourUnaccounted, timeLeftInARow)
+
+        # next evaluation delay (used by scheduler)
+        nextEvaluationDelay = evaluatedUser.getNextEvaluationDelay(timeLeftInARow, timeLeftPTScheduled)
+
+        # result
+        return userActiveEffective, userActiveActual, userScreenLocked, timeLeftToday, timeLeftInARow, timeHourUnaccounted, isPTKillNeeded, time.time() - dts, nextEvaluationDelay
+
     def _restrictUsers(self):
         """Terminate user sessions"""
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start user killer")
@@ -500,6 +810,13 @@ class timekprDaemon(dbus.service.Object):
             # active PlayTime activity count
             pUserConfigurationStore["ACTUAL_ACTIVE_PLAYTIME_ACTIVITY_COUNT"] = pTimekprUser.getPlayTimeActiveActivityCnt()
 
+    def _informUserInformationChanged(self, pUserName, pResult, pChangedFields):
+        """Inform admin clients that saved information of the user has changed (only successful changes are reported)"""
+        # change was successful
+        if pResult == 0:
+            # inform
+            self.userInformationChanged(pUserName, pChangedFields)
+
     # ## --------------- DBUS / communication methods --------------- ## #
     # --------------- simple user time limits methods accessible by any --------------- #
 
@@ -622,6 +939,44 @@ class timekprDaemon(dbus.service.Object):
         # result
         return result, message, userConfigurationStore
 
+    @dbus.service.method(cons.TK_DBUS_USER_ADMIN_INTERFACE, in_signature="t", out_signature="ista{sa{sv}}")
+    def getAllUsersRealtimeInformation(self, pKnownVersion):
+        """Get realtime information for all tracked users from memory"""
+        """  version increases whenever information changes and is unique across daemon restarts, when passed version is the actual one, no information is returned"""
+        # initialize storage
+        usersInformation = dbus.Dictionary(signature="sa{sv}")
+        result = 0
+        message = ""
+
+        # get consistent information
+        with self._timekprRealtimeLock:
+            # version
+            realtimeVersion = self._timekprRealtimeVersion
+            # information has changed since client got it
+            if pKnownVersion != realtimeVersion:
+                # copy values
+                for rUserName, rInformation in self._timekprRealtimeInformation.items():
+                    usersInformation[rUserName] = dbus.Dictionary(rInformation, signature="sv")
+
+        # result
+        return result, message, dbus.UInt64(realtimeVersion), usersInformation
+
+    # --------------- user admin signals received by privileged users (root and all in timekpr group) --------------- #
+
+    @dbus.service.signal(cons.TK_DBUS_USER_ADMIN_INTERFACE, signature="sas")
+    def userInformationChanged(self, pUserName, pChangedFields):
+        """Saved configuration or control of the user has changed"""
+        """Changed fields are the same as in user information, e.g. ALLOWED_WEEKDAYS, LIMIT_PER_WEEK, TIME_SPENT_DAY,
+            no fields means that anything might have changed"""
+        pass
+
+    @dbus.service.signal(cons.TK_DBUS_USER_ADMIN_INTERFACE, signature="sa{sv}")
+    def userRealtimeInformationChanged(self, pUserName, pChangedInformation):
+        """Realtime information of the user has changed"""
+        """Only changed values are sent (keys are the same as in user information, e.g. ACTUAL_TIME_LEFT_DAY),
+            no values means that user is not tracked anymore"""
+        pass
+
     # --------------- user admin methods accessible by privileged users (root and all in timekpr group) --------------- #
 
     @dbus.service.method(cons.TK_DBUS_USER_ADMIN_INTERFACE, in_signature="sas", out_signature="is")
@@ -648,6 +1003,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["ALLOWED_WEEKDAYS"])
+
         # result
         return result, message
 
@@ -677,6 +1035,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["ALLOWED_HOURS_%s" % (pDayNumber)])
+
         # result
         return result, message
 
@@ -704,6 +1065,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["LIMITS_PER_WEEKDAYS"])
+
         # result
         return result, message
 
@@ -732,6 +1096,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["TRACK_INACTIVE"])
+
         # result
         return result, message
 
@@ -760,6 +1127,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["HIDE_TRAY_ICON"])
+
         # result
         return result, message
 
@@ -790,6 +1160,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["LOCKOUT_TYPE", "WAKEUP_HOUR_INTERVAL"])
+
         # result
         return result, message
 
@@ -815,6 +1188,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["LIMIT_PER_WEEK"])
+
         # result
         return result, message
 
@@ -840,6 +1216,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["LIMIT_PER_MONTH"])
+
         # result
         return result, message
 
@@ -869,6 +1248,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONTROL_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, cons.TK_CL_INF_CONTROL_FIELDS)
+
         # result
         return result, message
 
@@ -899,6 +1281,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["PLAYTIME_ENABLED"])
+
         # result
         return result, message
 
@@ -927,6 +1312,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["PLAYTIME_LIMIT_OVERRIDE_ENABLED"])
+
         # result
         return result, message
 
@@ -955,6 +1343,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["PLAYTIME_UNACCOUNTED_INTERVALS_ENABLED"])
+
         # result
         return result, message
 
@@ -982,6 +1373,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["PLAYTIME_ALLOWED_WEEKDAYS"])
+
         # result
         return result, message
 
@@ -1009,6 +1403,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["PLAYTIME_LIMITS_PER_WEEKDAYS"])
+
         # result
         return result, message
 
@@ -1034,6 +1431,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["PLAYTIME_LIMIT_PER_WEEK"])
+
         # result
         return result, message
 
@@ -1060,6 +1460,9 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, ["PLAYTIME_ACTIVITIES"])
+
         # result
         return result, message
 
@@ -1089,9 +1492,135 @@ class timekprDaemon(dbus.service.Object):
             result = -1
             message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONTROL_UNEXPECTED_ERROR")
 
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, cons.TK_CL_INF_CONTROL_FIELDS)
+
+        # result
+        return result, message
+
+    def _setUserConfiguration(self, pUserName, pChanges):
+        """Validate and set up multiple configuration options for the user at once and inform the user"""
+        try:
+            # check the user and it's configuration
+            userConfigProcessor = timekprUserConfigurationProcessor(pUserName, self._timekprConfig)
+
+            # load config
+            result, message = userConfigProcessor.checkAndSetUserConfiguration(pChanges)
+
+            # check if we have this user (nothing changed in case of errors)
+            if result == 0 and pUserName in self._timekprUserList:
+                # inform the user immediately
+                self._timekprUserList[pUserName].adjustLimitsFromConfig(False)
+        except Exception as unexpectedException:
+            # logging
+            log.log(cons.TK_LOG_LEVEL_INFO, "Unexpected ERROR (%s): %s" % (misc.whoami(), str(unexpectedException)))
+
+            # result
+            result = -1
+            message = msg.getTranslation("TK_MSG_CONFIG_LOADER_SAVECONFIG_UNEXPECTED_ERROR")
+
+        # inform admin clients about the change
+        self._informUserInformationChanged(pUserName, result, list(pChanges.keys()))
+
         # result
         return result, message
 
+    @dbus.service.method(cons.TK_DBUS_USER_ADMIN_INTERFACE, in_signature="sa{sv}", out_signature="is")
+    def setUserConfiguration(self, pUserName, pChanges):
+        """Set up multiple configuration options for the user at once"""
+        """All changes are validated before configuration is saved, configuration is saved only once and user is informed only once,
+            keys are the same as in user information, e.g. ALLOWED_WEEKDAYS, ALLOWED_HOURS_1, LIMIT_PER_WEEK, PLAYTIME_ACTIVITIES"""
+        # result
+        return self._setUserConfiguration(pUserName, pChanges)
+
+    # --------------- bulk user admin methods accessible by privileged users (root and all in timekpr group) --------------- #
+
+    @dbus.service.method(cons.TK_DBUS_USER_ADMIN_INTERFACE, in_signature="s", out_signature="isas")
+    def getGroupUserList(self, pGroupName):
+        """Get names of users who are members of the group"""
+        # result
+        result = 0
+        message = ""
+        userList = dbus.Array(signature="s")
+
+        try:
+            # init store
+            timekprUStore = timekprUserStore()
+            # get members
+            userList.extend(timekprUStore.getGroupUserList(pGroupName))
+        except KeyError:
+            # result
+            result = -1
+            message = msg.getTranslation("TK_MSG_CONFIG_LOADER_GROUP_NOTFOUND") % (pGroupName)
+        except Exception as unexpectedException:
+            # logging
+            log.log(cons.TK_LOG_LEVEL_INFO, "Unexpected ERROR (%s): %s" % (misc.whoami(), str(unexpectedException)))
+
+            # result
+            result = -1
+            message = msg.getTranslation("TK_MSG_CONFIG_LOADER_USERLIST_UNEXPECTED_ERROR")
+
+        # result
+        return result, message, userList
+
+    @dbus.service.method(cons.TK_DBUS_USER_ADMIN_INTERFACE, in_signature="ass", out_signature="isa(sisa{sv})")
+    def getUsersInformation(self, pUserNames, pInfoLvl):
+        """Get configuration and information for multiple users at once"""
+        """  this returns user name, result, message and information for every user in the same order as requested"""
+        # result
+        userResults = dbus.Array(signature="(sisa{sv})")
+        failedCnt = 0
+
+        # go through users
+        for rUserName in pUserNames:
+            # get information
+            userResult, userMessage, userConfigurationStore = self.getUserInformation(rUserName, pInfoLvl)
+            # failed
+            failedCnt += 1 if userResult != 0 else 0
+            # add result (empty dict has to have a signature)
+            userResults.append((rUserName, userResult, userMessage, userConfigurationStore if len(userConfigurationStore) > 0 else dbus.Dictionary(signature="sv")))
+
+        # result
+        return -1 if failedCnt > 0 else 0, msg.getTranslation("TK_MSG_USER_ADMIN_CHK_USERS_FAILED") % (failedCnt, len(pUserNames)) if failedCnt > 0 else "", userResults
+
+    @dbus.service.method(cons.TK_DBUS_USER_ADMIN_INTERFACE, in_signature="asa{sv}", out_signature="isa(sis)")
+    def setUsersConfiguration(self, pUserNames, pChanges):
+        """Set up the same configuration options for multiple users at once"""
+        """  every user is processed separately (changes for the user are applied only if all of them are valid),
+            this returns user name, result and message for every user in the same order as requested"""
+        # result
+        userResults = dbus.Array(signature="(sis)")
+        failedCnt = 0
+
+        # go through users
+        for rUserName in pUserNames:
+            # set config
+            userResult, userMessage = self._setUserConfiguration(rUserName, pChanges)
+            # failed
+            failedCnt += 1 if userResult != 0 else 0
+            # add result
+            userResults.append((rUserName, userResult, userMessage))
+
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "bulk configuration change for %i users, failed: %i", len(pUserNames), failedCnt)
+
+        # result
+        return -1 if failedCnt > 0 else 0, msg.getTranslation("TK_MSG_USER_ADMIN_CHK_USERS_FAILED") % (failedCnt, len(pUserNames)) if failedCnt > 0 else "", userResults
+
+    @dbus.service.method(cons.TK_DBUS_USER_ADMIN_INTERFACE, in_signature="sa{sv}", out_signature="isa(sis)")
+    def setGroupConfiguration(self, pGroupName, pChanges):
+        """Set up the same configuration options for all users who are members of the group"""
+        # get members
+        result, message, userList = self.getGroupUserList(pGroupName)
+
+        # group found
+        if result == 0:
+            # set config
+            return self.setUsersConfiguration(userList, pChanges)
+
+        # result
+        return result, message, dbus.Array(signature="(sis)")
+
     # --------------- server admin get methods accessible by privileged users (root and all in timekpr group) --------------- #
 
     @dbus.service.method(cons.TK_DBUS_ADMIN_INTERFACE, in_signature="", out_signature="isa{sv}")
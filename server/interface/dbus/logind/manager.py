@@ -8,6 +8,7 @@ Created on Aug 28, 2018
 import dbus
 import time
 import signal
+import threading
 from gi.repository import GLib
 
 # timekpr imports
@@ -30,6 +31,20 @@ class timekprUserLoginManager(object):
         self._loginManagerVTNrRetries = 0
         self._connectionRetryCount = 0
 
+        # login1 registry (users, sessions and their properties are kept up to date by signals from login1)
+        self._loginRegistryLock = threading.Lock()
+        self._loginRegistryUsers = None
+        self._loginRegistryProperties = {}
+        self._loginRegistrySessionVersion = 0
+        self._loginRegistryConnectionLost = False
+        self._loginRegistryLastResync = None
+        self._loginRegistrySignals = []
+        self._loginRegistryProxies = {}
+        self._loginRegistryPropertyVersions = {}
+        # bus call statistics (calls made and calls saved by registry, batching and proxy reuse)
+        self._busCallsMade = 0
+        self._busCallsSaved = 0
+
         # dbus initialization
         self._timekprBus = dbus.SystemBus()
 
@@ -66,6 +81,9 @@ class timekprUserLoginManager(object):
 
             log.log(cons.TK_LOG_LEVEL_DEBUG, "got interface, login1 successfully set up")
 
+            # subscribe to login1 signals
+            self._subscribeLogin1Signals()
+
             # reset retries
             self._connectionRetryCount = 0
         except Exception as exc:
@@ -77,6 +95,250 @@ class timekprUserLoginManager(object):
             if self._connectionRetryCount >= cons.TK_MAX_RETRIES:
                 raise
 
+    def _subscribeLogin1Signals(self):
+        """Subscribe to login1 signals which keep users, sessions and their properties up to date"""
+        # remove previous subscriptions (in case connection was re-established)
+        for rSignal in self._loginRegistrySignals:
+            rSignal.remove()
+
+        # subscribe to user, session and property changes
+        self._loginRegistrySignals = [
+            self._timekprBus.add_signal_receiver(self._login1UserNew, signal_name="UserNew", dbus_interface=cons.TK_DBUS_L1_MANAGER_INTERFACE, bus_name=cons.TK_DBUS_L1_OBJECT, path=cons.TK_DBUS_L1_PATH),
+            self._timekprBus.add_signal_receiver(self._login1UserRemoved, signal_name="UserRemoved", dbus_interface=cons.TK_DBUS_L1_MANAGER_INTERFACE, bus_name=cons.TK_DBUS_L1_OBJECT, path=cons.TK_DBUS_L1_PATH),
+            self._timekprBus.add_signal_receiver(self._login1SessionNew, signal_name="SessionNew", dbus_interface=cons.TK_DBUS_L1_MANAGER_INTERFACE, bus_name=cons.TK_DBUS_L1_OBJECT, path=cons.TK_DBUS_L1_PATH),
+            self._timekprBus.add_signal_receiver(self._login1SessionRemoved, signal_name="SessionRemoved", dbus_interface=cons.TK_DBUS_L1_MANAGER_INTERFACE, bus_name=cons.TK_DBUS_L1_OBJECT, path=cons.TK_DBUS_L1_PATH),
+            self._timekprBus.add_signal_receiver(self._login1PropertiesChanged, signal_name="PropertiesChanged", dbus_interface=cons.TK_DBUS_PROPERTIES_INTERFACE, bus_name=cons.TK_DBUS_L1_OBJECT, path_keyword="pObjectPath"),
+            self._timekprBus.add_signal_receiver(self._login1NameOwnerChanged, signal_name="NameOwnerChanged", dbus_interface=cons.TK_DBUS_DBUS_INTERFACE, arg0=cons.TK_DBUS_L1_OBJECT)
+        ]
+
+        # registry has to be resynced
+        with self._loginRegistryLock:
+            self._loginRegistryUsers = None
+
+    def _login1UserNew(self, pUID, pUserPath):
+        """Process new user signal from login1"""
+        # user name is determined locally, no need to ask login1
+        userName = misc.getNormalizedUserNames(pUID=int(pUID))[0]
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "login1 signal: new user \"%s\" (%s)" % (userName, str(pUserPath)))
+        # registry
+        with self._loginRegistryLock:
+            # uninitialized registry will be resynced anyway
+            if self._loginRegistryUsers is not None:
+                # user name could not be determined, resync
+                if userName is None:
+                    self._loginRegistryUsers = None
+                else:
+                    # add user
+                    self._loginRegistryUsers[userName] = {cons.TK_CTRL_UID: str(int(pUID)), cons.TK_CTRL_UNAME: userName, cons.TK_CTRL_UPATH: str(pUserPath)}
+
+    def _login1UserRemoved(self, pUID, pUserPath):
+        """Process user removed signal from login1"""
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "login1 signal: user removed (%s)" % (str(pUserPath)))
+        # registry
+        with self._loginRegistryLock:
+            # uninitialized registry will be resynced anyway
+            if self._loginRegistryUsers is not None:
+                # remove user
+                for rUserName in [rUserName for rUserName, rUserDict in self._loginRegistryUsers.items() if rUserDict[cons.TK_CTRL_UPATH] == str(pUserPath)]:
+                    self._loginRegistryUsers.pop(rUserName)
+            # properties and proxy are not needed anymore
+            self._loginRegistryProperties.pop(str(pUserPath), None)
+            self._loginRegistryProxies.pop(str(pUserPath), None)
+            self._loginRegistryPropertyVersions.pop(str(pUserPath), None)
+
+    def _login1SessionNew(self, pSessionId, pSessionPath):
+        """Process new session signal from login1"""
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "login1 signal: new session %s (%s)" % (str(pSessionId), str(pSessionPath)))
+        # registry
+        with self._loginRegistryLock:
+            # session lists have to be refreshed
+            self._invalidateSessionLists()
+
+    def _login1SessionRemoved(self, pSessionId, pSessionPath):
+        """Process session removed signal from login1"""
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "login1 signal: session removed %s (%s)" % (str(pSessionId), str(pSessionPath)))
+        # registry
+        with self._loginRegistryLock:
+            # properties and proxy are not needed anymore
+            self._loginRegistryProperties.pop(str(pSessionPath), None)
+            self._loginRegistryProxies.pop(str(pSessionPath), None)
+            self._loginRegistryPropertyVersions.pop(str(pSessionPath), None)
+            # session lists have to be refreshed
+            self._invalidateSessionLists()
+
+    def _invalidateSessionLists(self):
+        """Invalidate session lists and user properties which depend on sessions (lock must be held)"""
+        # new version of session lists
+        self._loginRegistrySessionVersion += 1
+        # user properties (like state) depend on sessions
+        if self._loginRegistryUsers is not None:
+            # remove cached user properties
+            for rUserDict in self._loginRegistryUsers.values():
+                self._loginRegistryProperties.pop(rUserDict[cons.TK_CTRL_UPATH], None)
+
+    def _login1PropertiesChanged(self, pInterface, pChangedProperties, pInvalidatedProperties, pObjectPath=None):
+        """Process properties changed signal from login1"""
+        # registry
+        with self._loginRegistryLock:
+            # new version of object properties
+            self._loginRegistryPropertyVersions[pObjectPath] = self._loginRegistryPropertyVersions.get(pObjectPath, 0) + 1
+            # only objects which are cached are updated
+            if pObjectPath in self._loginRegistryProperties:
+                # cached properties
+                properties = self._loginRegistryProperties[pObjectPath]
+                # update changed
+                for rProperty, rValue in pChangedProperties.items():
+                    properties[str(rProperty)] = rValue
+                # remove invalidated and the ones which change along, but are not announced
+                for rProperty in list(pInvalidatedProperties) + [rProperty for rProperty in cons.TK_DBUS_L1_NONEMITTING_PROPS if rProperty not in pChangedProperties]:
+                    properties.pop(str(rProperty), None)
+
+    def _login1NameOwnerChanged(self, pName, pOldOwner, pNewOwner):
+        """Process login1 owner changes (login1 restarts)"""
+        # if there was an owner before, the connection to it is lost
+        if pOldOwner != "":
+            # logging
+            log.log(cons.TK_LOG_LEVEL_INFO, "IMPORTANT WARNING: login1 owner changed from \"%s\" to \"%s\", full resync will be done" % (pOldOwner, pNewOwner))
+            # registry
+            with self._loginRegistryLock:
+                # connection is lost
+                self._loginRegistryConnectionLost = True
+                self._loginRegistryUsers = None
+                # proxies are bound to previous owner
+                self._loginRegistryProxies.clear()
+
+    def getCachedProperties(self, pObjectPath):
+        """Get login1 object properties which are known to registry"""
+        # registry
+        with self._loginRegistryLock:
+            # copy of properties
+            return dict(self._loginRegistryProperties.get(pObjectPath, {}))
+
+    def setCachedProperties(self, pObjectPath, pProperties):
+        """Save login1 object properties to registry (later they are kept up to date by signals)"""
+        # registry
+        with self._loginRegistryLock:
+            # save properties
+            self._loginRegistryProperties.setdefault(pObjectPath, {}).update(pProperties)
+
+    def getObjectProxy(self, pObjectPath):
+        """Get login1 object proxy (proxies are cached and created without introspection)"""
+        # registry
+        with self._loginRegistryLock:
+            # cached proxy
+            objectProxy = self._loginRegistryProxies.get(pObjectPath)
+            # reused proxy saves name resolution and introspection
+            if objectProxy is not None:
+                self._busCallsSaved += 2
+
+        # not yet cached
+        if objectProxy is None:
+            # dbus performance measurement
+            misc.measureDBUSTimeElapsed(pStart=True)
+            # get dbus object
+            objectProxy = self._timekprBus.get_object(cons.TK_DBUS_L1_OBJECT, pObjectPath, introspect=False)
+            # measurement logging
+            misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=pObjectPath)
+
+            # registry
+            with self._loginRegistryLock:
+                # cache proxy
+                self._loginRegistryProxies[pObjectPath] = objectProxy
+                # name resolution is done, introspection is saved
+                self._busCallsMade += 1
+                self._busCallsSaved += 1
+
+        # result
+        return objectProxy
+
+    def getObjectProperties(self, pObjectPath, pInterfaceName, pPropertyNames):
+        """Get login1 object properties from registry, if some are not known, all properties are retrieved at once (not announced ones are re-read for active objects)"""
+        # known properties
+        objectProperties = self.getCachedProperties(pObjectPath)
+        # properties which are not known
+        missingProperties = [rProperty for rProperty in pPropertyNames if rProperty not in objectProperties]
+        # properties which are not announced are re-read while object is active (e.g. session may start closing without announcing anything)
+        refreshedProperties = [rProperty for rProperty in pPropertyNames if rProperty in cons.TK_DBUS_L1_NONEMITTING_PROPS] if len(missingProperties) == 0 and str(objectProperties.get("State", "")) == "active" else []
+
+        # ask for all properties at once
+        if len(missingProperties) > 0:
+            # get properties interface
+            propertiesInterface = dbus.Interface(self.getObjectProxy(pObjectPath), cons.TK_DBUS_PROPERTIES_INTERFACE)
+            # dbus performance measurement
+            misc.measureDBUSTimeElapsed(pStart=True)
+            # get all properties
+            allProperties = {str(rProperty): rValue for rProperty, rValue in propertiesInterface.GetAll(pInterfaceName).items()}
+            # measurement logging
+            misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=pInterfaceName)
+            # save to registry (later they are kept up to date by signals)
+            self.setCachedProperties(pObjectPath, allProperties)
+            # result
+            objectProperties.update(allProperties)
+        # re-read properties which are not announced
+        elif len(refreshedProperties) > 0:
+            # get properties interface
+            propertiesInterface = dbus.Interface(self.getObjectProxy(pObjectPath), cons.TK_DBUS_PROPERTIES_INTERFACE)
+            # get properties one by one
+            for rProperty in refreshedProperties:
+                # dbus performance measurement
+                misc.measureDBUSTimeElapsed(pStart=True)
+                # get property
+                objectProperties[rProperty] = propertiesInterface.Get(pInterfaceName, rProperty)
+                # measurement logging
+                misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=pInterfaceName)
+            # registry
+            with self._loginRegistryLock:
+                # changed (same as announced change)
+                if any(self._loginRegistryProperties.get(pObjectPath, {}).get(rProperty) != objectProperties[rProperty] for rProperty in refreshedProperties):
+                    self._loginRegistryPropertyVersions[pObjectPath] = self._loginRegistryPropertyVersions.get(pObjectPath, 0) + 1
+                # save
+                self._loginRegistryProperties.setdefault(pObjectPath, {}).update({rProperty: objectProperties[rProperty] for rProperty in refreshedProperties})
+
+        # registry
+        with self._loginRegistryLock:
+            # one call instead of one call per property and no calls for known properties (except the ones which are re-read)
+            self._busCallsMade += (1 if len(missingProperties) > 0 else 0) + len(refreshedProperties)
+            self._busCallsSaved += len(pPropertyNames) - min(len(missingProperties), 1) - len(refreshedProperties)
+
+        # check that all properties are available
+        missingProperties = [rProperty for rProperty in pPropertyNames if rProperty not in objectProperties]
+        # not all are available
+        if len(missingProperties) > 0:
+            raise KeyError("properties %s are not available for \"%s\"" % (", ".join(missingProperties), pObjectPath))
+
+        # result
+        return objectProperties
+
+    def getBusCallStatistics(self):
+        """Get bus calls made and saved since last time this was asked"""
+        # registry
+        with self._loginRegistryLock:
+            # statistics
+            busCallsMade, busCallsSaved = self._busCallsMade, self._busCallsSaved
+            # reset
+            self._busCallsMade = self._busCallsSaved = 0
+
+        # result
+        return busCallsMade, busCallsSaved
+
+    def getPropertiesVersion(self, pObjectPath):
+        """Get version of login1 object properties (it changes when login1 announces property changes)"""
+        # registry
+        with self._loginRegistryLock:
+            # version
+            return self._loginRegistryPropertyVersions.get(pObjectPath, 0)
+
+    def getSessionListVersion(self):
+        """Get version of session lists (it changes when sessions are added or removed)"""
+        # registry
+        with self._loginRegistryLock:
+            # version
+            return self._loginRegistrySessionVersion
+
     def _listUsers(self):
         """Exec ListUsers dbus methods (this is the only method which just has to succeed)"""
         # reset counter on retry
@@ -106,14 +368,43 @@ class timekprUserLoginManager(object):
         """Go through a list of logged in users"""
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start getUserList") if not pSilent else True
 
-        # get user list
-        wasConnectionLost, loggedInUsersDBUS = self._listUsers()
-        loggedInUsers = {}
-
-        # loop through all users
-        for rUser in loggedInUsersDBUS:
-            # set up dict for every user
-            loggedInUsers[str(rUser[1])] = {cons.TK_CTRL_UID: str(int(rUser[0])), cons.TK_CTRL_UNAME: str(rUser[1]), cons.TK_CTRL_UPATH: str(rUser[2])}
+        # determine whether full resync is needed (registry is not initialized, connection was lost or it's time to resync)
+        with self._loginRegistryLock:
+            # connection lost
+            wasConnectionLost = self._loginRegistryConnectionLost
+            # resync
+            needsResync = self._loginRegistryUsers is None or wasConnectionLost or (time.monotonic() - self._loginRegistryLastResync) >= cons.TK_DBUS_L1_RESYNC_TIME
+            # registry is up to date, just use it
+            if not needsResync:
+                # ListUsers is saved
+                self._busCallsSaved += 1
+                # copy of users
+                loggedInUsers = {rUserName: dict(rUserDict) for rUserName, rUserDict in self._loginRegistryUsers.items()}
+
+        # full resync
+        if needsResync:
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "login1 registry: full resync of users") if not pSilent else True
+            # get user list
+            wasConnectionLostDBUS, loggedInUsersDBUS = self._listUsers()
+            loggedInUsers = {}
+
+            # loop through all users
+            for rUser in loggedInUsersDBUS:
+                # set up dict for every user
+                loggedInUsers[str(rUser[1])] = {cons.TK_CTRL_UID: str(int(rUser[0])), cons.TK_CTRL_UNAME: str(rUser[1]), cons.TK_CTRL_UPATH: str(rUser[2])}
+
+            # registry
+            with self._loginRegistryLock:
+                # save users
+                self._loginRegistryUsers = {rUserName: dict(rUserDict) for rUserName, rUserDict in loggedInUsers.items()}
+                # properties and sessions are resynced as well
+                self._loginRegistryProperties.clear()
+                self._loginRegistrySessionVersion += 1
+                self._loginRegistryConnectionLost = False
+                self._loginRegistryLastResync = time.monotonic()
+                self._busCallsMade += 1
+            # connection lost
+            wasConnectionLost = wasConnectionLost or wasConnectionLostDBUS
 
         # in case debug
         if not pSilent and log.isDebugEnabled():
@@ -136,65 +427,24 @@ class timekprUserLoginManager(object):
         # prepare return list
         userSessions = []
 
-        # dbus performance measurement
-        misc.measureDBUSTimeElapsed(pStart=True)
-        # get dbus object
-        login1UserObject = self._timekprBus.get_object(cons.TK_DBUS_L1_OBJECT, pUserPath)
-        # measurement logging
-        misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=pUserPath)
-
-        # dbus performance measurement
-        misc.measureDBUSTimeElapsed(pStart=True)
-        # get dbus interface for properties
-        login1UserInterface = dbus.Interface(login1UserObject, cons.TK_DBUS_PROPERTIES_INTERFACE)
-        # measurement logging
-        misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_PROPERTIES_INTERFACE)
-
-        # dbus performance measurement
-        misc.measureDBUSTimeElapsed(pStart=True)
         # get all user sessions
-        login1UserSessions = login1UserInterface.Get(cons.TK_DBUS_USER_OBJECT, "Sessions")
-        # measurement logging
-        misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_USER_OBJECT)
+        login1UserSessions = self.getObjectProperties(pUserPath, cons.TK_DBUS_USER_OBJECT, ("Sessions",))["Sessions"]
 
         # go through all user sessions
         for rUserSession in login1UserSessions:
-            # dbus performance measurement
-            misc.measureDBUSTimeElapsed(pStart=True)
-            # get dbus object
-            login1SessionObject = self._timekprBus.get_object(cons.TK_DBUS_L1_OBJECT, str(rUserSession[1]))
-            # measurement logging
-            misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=str(rUserSession[1]))
-
-            # dbus performance measurement
-            misc.measureDBUSTimeElapsed(pStart=True)
-            # get dbus interface for properties
-            login1SessionInterface = dbus.Interface(login1SessionObject, cons.TK_DBUS_PROPERTIES_INTERFACE)
-            # measurement logging
-            misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_PROPERTIES_INTERFACE)
-
             # get all user session properties
             try:
-                # dbus performance measurement
-                misc.measureDBUSTimeElapsed(pStart=True)
-                # properties
-                sessionType = str(login1SessionInterface.Get(cons.TK_DBUS_SESSION_OBJECT, "Type"))
-                sessionVTNr = str(int(login1SessionInterface.Get(cons.TK_DBUS_SESSION_OBJECT, "VTNr")))
-                sessionSeat = str(login1SessionInterface.Get(cons.TK_DBUS_SESSION_OBJECT, "Seat")[0])
-                sessionState = str(login1SessionInterface.Get(cons.TK_DBUS_SESSION_OBJECT, "State"))
-                # measurement logging
-                misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_SESSION_OBJECT)
+                # properties (retrieved at once, if they are not known)
+                sessionProperties = self.getObjectProperties(str(rUserSession[1]), cons.TK_DBUS_SESSION_OBJECT, ("Type", "VTNr", "Seat", "State"))
+                sessionType = str(sessionProperties["Type"])
+                sessionVTNr = str(int(sessionProperties["VTNr"]))
+                sessionSeat = str(sessionProperties["Seat"][0])
+                sessionState = str(sessionProperties["State"])
 
                 # add user session to return list
                 userSessions.append({"sessionId": str(rUserSession[0]), "sessionPath": str(rUserSession[1]), "type": sessionType, "vtnr": sessionVTNr, "seat": sessionSeat, "state": sessionState})
             except Exception as exc:
                 log.log(cons.TK_LOG_LEVEL_INFO, "ERROR: error getting session properties for session \"%s\" DBUS: %s" % (str(rUserSession[1]), exc))
-            
-            # free
-            del login1SessionInterface, login1SessionObject
-
-        # free
-        del login1UserSessions, login1UserInterface, login1UserObject
 
         # return sessions
         return userSessions
@@ -16,45 +16,44 @@ from timekpr.common.utils import misc
 class timekprUserManager(object):
     """A connection with login1 and other DBUS servers."""
 
-    def __init__(self, pUserName, pUserPathOnBus):
+    def __init__(self, pUserName, pUserPathOnBus, pLoginManager):
         """Initialize manager."""
 
-        # save the bus and user
-        self._timekprBus = dbus.SystemBus()
+        # save the user
         self._userName = pUserName
+        self._userPath = pUserPathOnBus
+        # login manager (holds login1 registry which is kept up to date by signals)
+        self._timekprLoginManager = pLoginManager
 
-        # dbus performance measurement
-        misc.measureDBUSTimeElapsed(pStart=True)
-        # get dbus object
-        self._login1UserObject = self._timekprBus.get_object(cons.TK_DBUS_L1_OBJECT, pUserPathOnBus)
-        # measurement logging
-        misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_L1_OBJECT)
-
-        # dbus performance measurement
-        misc.measureDBUSTimeElapsed(pStart=True)
-        # get dbus interface for properties
-        self._login1UserInterface = dbus.Interface(self._login1UserObject, cons.TK_DBUS_PROPERTIES_INTERFACE)
-        # measurement logging
-        misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_PROPERTIES_INTERFACE)
+        # get dbus object (cached by login manager, created without introspection)
+        self._login1UserObject = self._timekprLoginManager.getObjectProxy(pUserPathOnBus)
 
         # user sessions & additional DBUS objects
         self._timekprUserSessions = {}
         self._timekprUserObjects = {}
 
         # get user ID
-        self._userId = int(self._login1UserInterface.Get(cons.TK_DBUS_USER_OBJECT, "UID"))
+        self._userId = int(self._timekprLoginManager.getObjectProperties(pUserPathOnBus, cons.TK_DBUS_USER_OBJECT, ("UID",))["UID"])
         self._scrRetryCnt = 0
         self._sessionLockedStateAvailable = None
+        self._sessionListVersion = None
 
     def cacheUserSessionList(self):
         """Determine user sessions and cache session objects for further reference."""
+        # sessions are added or removed by login1 signals, if nothing changed, cached sessions are up to date
+        sessionListVersion = self._timekprLoginManager.getSessionListVersion()
+        # no changes
+        if sessionListVersion == self._sessionListVersion:
+            # logging
+            log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "session list for \"%s\" has not changed" % (self._userName))
+            # nothing to do
+            return
+        # save version (before getting sessions, so changes in the meantime are not lost)
+        self._sessionListVersion = sessionListVersion
+
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "---=== start cacheUserSessionList for \"%s\" ===---" % (self._userName))
-        # dbus performance measurement
-        misc.measureDBUSTimeElapsed(pStart=True)
         # get all user sessions
-        userSessions = self._login1UserInterface.Get(cons.TK_DBUS_USER_OBJECT, "Sessions")
-        # measurement logging
-        misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_USER_OBJECT)
+        userSessions = self._timekprLoginManager.getObjectProperties(self._userPath, cons.TK_DBUS_USER_OBJECT, ("Sessions",))["Sessions"]
 
         # extra only
         if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
@@ -75,19 +74,8 @@ class timekprUserManager(object):
             # if we have not yet saved a user session, let's do that to improve interaction with dbus
             if sessionId not in self._timekprUserSessions:
                 log.log(cons.TK_LOG_LEVEL_DEBUG, "adding session: %s, %s" % (sessionId, sessionPath))
-                # dbus performance measurement
-                misc.measureDBUSTimeElapsed(pStart=True)
-                # get object and interface to save it
-                sessionObject = self._timekprBus.get_object(cons.TK_DBUS_L1_OBJECT, sessionPath)
-                # measurement logging
-                misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_L1_OBJECT)
-
-                # dbus performance measurement
-                misc.measureDBUSTimeElapsed(pStart=True)
-                # get object and interface to save it
-                sessionPropertiesInterface = dbus.Interface(sessionObject, cons.TK_DBUS_PROPERTIES_INTERFACE)
-                # measurement logging
-                misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_PROPERTIES_INTERFACE)
+                # get object (cached by login manager, created without introspection)
+                sessionObject = self._timekprLoginManager.getObjectProxy(sessionPath)
 
                 # dbus performance measurement
                 misc.measureDBUSTimeElapsed(pStart=True)
@@ -97,11 +85,12 @@ class timekprUserManager(object):
                 misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=cons.TK_DBUS_SESSION_OBJECT)
 
                 # cache sessions
-                self._timekprUserSessions[sessionId] = {cons.TK_CTRL_DBUS_SESS_OBJ: sessionObject, cons.TK_CTRL_DBUS_SESS_IF: sessionInterface, cons.TK_CTRL_DBUS_SESS_PROP_IF: sessionPropertiesInterface, cons.TK_CTRL_DBUS_SESS_PROP: {}}
+                self._timekprUserSessions[sessionId] = {cons.TK_CTRL_DBUS_SESS_OBJ: sessionObject, cons.TK_CTRL_DBUS_SESS_IF: sessionInterface, cons.TK_CTRL_DBUS_SESS_PATH: sessionPath, cons.TK_CTRL_DBUS_SESS_PROP: {}}
 
-                # add static properties
-                self._timekprUserSessions[sessionId][cons.TK_CTRL_DBUS_SESS_PROP]["VTNr"] = str(int(sessionPropertiesInterface.Get(cons.TK_DBUS_SESSION_OBJECT, "VTNr")))
-                self._timekprUserSessions[sessionId][cons.TK_CTRL_DBUS_SESS_PROP]["Seat"] = str(sessionPropertiesInterface.Get(cons.TK_DBUS_SESSION_OBJECT, "Seat")[0])
+                # add static properties (all properties are retrieved at once, so dynamic ones are cached for the first check as well)
+                sessionProperties = self._timekprLoginManager.getObjectProperties(sessionPath, cons.TK_DBUS_SESSION_OBJECT, ("VTNr", "Seat"))
+                self._timekprUserSessions[sessionId][cons.TK_CTRL_DBUS_SESS_PROP]["VTNr"] = str(int(sessionProperties["VTNr"]))
+                self._timekprUserSessions[sessionId][cons.TK_CTRL_DBUS_SESS_PROP]["Seat"] = str(sessionProperties["Seat"][0])
             else:
                 log.log(cons.TK_LOG_LEVEL_DEBUG, "session already cached: %s" % (sessionId))
 
@@ -115,16 +104,22 @@ class timekprUserManager(object):
 
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "---=== finish cacheUserSessionList for \"%s\" ===---" % (self._userName))
 
+    def getStateVersion(self):
+        """Get version of user state known to login1 registry (it changes when sessions are added / removed or their properties change)."""
+        # session list and properties of user and its sessions
+        return (self._timekprLoginManager.getSessionListVersion(),) + tuple(self._timekprLoginManager.getPropertiesVersion(rPath) for rPath in [self._userPath] + [rSession[cons.TK_CTRL_DBUS_SESS_PATH] for rSession in self._timekprUserSessions.values()])
+
     def isUserActive(self, pTimekprConfig, pTimekprUserConfig, pIsScreenLocked):
         """Check if user is active."""
-        log.log(cons.TK_LOG_LEVEL_DEBUG, "---=== start isUserActive for \"%s\" ===---" % (self._userName))
-        log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "supported session types: %s" % (str(pTimekprConfig.getTimekprSessionsCtrl())))
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "---=== start isUserActive for \"%s\" ===---", self._userName)
+        log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "supported session types: %s", pTimekprConfig.getTimekprSessionsCtrl())
 
-        # get all user sessions
-        userState = str(self._login1UserInterface.Get(cons.TK_DBUS_USER_OBJECT, "State"))
-        userIdleState = str(bool(self._login1UserInterface.Get(cons.TK_DBUS_USER_OBJECT, "IdleHint")))
+        # get user properties
+        userProperties = self._timekprLoginManager.getObjectProperties(self._userPath, cons.TK_DBUS_USER_OBJECT, ("State", "IdleHint"))
+        userState = str(userProperties["State"])
+        userIdleState = str(bool(userProperties["IdleHint"]))
 
-        log.log(cons.TK_LOG_LEVEL_DEBUG, "user stats, ul1st: %s, ul1idlhnt: %s, uscrlck: %s" % (userState, userIdleState, str(pIsScreenLocked)))
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "user stats, ul1st: %s, ul1idlhnt: %s, uscrlck: %s", userState, userIdleState, pIsScreenLocked)
 
         # cache sessions
         self.cacheUserSessionList()
@@ -149,7 +144,7 @@ class timekprUserManager(object):
         # if user locked the computer
         if pIsScreenLocked and not pTimekprUserConfig.getUserTrackInactive():
             # user is not active
-            log.log(cons.TK_LOG_LEVEL_DEBUG, "session inactive (verified by user \"%s\" screensaver status), sessions won't be checked" % (self._userName))
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "session inactive (verified by user \"%s\" screensaver status), sessions won't be checked", self._userName)
         else:
             # go through all user sessions
             for rSessionId in self._timekprUserSessions:
@@ -160,15 +155,16 @@ class timekprUserManager(object):
                 misc.measureDBUSTimeElapsed(pStart=True)
                 # get needed static properties
                 sessionVTNr = self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PROP]["VTNr"]
-                # get needed properties
-                sessionType = str(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PROP_IF].Get(cons.TK_DBUS_SESSION_OBJECT, "Type"))
-                sessionState = str(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PROP_IF].Get(cons.TK_DBUS_SESSION_OBJECT, "State"))
-                sessionIdleState = str(bool(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PROP_IF].Get(cons.TK_DBUS_SESSION_OBJECT, "IdleHint")))
+                # get needed properties (from login1 registry, all properties are retrieved at once only when some are not known)
+                sessionProperties = self._timekprLoginManager.getObjectProperties(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PATH], cons.TK_DBUS_SESSION_OBJECT, ("Type", "State", "IdleHint"))
+                sessionType = str(sessionProperties["Type"])
+                sessionState = str(sessionProperties["State"])
+                sessionIdleState = str(bool(sessionProperties["IdleHint"]))
                 # get locked state, only if it's available
                 if self._sessionLockedStateAvailable or self._sessionLockedStateAvailable is None:
                     try:
                         # get locked state
-                        sessionLockedState = str(bool(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PROP_IF].Get(cons.TK_DBUS_SESSION_OBJECT, "LockedHint")))
+                        sessionLockedState = str(bool(self._timekprLoginManager.getObjectProperties(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PATH], cons.TK_DBUS_SESSION_OBJECT, ("LockedHint",))["LockedHint"]))
                         # locked state available
                         if self._sessionLockedStateAvailable is None:
                             # state used
@@ -182,45 +178,45 @@ class timekprUserManager(object):
                 misc.measureDBUSTimeElapsed(pStop=True, pDbusIFName=rSessionId)
 
                 # logging
-                log.log(cons.TK_LOG_LEVEL_DEBUG, "session stats, styp: %s, sVTNr: %s, sl1St: %s, sl1idlst: %s, sl1lckst: %s" % (sessionType, sessionVTNr, sessionState, sessionIdleState, sessionLockedState))
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "session stats, styp: %s, sVTNr: %s, sl1St: %s, sl1idlst: %s, sl1lckst: %s", sessionType, sessionVTNr, sessionState, sessionIdleState, sessionLockedState)
 
                 # check if active
                 if sessionState == "active" and sessionIdleState == "False" and sessionLockedState == "False":
                     # validate against session types we specifically do not track
                     if sessionType in pTimekprConfig.getTimekprSessionsExcl():
                         # session is on the list of session types we specifically do not track
-                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is active, but session type \"%s\" is excluded from tracking (thus effectively inactive)" % (rSessionId, sessionType))
+                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is active, but session type \"%s\" is excluded from tracking (thus effectively inactive)", rSessionId, sessionType)
                     # validate against session types we manage
                     elif sessionType not in pTimekprConfig.getTimekprSessionsCtrl():
                         # session is not on the list of session types we track
-                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is active, but session type \"%s\" is not on tracked type list (thus effectively inactive)" % (rSessionId, sessionType))
+                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is active, but session type \"%s\" is not on tracked type list (thus effectively inactive)", rSessionId, sessionType)
                     else:
                         # session is on the list of session types we track and session is active
                         userActive = True
-                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s active" % (rSessionId))
+                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s active", rSessionId)
                 elif sessionType in pTimekprConfig.getTimekprSessionsCtrl():
                     # session can be: offline, closing, online, lingering, active
                     # do not count lingering, offline and closing sessions as active either way
                     if sessionState in ("offline", "closing", "lingering"):
                         # user is not active
-                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is inactive (not exactly logged in too)" % (rSessionId))
+                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is inactive (not exactly logged in too)", rSessionId)
                     # if we track inactive
                     elif pTimekprUserConfig.getUserTrackInactive():
                         # we track inactive sessions
                         userActive = True
                         # session is not on the list of session types we track
-                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is considered active (track inactive sessions enabled)" % (rSessionId))
+                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is considered active (track inactive sessions enabled)", rSessionId)
                     else:
                         # session is not active
-                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is considered inactive" % (rSessionId))
+                        log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is considered inactive", rSessionId)
                 else:
                     # session is not on the list of session types we track
-                    log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is inactive and not tracked" % (rSessionId))
+                    log.log(cons.TK_LOG_LEVEL_DEBUG, "session %s is inactive and not tracked", rSessionId)
 
         # screen lock state
         userScreenLocked = (pIsScreenLocked or sessionLockedState == "True")
 
-        log.log(cons.TK_LOG_LEVEL_DEBUG, "---=== finish isUserActive: %s ===---" % (str(userActive)))
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "---=== finish isUserActive: %s ===---", userActive)
 
         # return whether user is active
         return userActive, userScreenLocked
@@ -230,6 +226,6 @@ class timekprUserManager(object):
         # go through all user sessions
         for rSessionId in self._timekprUserSessions:
             # we lock only GUI sessions
-            if str(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PROP_IF].Get(cons.TK_DBUS_SESSION_OBJECT, "Type")) in cons.TK_SESSION_TYPES_CTRL:
+            if str(self._timekprLoginManager.getObjectProperties(self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_PATH], cons.TK_DBUS_SESSION_OBJECT, ("Type",))["Type"]) in cons.TK_SESSION_TYPES_CTRL:
                 # lock session
                 self._timekprUserSessions[rSessionId][cons.TK_CTRL_DBUS_SESS_IF].Lock()
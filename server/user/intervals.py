@@ -0,0 +1,86 @@
+"""
+Created on Oct 17, 2026
+"""
+
+# imports
+import bisect
+
+# timekpr imports
+from timekpr.common.constants import constants as cons
+
+
+class timekprIntervalIndex(object):
+    """Sorted index of allowed intervals for a day (in seconds from the start of the day) with prefix sums"""
+
+    def __init__(self, pIntervals):
+        """Build the index from allowed intervals (start, end), at most one per hour, sorted by start"""
+        # interval starts and ends
+        self._starts = [rInterval[0] for rInterval in pIntervals]
+        self._ends = [rInterval[1] for rInterval in pIntervals]
+        # prefix sums of interval lengths
+        self._prefixSums = [0]
+        # go through intervals
+        for rStart, rEnd in pIntervals:
+            self._prefixSums.append(self._prefixSums[-1] + rEnd - rStart)
+        # end of continuous block which interval belongs to (intervals which touch each other form a block)
+        self._blockEnds = list(self._ends)
+        # go through intervals backwards
+        for rIdx in range(len(self._ends) - 2, -1, -1):
+            # interval continues in next one
+            if self._ends[rIdx] == self._starts[rIdx + 1]:
+                self._blockEnds[rIdx] = self._blockEnds[rIdx + 1]
+
+    def getTimeAvailable(self):
+        """Get total time available in intervals"""
+        # result
+        return self._prefixSums[-1]
+
+    def getTimeLeftFrom(self, pSecond):
+        """Get continuous time, total time left and whether time continues till the end of the day, starting from specified second of the day
+           (interval in current hour is accounted only if it has already started)"""
+        # defaults
+        timeLeftContinuous = timeLeft = 0
+        # interval which started before or at specified second
+        idx = bisect.bisect_right(self._starts, pSecond) - 1
+        # specified second is in the interval
+        if idx >= 0 and self._ends[idx] > pSecond:
+            # continuous time till the end of block and time till the end of interval
+            timeLeftContinuous = self._blockEnds[idx] - pSecond
+            timeLeft = self._ends[idx] - pSecond
+        # next interval
+        idx += 1
+        # interval in current hour which has not yet started is not accounted
+        if idx < len(self._starts) and self._starts[idx] // cons.TK_LIMIT_PER_HOUR == pSecond // cons.TK_LIMIT_PER_HOUR:
+            idx += 1
+        # the rest of intervals
+        timeLeft += self._prefixSums[-1] - self._prefixSums[idx]
+
+        # result
+        return timeLeftContinuous, timeLeft, timeLeftContinuous > 0 and pSecond + timeLeftContinuous >= cons.TK_LIMIT_PER_DAY
+
+    def getTimeLeftFromStart(self):
+        """Get continuous time and time left from the start of the day, counting till continuous time ends
+           (interval in the hour right after continuous time is accounted too, if it exists)"""
+        # continuous time from the start of the day
+        timeLeftContinuous = self._blockEnds[0] if len(self._starts) > 0 and self._starts[0] == 0 else 0
+        # first interval after continuous time
+        idx = bisect.bisect_left(self._starts, timeLeftContinuous)
+        # time left
+        timeLeft = timeLeftContinuous
+        # interval in the hour right after continuous time (continuous time has to end at the end of the hour)
+        if idx < len(self._starts) and timeLeftContinuous % cons.TK_LIMIT_PER_HOUR == 0 and self._starts[idx] // cons.TK_LIMIT_PER_HOUR == timeLeftContinuous // cons.TK_LIMIT_PER_HOUR:
+            timeLeft += self._ends[idx] - self._starts[idx]
+
+        # result
+        return timeLeftContinuous, timeLeft
+
+    def findIntervalStartFrom(self, pHour, pMinute):
+        """Find the start (hour, minute) of the first interval starting from specified hour, skipping the interval in specified hour if it starts before the next minute"""
+        # first interval in specified hour or later
+        idx = bisect.bisect_left(self._starts, pHour * cons.TK_LIMIT_PER_HOUR)
+        # interval in specified hour can not be used as it is in the past
+        if idx < len(self._starts) and self._starts[idx] // cons.TK_LIMIT_PER_HOUR == pHour and pMinute + 1 >= (self._starts[idx] % cons.TK_LIMIT_PER_HOUR) // cons.TK_LIMIT_PER_MINUTE:
+            idx += 1
+
+        # result
+        return (self._starts[idx] // cons.TK_LIMIT_PER_HOUR, (self._starts[idx] % cons.TK_LIMIT_PER_HOUR) // cons.TK_LIMIT_PER_MINUTE) if idx < len(self._starts) else (None, None)
@@ -6,15 +6,42 @@ Created on Aug 01, 2020
 
 # imports
 import os
-import psutil
-from gi.repository import GLib
-from datetime import datetime
-import re
+import sys
+import errno
+import time
+import select
+import signal
 
 # timekpr imports
 from timekpr.common.log import log
 from timekpr.common.constants import constants as cons
 from timekpr.server.config import userhelper
+from timekpr.server.user.procevents import timekprProcEventListener
+from timekpr.server.user.playtimefilter import timekprPlayTimeFilterMatcher
+
+
+class timekprPlayTimeProcess(object):
+    """Cached process (compact record, no per instance dict)"""
+
+    # fixed layout
+    __slots__ = ("uid", "exe", "cmdLine", "termCnt", "pidFd", "qcPasses", "qcTime", "generation")
+
+    def __init__(self, pUid, pExe, pCmdLine, pQcPasses, pQcTime, pGeneration):
+        """Initialize process"""
+        # user id (None if user is not of our interest)
+        self.uid = pUid
+        # executable and command line
+        self.exe = pExe
+        self.cmdLine = pCmdLine
+        # terminate attempts before killing
+        self.termCnt = 0
+        # pidfd for process that matches patterns (None if pidfds are not supported)
+        self.pidFd = None
+        # how many times we need to verify process has changed euid / cmdline (def: 2) and time between the QC passes (def: 5 iterations)
+        self.qcPasses = pQcPasses
+        self.qcTime = pQcTime
+        # process list generation in which process was seen last time
+        self.generation = pGeneration
 
 
 class timekprPlayTimeConfig(object):
@@ -25,13 +52,9 @@ class timekprPlayTimeConfig(object):
     _USRS = "U"   # used to identify users (in master structure)
     _MPIDS = "M"  # used to identify processes that match patterns
     _FLTS = "F"   # used to identify filters for processes for particular user
-    _UID = "u"    # used to identify user id (child struct)
-    _EXE = "e"    # used to identify executable for process
-    _CMD = "c"    # used to identify command line for process
-    _TERM = "k"   # used to identify terminate attempts before killing
-    _QCP = "Q"    # used to identify how many times we need to verify process has changed euid / cmdline (def: 2)
-    _QCT = "q"    # used to identify time between the QC passes  (def: 5 iterations)
-    _TIM = "t"    # used to identify last update date
+    _MTCH = "X"   # used to identify compiled matcher for all filters of particular user
+    _GEN = "g"    # used to identify process list generation (processes not seen in the current one are gone)
+    _TIM = "t"    # used to identify last process list time
     # value constants
     _QCP_V = 2
     _QCT_V = 5
@@ -42,6 +65,11 @@ class timekprPlayTimeConfig(object):
     _EXECUTABLE ="/proc/%s/exe"
     # cmdline
     _CMDLINE = "/proc/%s/cmdline"
+    # cgroup v2 (unified) and systemd user slices
+    _CGROUP_CONTROLLERS = "/sys/fs/cgroup/cgroup.controllers"
+    _CGROUP_USER_SLICES = "/sys/fs/cgroup/user.slice"
+    _CGROUP_USER_SLICE = "/sys/fs/cgroup/user.slice/user-%s.slice"
+    _CGROUP_PROCS = "cgroup.procs"
 
     def __init__(self, pTimekprConfig):
         """Initialize all stuff for PlayTime"""
@@ -49,47 +77,171 @@ class timekprPlayTimeConfig(object):
         log.log(cons.TK_LOG_LEVEL_INFO, "start init timekprUserPlayTime")
 
         # structure:
-        #   P - process pids for all processes, every process has: u - user id, c - cmdline, t - adjustment time
+        #   P - process pids (int) for all processes, every process is timekprPlayTimeProcess (user id, executable, cmdline, generation, etc.)
         #   U - contains users, which in turn contains reference to P
-        #   TIM - last update date for processes
-        self._cachedPids = {self._PIDS: {}, self._USRS: {}, self._TIM: None}
+        #   GEN - process list generation
+        #   TIM - last process list time
+        self._cachedPids = {self._PIDS: {}, self._USRS: {}, self._GEN: 0, self._TIM: None}
+        # process events (started when processes are needed for the first time, if not available, processes are listed from /proc)
+        self._procEventListener = None
+        # pids which were started or changed according to events, but are not inspected yet
+        self._pendingPids = set()
+        # pidfds of processes that match patterns (pidfd becomes readable when process exits)
+        self._pidFds = {}
+        self._pidFdPoll = select.poll()
+        # whether pidfds can be used (it's determined when the first pidfd is opened)
+        self._isPidFdSupported = hasattr(os, "pidfd_open")
+        # compiled filter matchers (shared by users with the same filters)
+        self._matchers = {}
+        # processes of users with filters can be listed from their cgroups (cgroup v2 with systemd user slices, if enabled in config), otherwise all processes are listed from /proc
+        self._isCgroupAvailable = os.path.isfile(self._CGROUP_CONTROLLERS) and os.path.isdir(self._CGROUP_USER_SLICES)
         # global server config
         self._timekprConfig = pTimekprConfig
 
         log.log(cons.TK_LOG_LEVEL_INFO, "finish init timekprUserPlayTime")
 
-    def _getMatchedProcessesByFilter(self, pUid, pFlts, pPids):
-        """Method to validate whether cmdline matches the filter"""
+    def _getMatchedProcesses(self, pUid, pPids):
+        """Method to validate whether executable / cmdline matches any of the user filters"""
         # def
         matchedPids = []
+        # matcher for user filters
+        matcher = self._cachedPids[self._USRS][pUid][self._MTCH]
+        # no filters
+        if matcher is None:
+            return matchedPids
+        # whether cmdline is inspected as well
+        isEnhanced = self._timekprConfig.getTimekprPlayTimeEnhancedActivityMonitorEnabled()
         # loop through user processes
         for rPid in pPids:
             # executable
-            exe = self._cachedPids[self._PIDS][rPid][self._EXE]
+            exe = self._cachedPids[self._PIDS][rPid].exe
             # command line
-            cmdLine = self._cachedPids[self._PIDS][rPid][self._CMD]
+            cmdLine = self._cachedPids[self._PIDS][rPid].cmdLine
             # try searching only if exe is specified
-            if exe is not None:
+            if exe is not None and matcher.isMatched(exe, cmdLine if isEnhanced else None):
                 # match
-                for rFlt in pFlts:
-                    # pid matched
-                    isMatched = rFlt.search(exe) is not None
-                    isMatched = isMatched or (self._timekprConfig.getTimekprPlayTimeEnhancedActivityMonitorEnabled() and cmdLine is not None and rFlt.search(cmdLine) is not None)
-                    # try to check if matches
-                    if isMatched:
-                        # match
-                        matchedPids.append(rPid)
-                        # log
-                        log.log(cons.TK_LOG_LEVEL_DEBUG, "PT match, uid: %s, exe: %s, cmdl: %s" % (pUid, exe, "n/a" if cmdLine is None else cmdLine[:128]))
-                        # first filter is enough
-                        break
+                matchedPids.append(rPid)
+                # log
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "PT match, uid: %s, exe: %s, cmdl: %s", pUid, exe, "n/a" if cmdLine is None else cmdLine[:128])
         # result
         return matchedPids
 
     def _initUserData(self, pUid):
         """Initialize user in cached structure"""
         # result
-        self._cachedPids[self._USRS][pUid] = {self._PIDS: set(), self._MPIDS: set(), self._FLTS: {}}
+        self._cachedPids[self._USRS][pUid] = {self._PIDS: set(), self._MPIDS: set(), self._FLTS: frozenset(), self._MTCH: None}
+
+    def _addMatchedProcess(self, pUid, pPid):
+        """Mark process as matching user filters and hold it by pidfd, returns whether process was added"""
+        # already matched
+        if pPid in self._cachedPids[self._USRS][pUid][self._MPIDS]:
+            return False
+        # def
+        pidFd = None
+        # pidfds are supported (python 3.9+, kernel 5.3+), otherwise process is signalled by pid
+        if self._isPidFdSupported:
+            try:
+                # open
+                pidFd = os.pidfd_open(pPid)
+            except OSError as ex:
+                # process is gone (it will be removed by events or next process list)
+                if ex.errno == errno.ESRCH:
+                    return False
+                # pidfds can not be used (old kernel, seccomp, etc.), process will be signalled by pid
+                self._isPidFdSupported = False
+                # logging
+                log.log(cons.TK_LOG_LEVEL_INFO, "WARNING: pidfds are not available (%s), processes will be signalled by pid", ex)
+        # pidfd is opened
+        if pidFd is not None:
+            try:
+                # verify that pid was not reused between inspection and open
+                isSameProcess = os.readlink(self._EXECUTABLE % (pPid)) == self._cachedPids[self._PIDS][pPid].exe
+            except OSError:
+                # process is gone
+                isSameProcess = False
+            # this is not the process we inspected (it will be removed by events or next process list)
+            if not isSameProcess:
+                # close
+                os.close(pidFd)
+                # not added
+                return False
+            # watch for exit
+            self._pidFds[pidFd] = pPid
+            self._pidFdPoll.register(pidFd, select.POLLIN)
+        # matched
+        self._cachedPids[self._PIDS][pPid].pidFd = pidFd
+        self._cachedPids[self._USRS][pUid][self._MPIDS].add(pPid)
+        # added
+        return True
+
+    def _removeMatchedProcess(self, pUid, pPid):
+        """Remove process from processes matching user filters and release its pidfd"""
+        # matched
+        if pPid in self._cachedPids[self._USRS][pUid][self._MPIDS]:
+            # remove
+            self._cachedPids[self._USRS][pUid][self._MPIDS].remove(pPid)
+            # pidfd
+            pidFd = self._cachedPids[self._PIDS][pPid].pidFd
+            # release
+            if pidFd is not None:
+                # stop watching and close
+                self._pidFdPoll.unregister(pidFd)
+                self._pidFds.pop(pidFd)
+                os.close(pidFd)
+                self._cachedPids[self._PIDS][pPid].pidFd = None
+
+    def _removeProcess(self, pPid):
+        """Remove process from cached structure"""
+        # pid
+        uid = self._cachedPids[self._PIDS][pPid].uid
+        # uid found
+        if uid is not None:
+            # remove it from user pids
+            self._cachedPids[self._USRS][uid][self._PIDS].discard(pPid)
+            # remove it from user pids that matched filters
+            self._removeMatchedProcess(uid, pPid)
+        # remove
+        self._cachedPids[self._PIDS].pop(pPid)
+
+    def _isCgroupUsed(self):
+        """Whether processes of users with filters are listed from their cgroups"""
+        # result
+        return self._isCgroupAvailable and self._timekprConfig.getTimekprPlayTimeCgroupMonitorEnabled()
+
+    def _isProcessOwnedBy(self, pPid, pUid):
+        """Whether process is still running and belongs to the user"""
+        try:
+            # owner (the same way as processes are inspected)
+            return str(os.lstat(self._EXECUTABLE % (pPid)).st_uid) == pUid
+        except OSError:
+            # process is gone
+            return False
+
+    def _getCgroupProcesses(self):
+        """List processes of users with filters from their cgroups (all cgroups in user slice), returns None if it's not possible"""
+        # cgroups are not available or not enabled
+        if not self._isCgroupUsed():
+            return None
+        # def
+        procIds = []
+        # go through users with filters
+        for rUid in self._cachedPids[self._USRS]:
+            # no filters
+            if not self._cachedPids[self._USRS][rUid][self._FLTS]:
+                continue
+            # go through all cgroups of the user (slice does not exist if user is not logged in)
+            for rDir, _, rFiles in os.walk(self._CGROUP_USER_SLICE % (rUid)):
+                # cgroup has processes
+                if self._CGROUP_PROCS in rFiles:
+                    try:
+                        # read processes
+                        with open(os.path.join(rDir, self._CGROUP_PROCS), mode="r") as procsFd:
+                            procIds.extend([int(rPid) for rPid in procsFd.read().split()])
+                    except OSError:
+                        # cgroup was removed meanwhile
+                        pass
+        # result
+        return procIds
 
     def _cachePlayTimeProcesses(self):
         """Refresh all processes for inspection"""
@@ -98,11 +250,60 @@ class timekprPlayTimeConfig(object):
         # ## the idea is that processes have to be refreshed regularly, that is:
         #      if users exist with active filters, then it's regular
         #      if they do not exist, we still need to refresh processes, just more seldom
+        # ## when kernel process events are available, only started / changed processes are inspected and
+        #    processes are removed as soon as they exit, full list is used as consistency check only
 
         # def
-        dt = datetime.now()
+        dt = time.monotonic()
+        rpids = 0
+        isEvtLost = False
+        # remove matched processes which have exited (their pidfds are readable)
+        for rPidFd, _ in self._pidFdPoll.poll(0):
+            # remove
+            self._removeProcess(self._pidFds[rPidFd])
+            # stats
+            rpids += 1
+        # start listening to process events (the first time only)
+        if self._procEventListener is None:
+            # start
+            self._procEventListener = timekprProcEventListener()
+            self._procEventListener.startListening()
+        # process events
+        if self._procEventListener.isListening():
+            try:
+                # get all events since last time
+                changedPids, exitedPids, isEvtLost = self._procEventListener.getEvents()
+            except Exception as ex:
+                # logging
+                log.log(cons.TK_LOG_LEVEL_INFO, "ERROR: could not read process events (%s), processes will be listed from /proc", ex)
+                # stop listening, processes will be listed
+                self._procEventListener.stopListening()
+                # lost
+                changedPids, exitedPids, isEvtLost = set(), set(), True
+            # remove exited processes
+            for rPid in exitedPids:
+                # process is known
+                if rPid in self._cachedPids[self._PIDS]:
+                    # remove
+                    self._removeProcess(rPid)
+                    # stats
+                    rpids += 1
+            # started / changed processes will be inspected (pid of exited process may be reused, therefore order is important)
+            self._pendingPids.difference_update(exitedPids)
+            self._pendingPids.update(changedPids)
+            # logging
+            if isEvtLost:
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "WARNING: process events were lost, processes will be listed from /proc")
+
+        # full list of processes is needed when events are not available or they were lost, otherwise it's just a consistency check
+        checkInterval = cons.TK_PLAYTIME_PROC_CHECK_INTERVAL if self._procEventListener.isListening() else cons.TK_SAVE_INTERVAL
+        isFullScan = not self._procEventListener.isListening() or isEvtLost
         # regular refreshes need to happen even noone is logged in (process pid reuse)
-        if not ((abs((dt - self._cachedPids[self._TIM]).total_seconds()) if self._cachedPids[self._TIM] is not None else cons.TK_SAVE_INTERVAL) >= cons.TK_SAVE_INTERVAL):
+        if (dt - self._cachedPids[self._TIM] if self._cachedPids[self._TIM] is not None else checkInterval) >= checkInterval:
+            # full list
+            isFullScan = True
+        # it's not the time for full list
+        elif not isEvtLost:
             # def
             areFltsEnabled = False
             # if no users have set up their filters, we do NOT execute process list
@@ -135,10 +336,8 @@ class timekprPlayTimeConfig(object):
         # the start of interval and only those which are not in use
         # so I don't think this actually affects timekpr at all
 
-        # unique last update date + stats variables (these ar for actual counts, not just assesing the result)
-        self._cachedPids[self._TIM] = dt
+        # stats variables (these ar for actual counts, not just assesing the result)
         cpids = 0
-        rpids = 0
         apids = 0
         lpids = 0
         lcmpids = 0
@@ -148,8 +347,28 @@ class timekprPlayTimeConfig(object):
 
         # ## alternative solutions for determining owner / process ##
         useAltNr = 3
-        # list all in /proc
-        procIds = [rPid for rPid in os.listdir("/proc") if rPid.isdecimal()]
+        # def
+        isCgroupScan = False
+        # full list
+        if isFullScan:
+            # next generation and last list time
+            self._cachedPids[self._GEN] += 1
+            self._cachedPids[self._TIM] = dt
+            # list processes of users with filters from their cgroups
+            procIds = self._getCgroupProcesses()
+            isCgroupScan = procIds is not None
+            # cgroups are not available, list all in /proc
+            if procIds is None:
+                procIds = [int(rPid) for rPid in os.listdir("/proc") if rPid.isdecimal()]
+            # all processes are inspected now
+            self._pendingPids.clear()
+        # only started / changed processes
+        else:
+            # pending
+            procIds = self._pendingPids
+            self._pendingPids = set()
+        # current generation
+        generation = self._cachedPids[self._GEN]
         # loop through processes
         for procId in procIds:
             # def
@@ -160,25 +379,32 @@ class timekprPlayTimeConfig(object):
             qcChk = False
             processChanged = False
 
+            # cached process
+            proc = self._cachedPids[self._PIDS].get(procId)
+
             # matched
-            if procId in self._cachedPids[self._PIDS]:
-                # determine whether this process passed QC validation
-                if self._cachedPids[self._PIDS][procId][self._QCP] > 0 and self._cachedPids[self._PIDS][procId][self._EXE] is not None:
+            if proc is not None:
+                # process changed according to events, it has to be verified
+                if not isFullScan:
+                    # we need to check process
+                    qcChk = True
+                # determine whether this process passed QC validation (only when events are not available, otherwise changes are reported by kernel)
+                elif proc.qcPasses > 0 and proc.exe is not None and not self._procEventListener.isListening():
                     # stat
                     qcpids += 1
                     # decrease check times
-                    self._cachedPids[self._PIDS][procId][self._QCT] -= 1
+                    proc.qcTime -= 1
                     # check whether it's time to recheck the process
-                    if not self._cachedPids[self._PIDS][procId][self._QCT] > 0:
+                    if not proc.qcTime > 0:
                         # decrease pass times
-                        self._cachedPids[self._PIDS][procId][self._QCP] -= 1
+                        proc.qcPasses -= 1
                         # set up next countdown
-                        self._cachedPids[self._PIDS][procId][self._QCT] = self._QCT_V
+                        proc.qcTime = self._QCT_V
                         # we need to check process
                         qcChk = True
 
-                # cached
-                self._cachedPids[self._PIDS][procId][self._TIM] = self._cachedPids[self._TIM]
+                # seen in this generation
+                proc.generation = generation
                 # stats
                 cpids += 1
                 # if not QC
@@ -202,7 +428,7 @@ class timekprPlayTimeConfig(object):
                             # we are interested in Uid
                             if rStat.startswith("Uid:"):
                                 # check for our user
-                                userId = rStat.split("\t")[1]
+                                userId = sys.intern(rStat.split("\t")[1])
                                 # found Uids, no need to check more
                                 break
                 # using commandline (filter through params too)
@@ -210,13 +436,13 @@ class timekprPlayTimeConfig(object):
                     # obj
                     obj = self._CMDLINE % (procId)
                     # check the owner (since we are interested in processes, that usually do not change euid, this is not only enough, it's even faster than checing euid)
-                    userId = str(os.stat(obj).st_uid)
+                    userId = sys.intern(str(os.stat(obj).st_uid))
                 # using symlinks (faster)
                 else:
                     # obj
                     obj = self._EXECUTABLE % (procId)
                     # check the owner (since we are interested in processes, that usually do not change euid, this is not only enough, it's even faster than checing euid)
-                    userId = str(os.lstat(obj).st_uid)
+                    userId = sys.intern(str(os.lstat(obj).st_uid))
 
                 # check if we have it
                 if userId not in self._cachedPids[self._USRS]:
@@ -231,14 +457,14 @@ class timekprPlayTimeConfig(object):
                 try:
                     # ## alternative
                     if useAltNr == 3:
-                        # read link destination (this is the final destination)
-                        exe = os.readlink(obj)
+                        # read link destination (this is the final destination, the same executables share the string)
+                        exe = sys.intern(os.readlink(obj))
                     # ## alternative
                     else:
                         # try reading executable for process
                         with open(obj, mode="r") as cmdFd:
                             # split this
-                            exe = cmdFd.read().split("\x00")[0]
+                            exe = sys.intern(cmdFd.read().split("\x00")[0])
                     # we have to inspect full cmdline (the first TK_MAX_CMD_SRCH (def: 512) symbols to be precise)
                     if self._timekprConfig.getTimekprPlayTimeEnhancedActivityMonitorEnabled():
                         # obj
@@ -262,23 +488,23 @@ class timekprPlayTimeConfig(object):
             # if we ar not running QC check, we cache it, else we make verifications
             if not qcChk:
                 # cache it
-                self._cachedPids[self._PIDS][procId] = {self._UID: userId, self._EXE: exe, self._CMD: cmdLine, self._QCP: (self._QCP_V if exe is not None else 0), self._QCT: (self._QCT_V if exe is not None else 0), self._TERM: 0, self._TIM: self._cachedPids[self._TIM]}
+                self._cachedPids[self._PIDS][procId] = timekprPlayTimeProcess(userId, exe, cmdLine, (self._QCP_V if exe is not None else 0), (self._QCT_V if exe is not None else 0), generation)
                 # stats
                 apids += 1
             else:
                 # check if process changed uid / cmdline
-                if self._cachedPids[self._PIDS][procId][self._UID] != userId or self._cachedPids[self._PIDS][procId][self._EXE] != exe:
+                if proc.uid != userId or proc.exe != exe or proc.cmdLine != cmdLine:
                     # log
-                    log.log(cons.TK_LOG_LEVEL_DEBUG, "WARNING: uid/executable changes, uid: %s -> %s, executable: \"%s\" -> \"%s\"" % (self._cachedPids[self._PIDS][procId][self._UID], userId, self._cachedPids[self._PIDS][procId][self._EXE], exe))
+                    log.log(cons.TK_LOG_LEVEL_DEBUG, "WARNING: uid/executable changes, uid: %s -> %s, executable: \"%s\" -> \"%s\"", proc.uid, userId, proc.exe, exe)
                     # save previous user id
-                    prevUserId = self._cachedPids[self._PIDS][procId][self._UID]
+                    prevUserId = proc.uid
                     # adjust new values
-                    self._cachedPids[self._PIDS][procId][self._UID] = userId
-                    self._cachedPids[self._PIDS][procId][self._EXE] = exe
-                    self._cachedPids[self._PIDS][procId][self._CMD] = cmdLine
+                    proc.uid = userId
+                    proc.exe = exe
+                    proc.cmdLine = cmdLine
                     # if process has changed, we do not verify it anymore
-                    self._cachedPids[self._PIDS][procId][self._QCP] = 0
-                    self._cachedPids[self._PIDS][procId][self._QCT] = 0
+                    proc.qcPasses = 0
+                    proc.qcTime = 0
                     # flag that this is changed
                     processChanged = True
                     # stats
@@ -289,78 +515,67 @@ class timekprPlayTimeConfig(object):
 
             # we have user (or process changed and we have to update processes / matches)
             if (userId is not None and not qcChk) or processChanged:
-                # handle case when uid becomes None from existing
-                if userId != prevUserId and prevUserId is not None:
+                # handle case when uid / executable changes for existing
+                if prevUserId is not None:
                     # remove from user pids
-                    if procId in self._cachedPids[self._USRS][prevUserId][self._PIDS]:
-                        # remove
-                        self._cachedPids[self._USRS][prevUserId][self._PIDS].remove(procId)
-                    # remove from matched pids
-                    if procId in self._cachedPids[self._USRS][prevUserId][self._MPIDS]:
+                    if userId != prevUserId:
                         # remove
-                        self._cachedPids[self._USRS][prevUserId][self._MPIDS].remove(procId)
+                        self._cachedPids[self._USRS][prevUserId][self._PIDS].discard(procId)
+                    # remove from matched pids (it will be matched again with new executable)
+                    self._removeMatchedProcess(prevUserId, procId)
                 # only if user is specified
                 if userId is not None:
                     # manage pids for users
                     self._cachedPids[self._USRS][userId][self._PIDS].add(procId)
                     # verify whether this cmdline matches any of the filters user set up
-                    for rFlt in self._cachedPids[self._USRS][userId][self._FLTS]:
-                        # matched pids
-                        matchedPids = self._getMatchedProcessesByFilter(userId, self._cachedPids[self._USRS][userId][self._FLTS][rFlt], set([procId]))
-                        # match and add to user matched pids
-                        for rPid in matchedPids:
-                            # add to user pids
-                            self._cachedPids[self._USRS][userId][self._MPIDS].add(rPid)
+                    for rPid in self._getMatchedProcesses(userId, (procId,)):
+                        # add to user pids
+                        if self._addMatchedProcess(userId, rPid):
                             # stats
                             ampids += 1
 
-        # take care of removing the disapeared pids
-        pids = [rPid for rPid in self._cachedPids[self._PIDS] if self._cachedPids[self._TIM] != self._cachedPids[self._PIDS][rPid][self._TIM]]
-
-        # remove items
-        for rPid in pids:
-            # pid
-            uid = self._cachedPids[self._PIDS][rPid][self._UID]
-            # uid found
-            if uid is not None:
-                # remove it from user pids
-                self._cachedPids[self._USRS][uid][self._PIDS].remove(rPid)
-                # remove it from user pids that matched filters
-                if rPid in self._cachedPids[self._USRS][uid][self._MPIDS]:
-                    # remove
-                    self._cachedPids[self._USRS][uid][self._MPIDS].remove(rPid)
-            # remove
-            self._cachedPids[self._PIDS].pop(rPid)
-        # stats
-        rpids += len(pids)
+        # take care of removing the disapeared pids (only full list can tell that)
+        if isFullScan:
+            # pids not seen
+            pids = [rPid for rPid, rProc in self._cachedPids[self._PIDS].items() if rProc.generation != generation]
+            # cgroups do not contain user processes started outside user slice (found by events or earlier), keep the ones still running
+            if isCgroupScan:
+                pids = [rPid for rPid in pids if self._cachedPids[self._PIDS][rPid].uid is None or not self._isProcessOwnedBy(rPid, self._cachedPids[self._PIDS][rPid].uid)]
+            # remove items
+            for rPid in pids:
+                # remove
+                self._removeProcess(rPid)
+            # stats
+            rpids += len(pids)
 
         # extra log
         if log.getLogLevel() == cons.TK_LOG_LEVEL_EXTRA_DEBUG:
             # users
             for rUser in self._cachedPids[self._USRS]:
                 # print processes
-                log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "PT, user: %s, processes: %i, match: %i" % (rUser, len(self._cachedPids[self._USRS][rUser][self._PIDS]), len(self._cachedPids[self._USRS][rUser][self._MPIDS])))
+                log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "PT, user: %s, processes: %i, match: %i", rUser, len(self._cachedPids[self._USRS][rUser][self._PIDS]), len(self._cachedPids[self._USRS][rUser][self._MPIDS]))
 
-        log.log(cons.TK_LOG_LEVEL_DEBUG, "PT stats, users: %i, cache: %i, add: %i, rm: %i, lost: %i, nocmd: %i, qc: %i, changed: %i, admatch: %i" % (len(self._cachedPids[self._USRS]), cpids, apids, rpids, lpids, lcmpids, qcpids, ccmpids, ampids))
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "PT stats, mode: %s, users: %i, cache: %i, add: %i, rm: %i, lost: %i, nocmd: %i, qc: %i, changed: %i, admatch: %i", ("cgroup" if isCgroupScan else "list") if isFullScan else "events", len(self._cachedPids[self._USRS]), cpids, apids, rpids, lpids, lcmpids, qcpids, ccmpids, ampids)
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "finish cachePlayTimeProcesses")
 
-    def _scheduleKill(self, pPid, pKill):
+    def _killProcess(self, pPid, pKill):
+        """Terminate or kill process (via pidfd, so signal can not reach another process if pid was reused)"""
+        # signal (first we try to terminate and later we just kill)
+        sig = signal.SIGKILL if pKill else signal.SIGTERM
+        # logging
+        log.log(cons.TK_LOG_LEVEL_INFO, "sending %s signal to process %s", "kill" if pKill else "terminate", pPid)
         # kill process
         try:
-            # if trying to terminate
-            if not pKill:
-                # logging
-                log.log(cons.TK_LOG_LEVEL_INFO, "sending terminate signal to process %s" % (pPid))
-                # terminate
-                psutil.Process(pid=int(pPid)).terminate()
-            # now just kill
+            # pidfd
+            pidFd = self._cachedPids[self._PIDS][pPid].pidFd
+            # signal process
+            if pidFd is not None:
+                signal.pidfd_send_signal(pidFd, sig)
+            # pidfds are not supported
             else:
-                # logging
-                log.log(cons.TK_LOG_LEVEL_INFO, "sending kill signal to process %s" % (pPid))
-                # kill
-                psutil.Process(pid=int(pPid)).kill()
-        except:
-            # error in killing does not matter
+                os.kill(pPid, sig)
+        except OSError:
+            # error in killing does not matter (process has exited)
             pass
 
     def processPlayTimeActivities(self):
@@ -375,7 +590,7 @@ class timekprPlayTimeConfig(object):
             # extra log
             if not pSilent and log.getLogLevel() == cons.TK_LOG_LEVEL_DEBUG:
                 # logging
-                log.log(cons.TK_LOG_LEVEL_DEBUG, "PT: user \"%s\" (%s) has %i matching processes out of %i, using %i filters" % (pUname, pUid, len(self._cachedPids[self._USRS][pUid][self._MPIDS]), len(self._cachedPids[self._USRS][pUid][self._PIDS]), len(self._cachedPids[self._USRS][pUid][self._FLTS])))
+                log.log(cons.TK_LOG_LEVEL_DEBUG, "PT: user \"%s\" (%s) has %i matching processes out of %i, using %i filters", pUname, pUid, len(self._cachedPids[self._USRS][pUid][self._MPIDS]), len(self._cachedPids[self._USRS][pUid][self._PIDS]), len(self._cachedPids[self._USRS][pUid][self._FLTS]))
             # result
             return True if self._cachedPids[self._USRS][pUid][self._MPIDS] else False
         else:
@@ -389,69 +604,64 @@ class timekprPlayTimeConfig(object):
             # initialize set
             self._initUserData(str(pUid))
 
-        # the logic here is that we need to remove obsolete first and add the rest later
-        # this is due to user may enter filters in a way that process matches more than one filter
-        # therefore not to loose processes, this order is important
-        newFlts = set([rFlt[0] for rFlt in pFlts])
-        existFlts = set([rFlt for rFlt in self._cachedPids[self._USRS][pUid][self._FLTS]])
-        # remove obsolete filters
-        for rFlt in existFlts:
-            # if this is obsolete
-            if rFlt not in newFlts:
-                # now remove processes associated with filter
-                for rPid in self._getMatchedProcessesByFilter(pUid, self._cachedPids[self._USRS][pUid][self._FLTS][rFlt], self._cachedPids[self._USRS][pUid][self._MPIDS]):
-                    # remove pids
-                    self._cachedPids[self._USRS][pUid][self._MPIDS].remove(rPid)
-                # remove filter
-                self._cachedPids[self._USRS][pUid][self._FLTS].pop(rFlt)
-        # process filters
-        for rFlt in newFlts:
-            # if filter does not exist, we need to add it
-            if rFlt not in existFlts:
-                # filter does not exist, we need to add it
-                self._cachedPids[self._USRS][pUid][self._FLTS][rFlt] = []
-                # firstly check if regexp is valid, in case someone will not enter it correclty (probably by mistake)
-                try:
-                    # if this succeeds then match is valid
-                    re.compile("^%s$" % (rFlt))
-                    # filter as is
-                    flt = rFlt
-                except re.error:
-                    # it failed, so we do escape and that's our pattern
-                    flt = re.escape(rFlt)
-                # remove brackets "[]" because we use them as description
-                flt = flt.replace("[", "").replace("]", "")
-                # add precompiled filters
-                self._cachedPids[self._USRS][pUid][self._FLTS][rFlt].append(re.compile("^%s$" % (flt)))
-                self._cachedPids[self._USRS][pUid][self._FLTS][rFlt].append(re.compile("[/\\\\]%s$" % (flt)))
-                self._cachedPids[self._USRS][pUid][self._FLTS][rFlt].append(re.compile("[/\\\\]%s " % (flt)))
-                # add matched pids to to matched pid list
-                self._cachedPids[self._USRS][pUid][self._MPIDS].update(self._getMatchedProcessesByFilter(pUid, self._cachedPids[self._USRS][pUid][self._FLTS][rFlt], self._cachedPids[self._USRS][pUid][self._PIDS]))
+        # filters
+        newFlts = frozenset([rFlt[0] for rFlt in pFlts])
+        # nothing has changed
+        if newFlts == self._cachedPids[self._USRS][pUid][self._FLTS]:
+            return
+        # set filters
+        self._cachedPids[self._USRS][pUid][self._FLTS] = newFlts
+        # users with the same filters share the compiled matcher
+        if newFlts and newFlts not in self._matchers:
+            # compile
+            self._matchers[newFlts] = timekprPlayTimeFilterMatcher(newFlts)
+        # set matcher
+        self._cachedPids[self._USRS][pUid][self._MTCH] = self._matchers.get(newFlts)
+        # when processes are listed from cgroups of users with filters, processes of this user may not be known yet, list them now
+        if self._isCgroupUsed():
+            # next time is the time for full list
+            self._cachedPids[self._TIM] = None
+        # remove matchers nobody uses
+        usedFlts = set([self._cachedPids[self._USRS][rUser][self._FLTS] for rUser in self._cachedPids[self._USRS]])
+        for rFlts in [rFlts for rFlts in self._matchers if rFlts not in usedFlts]:
+            # remove
+            self._matchers.pop(rFlts)
+
+        # match all user processes against new filters (a process may match more than one filter, so it's matched as a whole)
+        matchedPids = set(self._getMatchedProcesses(pUid, self._cachedPids[self._USRS][pUid][self._PIDS]))
+        # remove processes that do not match anymore
+        for rPid in self._cachedPids[self._USRS][pUid][self._MPIDS] - matchedPids:
+            # remove pids
+            self._removeMatchedProcess(pUid, rPid)
+        # add processes that match now
+        for rPid in matchedPids - self._cachedPids[self._USRS][pUid][self._MPIDS]:
+            # add pids
+            self._addMatchedProcess(pUid, rPid)
 
     def killPlayTimeProcesses(self, pUid):
         """Kill all PT processes"""
         # if we have user
         if pUid in self._cachedPids[self._USRS]:
             # logging
-            log.log(cons.TK_LOG_LEVEL_INFO, "killing %i PT processes for uid \"%s\" " % (len(self._cachedPids[self._USRS][pUid][self._MPIDS]), pUid))
+            log.log(cons.TK_LOG_LEVEL_INFO, "killing %i PT processes for uid \"%s\" ", len(self._cachedPids[self._USRS][pUid][self._MPIDS]), pUid)
             # terminate / kill all user PT processes
             for rPid in self._cachedPids[self._USRS][pUid][self._MPIDS]:
                 # increase terminate attempts
-                self._cachedPids[self._PIDS][rPid][self._TERM] += 1
-                # schedule a terminate / kill (first we try to terminate and later we just kill)
-                GLib.timeout_add_seconds(0.1, self._scheduleKill, rPid, True if self._cachedPids[self._PIDS][rPid][self._TERM] > cons.TK_POLLTIME else False)
+                self._cachedPids[self._PIDS][rPid].termCnt += 1
+                # terminate / kill (first we try to terminate and later we just kill)
+                self._killProcess(rPid, self._cachedPids[self._PIDS][rPid].termCnt > cons.TK_POLLTIME)
 
     # --------------- helper methods --------------- #
 
     def getCachedProcesses(self):
         """Get all cached processes"""
-        proc = [[rPid, self._cachedPids[self._PIDS][rPid][self._EXE], self._cachedPids[self._PIDS][rPid][self._CMD]] for rPid in self._cachedPids[self._PIDS]]
+        proc = [[rPid, self._cachedPids[self._PIDS][rPid].exe, self._cachedPids[self._PIDS][rPid].cmdLine] for rPid in self._cachedPids[self._PIDS]]
         return proc
 
     def getCachedUserProcesses(self, pUserId):
         """Get processes, that are cached for user"""
         if pUserId in self._cachedPids[self._USRS]:
-            proc = [[rPid, self._cachedPids[self._PIDS][rPid][self._EXE], self._cachedPids[self._PIDS][rPid][self._CMD]] for rPid in self._cachedPids[self._USRS][pUserId][self._PIDS]]
+            proc = [[rPid, self._cachedPids[self._PIDS][rPid].exe, self._cachedPids[self._PIDS][rPid].cmdLine] for rPid in self._cachedPids[self._USRS][pUserId][self._PIDS]]
         else:
             proc = []
         return proc
@@ -459,7 +669,7 @@ class timekprPlayTimeConfig(object):
     def getMatchedUserProcesses(self, pUserId):
         """Get processes, that are cached for user and matches at least one filter"""
         if pUserId in self._cachedPids[self._USRS]:
-            proc = [[rPid, self._cachedPids[self._PIDS][rPid][self._EXE], self._cachedPids[self._PIDS][rPid][self._CMD]] for rPid in self._cachedPids[self._USRS][pUserId][self._MPIDS]]
+            proc = [[rPid, self._cachedPids[self._PIDS][rPid].exe, self._cachedPids[self._PIDS][rPid].cmdLine] for rPid in self._cachedPids[self._USRS][pUserId][self._MPIDS]]
         else:
             proc = []
         return proc
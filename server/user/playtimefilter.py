@@ -0,0 +1,107 @@
+"""
+Created on Oct 17, 2026
+"""
+
+# imports
+import re
+
+
+class timekprPlayTimeFilterMatcher(object):
+    """Matches executable / command line against all PlayTime filters of the user at once"""
+    """Filter matches when it matches whole string, the end of it after path separator or part of it after path separator followed by space,
+        filters without RegExp symbols are looked up by name, simple ones are combined in one RegExp,
+        filters with groups, backreferences, inline flags, alternation or trailing escape keep their own RegExps (combining them changes their meaning)"""
+
+    # fixed layout, no per instance dict
+    __slots__ = ("_plainNames", "_patterns", "_filterPatterns")
+
+    def __init__(self, pFlts):
+        """Compile filters"""
+        # filters which are just names
+        self._plainNames = set()
+        # simple RegExps (combined) and RegExps of the rest (separately)
+        patterns = []
+        self._filterPatterns = []
+        # go through filters
+        for rFlt in sorted(pFlts):
+            # firstly check if regexp is valid, in case someone will not enter it correclty (probably by mistake)
+            try:
+                # if this succeeds then match is valid
+                re.compile("^%s$" % (rFlt))
+                # filter as is
+                flt = rFlt
+            except re.error:
+                # it failed, so we do escape and that's our pattern
+                flt = re.escape(rFlt)
+            # remove brackets "[]" because we use them as description
+            flt = flt.replace("[", "").replace("]", "")
+            # name without any RegExp symbols and path separators can be looked up
+            if re.escape(flt) == flt and "/" not in flt:
+                self._plainNames.add(flt)
+            # groups, backreferences, inline flags, alternation and trailing escape work only in RegExps of their own
+            elif "(" in flt or "|" in flt or flt.endswith("\\"):
+                self._addFilterPatterns(flt)
+            else:
+                patterns.append(flt)
+        # one RegExp for all simple patterns (whole string or after path separator till the end or space)
+        self._patterns = None
+        # there are simple patterns
+        if patterns:
+            try:
+                # combine
+                self._patterns = re.compile("^(?:%s)$|[/\\\\](?:%s)(?:$| )" % ("|".join(patterns), "|".join(patterns)))
+            except re.error:
+                # they can not be combined, every filter gets RegExps of its own
+                for rFlt in patterns:
+                    self._addFilterPatterns(rFlt)
+
+    def _addFilterPatterns(self, pFlt):
+        """Compile RegExps of one filter (whole string, after path separator till the end or followed by space)"""
+        # formats
+        fmts = ("^%s$", "[/\\\\]%s$", "[/\\\\]%s ")
+        try:
+            # compile
+            fltPatterns = [re.compile(rFmt % (pFlt)) for rFmt in fmts]
+        except re.error:
+            # filter is not valid after brackets were removed, it's matched literally
+            fltPatterns = [re.compile(rFmt % (re.escape(pFlt))) for rFmt in fmts]
+        # add
+        self._filterPatterns.extend(fltPatterns)
+
+    def _isPlainNameMatched(self, pText):
+        """Check whether any of the plain names match"""
+        # whole string or the end of it after path separator
+        if pText[max(pText.rfind("/"), pText.rfind("\\")) + 1:] in self._plainNames:
+            return True
+        # part after path separator followed by space (names do not contain spaces, so every part but last is checked)
+        if " " in pText:
+            # go through parts
+            for rPart in pText.split(" ")[:-1]:
+                # separator
+                idx = max(rPart.rfind("/"), rPart.rfind("\\"))
+                # name after separator
+                if idx >= 0 and rPart[idx + 1:] in self._plainNames:
+                    return True
+        # not matched
+        return False
+
+    def isMatched(self, pExe, pCmdLine):
+        """Check whether executable or command line (None if it's not inspected) matches any of the filters"""
+        # check executable and command line
+        for rText in (pExe, pCmdLine):
+            # nothing to check
+            if rText is None:
+                continue
+            # names
+            if self._plainNames and self._isPlainNameMatched(rText):
+                return True
+            # patterns
+            if self._patterns is not None and self._patterns.search(rText) is not None:
+                return True
+            # filters with RegExps of their own
+            for rPattern in self._filterPatterns:
+                # match
+                if rPattern.search(rText) is not None:
+                    return True
+        # not matched
+        return False
@@ -0,0 +1,157 @@
+"""
+Created on Oct 17, 2026
+"""
+
+# imports
+import os
+import errno
+import socket
+import struct
+
+# timekpr imports
+from timekpr.common.log import log
+from timekpr.common.constants import constants as cons
+
+
+class timekprProcEventListener(object):
+    """Receives process fork / exec / uid change / exit events from kernel (netlink proc connector)"""
+
+    # netlink connector protocol and proc connector ids
+    _NETLINK_CONNECTOR = 11
+    _CN_IDX_PROC = 1
+    _CN_VAL_PROC = 1
+    # netlink message types
+    _NLMSG_DONE = 3
+    # proc connector operations
+    _PROC_CN_MCAST_LISTEN = 1
+    _PROC_CN_MCAST_IGNORE = 2
+    # proc connector events
+    _PROC_EVENT_FORK = 0x00000001
+    _PROC_EVENT_EXEC = 0x00000002
+    _PROC_EVENT_UID = 0x00000004
+    _PROC_EVENT_EXIT = 0x80000000
+    # netlink header (len, type, flags, seq, pid)
+    _NLMSGHDR = struct.Struct("=IHHII")
+    # connector header (idx, val, seq, ack, len, flags)
+    _CNMSG = struct.Struct("=IIIIHH")
+    # proc event header (what, cpu, timestamp) and event data (first 4 fields are enough for all events we use)
+    _PROCEVT = struct.Struct("=IIQ")
+    _PROCEVTDATA = struct.Struct("=IIII")
+    # max size of one read
+    _RECV_SIZE = 65536
+
+    def __init__(self):
+        """Initialize listener"""
+        # netlink socket
+        self._socket = None
+
+    def _sendOperation(self, pOperation):
+        """Send operation (listen / ignore) to proc connector"""
+        # operation
+        op = struct.pack("=I", pOperation)
+        # connector message
+        cnMsg = self._CNMSG.pack(self._CN_IDX_PROC, self._CN_VAL_PROC, 0, 0, len(op), 0) + op
+        # send netlink message
+        self._socket.send(self._NLMSGHDR.pack(self._NLMSGHDR.size + len(cnMsg), self._NLMSG_DONE, 0, 0, os.getpid()) + cnMsg)
+
+    def startListening(self):
+        """Subscribe to process events, returns whether events are available (root and initial network namespace are needed)"""
+        try:
+            # netlink socket for connector
+            self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, self._NETLINK_CONNECTOR)
+            # large receive buffer, so events are not lost between reads (force works for root only, above the system maximum)
+            try:
+                self._socket.setsockopt(socket.SOL_SOCKET, getattr(socket, "SO_RCVBUFFORCE", 33), cons.TK_PLAYTIME_PROC_EVT_BUFFER)
+            except OSError:
+                self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, cons.TK_PLAYTIME_PROC_EVT_BUFFER)
+            # bind to proc connector group
+            self._socket.bind((os.getpid(), self._CN_IDX_PROC))
+            # subscribe
+            self._sendOperation(self._PROC_CN_MCAST_LISTEN)
+            # events are read without waiting
+            self._socket.setblocking(False)
+        except Exception as ex:
+            # logging
+            log.log(cons.TK_LOG_LEVEL_INFO, "WARNING: process events are not available (%s), processes will be listed from /proc", ex)
+            # stop
+            self.stopListening()
+            # fail
+            return False
+
+        # logging
+        log.log(cons.TK_LOG_LEVEL_DEBUG, "listening to process events")
+        # success
+        return True
+
+    def stopListening(self):
+        """Unsubscribe from process events"""
+        # there is a socket
+        if self._socket is not None:
+            try:
+                # unsubscribe
+                self._sendOperation(self._PROC_CN_MCAST_IGNORE)
+            except Exception:
+                pass
+            # close
+            self._socket.close()
+            self._socket = None
+
+    def isListening(self):
+        """Whether process events are received"""
+        # result
+        return self._socket is not None
+
+    def getEvents(self):
+        """Read all pending events, returns pids which were started or changed, pids which exited and whether events were lost"""
+        """Pid may be in both sets in case it exited and was reused, exited pids have to be processed first"""
+        # def
+        changedPids = set()
+        exitedPids = set()
+        isLost = False
+        # read all pending messages
+        while True:
+            try:
+                # read
+                data = self._socket.recv(self._RECV_SIZE)
+            except BlockingIOError:
+                # nothing more to read
+                break
+            except OSError as ex:
+                # kernel could not deliver some events (buffer was full)
+                if ex.errno == errno.ENOBUFS:
+                    # lost
+                    isLost = True
+                    # read further
+                    continue
+                # other errors are not expected
+                raise
+            # offset in data
+            offset = 0
+            # go through netlink messages
+            while offset + self._NLMSGHDR.size <= len(data):
+                # header
+                msgLen, msgType, _, _, _ = self._NLMSGHDR.unpack_from(data, offset)
+                # done with this read
+                if msgLen < self._NLMSGHDR.size:
+                    break
+                # event message
+                if msgType == self._NLMSG_DONE and msgLen >= self._NLMSGHDR.size + self._CNMSG.size + self._PROCEVT.size + self._PROCEVTDATA.size:
+                    # event
+                    what, _, _ = self._PROCEVT.unpack_from(data, offset + self._NLMSGHDR.size + self._CNMSG.size)
+                    # event data (pid / tgid of the event, for fork it's the parent, child comes next)
+                    pid, tgid, childPid, childTgid = self._PROCEVTDATA.unpack_from(data, offset + self._NLMSGHDR.size + self._CNMSG.size + self._PROCEVT.size)
+                    # new process (new threads are not interesting)
+                    if what == self._PROC_EVENT_FORK and childPid == childTgid:
+                        changedPids.add(childTgid)
+                    # process changed its executable or user
+                    elif what in (self._PROC_EVENT_EXEC, self._PROC_EVENT_UID) and pid == tgid:
+                        changedPids.add(tgid)
+                    # process exited (exit of threads is not interesting)
+                    elif what == self._PROC_EVENT_EXIT and pid == tgid:
+                        exitedPids.add(tgid)
+                        changedPids.discard(tgid)
+                # next message (aligned to 4 bytes)
+                offset += (msgLen + 3) & ~3
+
+        # result
+        return changedPids, exitedPids, isLost
@@ -0,0 +1,113 @@
+"""
+Created on Oct 17, 2026
+"""
+
+# imports
+import math
+import time
+
+# timekpr imports
+from timekpr.common.log import log
+from timekpr.common.constants import constants as cons
+
+
+class timekprSaveScheduler(object):
+    """Spreads saves of time spent for all users evenly across the save interval and keeps save statistics"""
+
+    def __init__(self):
+        """Initialize save scheduler"""
+        # phase of the save (fraction of the save interval) for users
+        self._userSavePhases = {}
+        # last save time (monotonic) for users
+        self._userLastSaves = {}
+        # statistics
+        self._statisticsStart = time.monotonic()
+        self._writesDone = self._writesSaved = self._bytesWritten = 0
+
+    def _findSavePhase(self):
+        """Find the phase which is the furthest from phases already taken (middle of the largest gap)"""
+        # taken phases
+        phases = sorted(self._userSavePhases.values())
+        # first user saves at the start of the interval
+        if len(phases) < 1:
+            return 0.0
+        # defaults
+        phase = gap = None
+        # go through phases
+        for rIdx in range(0, len(phases)):
+            # next phase (wraps around to the next interval)
+            nextPhase = phases[rIdx + 1] if rIdx + 1 < len(phases) else phases[0] + 1
+            # larger gap found
+            if gap is None or nextPhase - phases[rIdx] > gap:
+                # save gap and phase in the middle of it
+                gap = nextPhase - phases[rIdx]
+                phase = (phases[rIdx] + gap / 2) % 1
+        # result
+        return phase
+
+    def registerUser(self, pUserName):
+        """Register user for saves"""
+        # only if not registered
+        if pUserName not in self._userSavePhases:
+            # assign phase
+            self._userSavePhases[pUserName] = self._findSavePhase()
+            # user is considered saved now
+            self._userLastSaves[pUserName] = time.monotonic()
+            # logging
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "save phase for \"%s\": %.3f" % (pUserName, self._userSavePhases[pUserName]))
+
+    def unregisterUser(self, pUserName):
+        """Unregister user from saves"""
+        # remove
+        self._userSavePhases.pop(pUserName, None)
+        self._userLastSaves.pop(pUserName, None)
+
+    def unregisterAllUsers(self):
+        """Unregister all users from saves"""
+        # remove
+        self._userSavePhases.clear()
+        self._userLastSaves.clear()
+
+    def getDueUsers(self, pSaveTime):
+        """Get users whose save phase has been crossed since their last save (they are considered saved afterwards)"""
+        # def
+        dueUsers = []
+        # now
+        dtm = time.monotonic()
+        # go through users
+        for rUserName, rPhase in self._userSavePhases.items():
+            # save is due when phase of the user was crossed since last save
+            if math.floor(dtm / pSaveTime - rPhase) > math.floor(self._userLastSaves[rUserName] / pSaveTime - rPhase):
+                # due
+                dueUsers.append(rUserName)
+                # saved
+                self._userLastSaves[rUserName] = dtm
+        # result
+        return dueUsers
+
+    def accountSave(self, pBytesWritten):
+        """Account save in statistics (0 bytes means that write was not needed)"""
+        # write was needed
+        if pBytesWritten > 0:
+            # account
+            self._writesDone += 1
+            self._bytesWritten += pBytesWritten
+        else:
+            # account
+            self._writesSaved += 1
+
+    def getStatistics(self):
+        """Get save statistics (writes done, writes saved, bytes written) once a minute, None otherwise"""
+        # def
+        result = None
+        # now
+        dtm = time.monotonic()
+        # a minute has passed
+        if dtm - self._statisticsStart >= cons.TK_LIMIT_PER_MINUTE:
+            # result
+            result = (self._writesDone, self._writesSaved, self._bytesWritten)
+            # reset
+            self._statisticsStart = dtm
+            self._writesDone = self._writesSaved = self._bytesWritten = 0
+        # result
+        return result
@@ -14,26 +14,36 @@ import math
 from timekpr.common.log import log
 from timekpr.common.constants import constants as cons
 from timekpr.server.interface.dbus.logind.user import timekprUserManager
+from timekpr.server.user.intervals import timekprIntervalIndex
+from timekpr.server.user.userstate import timekprUserHours
 from timekpr.common.utils.notifications import timekprNotificationManager
 from timekpr.common.utils.config import timekprUserConfig
 from timekpr.common.utils.config import timekprUserControl
+from timekpr.common.utils.config import timekprUserControlJournal
 
 
 class timekprUser(object):
     """Contains all the data for timekpr user"""
 
-    def __init__(self, pBusName, pUserId, pUserName, pUserPath, pTimekprConfig, pPlayTimeConfig):
+    def __init__(self, pBusName, pUserId, pUserName, pUserPath, pTimekprConfig, pPlayTimeConfig, pLoginManager):
         """Initialize all stuff for user"""
 
         log.log(cons.TK_LOG_LEVEL_INFO, "start init timekprUser")
 
         # init limit structure
         self._timekprUserData = self._initUserLimits()
+        # init hour structure
+        self._timekprUserHours = timekprUserHours()
 
         # set user data
         self._timekprUserData[cons.TK_CTRL_UID] = pUserId
         self._timekprUserData[cons.TK_CTRL_UNAME] = pUserName
         self._timekprUserData[cons.TK_CTRL_UPATH] = pUserPath
+
+        # init allowed interval index
+        self._timekprUserIntervals = {}
+        self._timekprUserIntervalsConfig = None
+        self._rebuildIntervalIndex()
         # global server config
         self._timekprConfig = pTimekprConfig
         # PlayTime option
@@ -43,14 +53,23 @@ class timekprUser(object):
         self._timekprUserData[cons.TK_CTRL_SCR_N] = False  # is screensaver running
         self._timekprUserData[cons.TK_CTRL_SCR_K] = None  # verification key
 
+        # whether user has to be evaluated as soon as possible (used by evaluation scheduler)
+        self._evaluationRequested = True
+        # time spent values as they were saved last time (used to determine whether save is needed)
+        self._timeSpentSaved = None
+
         # save the bus
-        self._timekprUserManager = timekprUserManager(self._timekprUserData[cons.TK_CTRL_UNAME], self._timekprUserData[cons.TK_CTRL_UPATH])
+        self._timekprUserManager = timekprUserManager(self._timekprUserData[cons.TK_CTRL_UNAME], self._timekprUserData[cons.TK_CTRL_UPATH], pLoginManager)
         # user config
         self._timekprUserConfig = timekprUserConfig(self._timekprConfig.getTimekprConfigDir(), self._timekprUserData[cons.TK_CTRL_UNAME])
         # user control
         self._timekprUserControl = timekprUserControl(self._timekprConfig.getTimekprWorkDir(), self._timekprUserData[cons.TK_CTRL_UNAME])
+        # user time spent journal (time spent between saves)
+        self._timekprUserControlJournal = timekprUserControlJournal(self._timekprConfig.getTimekprWorkDir(), self._timekprUserData[cons.TK_CTRL_UNAME])
         # user notification
         self._timekprUserNotification = timekprNotificationManager(pBusName, self._timekprUserData[cons.TK_CTRL_UNAME], pTimekprConfig)
+        # version of configuration (time limits for clients are prepared only when it changes)
+        self._timeLimitsVersion = 0
 
         log.log(cons.TK_LOG_LEVEL_INFO, "finish init timekprUser")
 
@@ -64,6 +83,8 @@ class timekprUser(object):
         self._currentHOD = self._effectiveDatetime.hour
         # get HOD
         self._currentMOH = self._effectiveDatetime.minute
+        # get index of current hour in hour structure
+        self._currentHourIdx = timekprUserHours.getIndex(self._currentDOW, self._currentHOD)
         # get seconds left in day
         self._secondsLeftDay = int(((datetime(self._effectiveDatetime.year, self._effectiveDatetime.month, self._effectiveDatetime.day) + timedelta(days=1)) - self._effectiveDatetime).total_seconds())
         # get seconds left in hour
@@ -81,7 +102,7 @@ class timekprUser(object):
         #    in hour section (0 is the sample in config), we have whether one is allowed to work in particular hour and then we have time spent (which can be paused as well)
         #    the rest must be easy
         # define structure for limits
-        # day: next day | limit | left per day + hours 0 - 23 (0 hour sample included)
+        # day: next day | limit | left per day (hours 0 - 23 are kept in separate compact hour structure)
         limits = {
             # per day values
             # -- see the loop below initial assignment --
@@ -117,11 +138,7 @@ class timekprUser(object):
         # loop through days
         for i in range(1, 7+1):
             # fill up day
-            limits[str(i)] = {cons.TK_CTRL_NDAY: str(i + 1 if i < 7 else 1), cons.TK_CTRL_PDAY: str(i - 1 if i > 1 else 7), cons.TK_CTRL_LIMITD: None, cons.TK_CTRL_SPENTBD: None, cons.TK_CTRL_LEFTD: None, "0": {cons.TK_CTRL_ACT: True, cons.TK_CTRL_SPENTH: 0, cons.TK_CTRL_SLEEP: 0, cons.TK_CTRL_SMIN: 0, cons.TK_CTRL_EMIN: 60}}
-            # loop through hours
-            for j in range(0, 23+1):
-                # initial limit is whole hour
-                limits[str(i)][str(j)] = {cons.TK_CTRL_ACT: False, cons.TK_CTRL_SPENTH: 0, cons.TK_CTRL_SLEEP: 0, cons.TK_CTRL_SMIN: 0, cons.TK_CTRL_EMIN: 60, cons.TK_CTRL_UACC: False}
+            limits[str(i)] = {cons.TK_CTRL_NDAY: str(i + 1 if i < 7 else 1), cons.TK_CTRL_PDAY: str(i - 1 if i > 1 else 7), cons.TK_CTRL_LIMITD: None, cons.TK_CTRL_SPENTBD: None, cons.TK_CTRL_LEFTD: None}
 
         # ## this section adds additional features ##
         # PlayTime
@@ -139,12 +156,27 @@ class timekprUser(object):
         # return limits
         return limits
 
+    def _rebuildIntervalIndex(self):
+        """Compile allowed hours and minutes into interval index for every day (only when they have changed)"""
+        # allowed intervals (seconds from the start of the day) for every day
+        intervalsConfig = {rDay: self._timekprUserHours.getDayIntervals(rDay) for rDay in cons.TK_ALLOWED_WEEKDAYS.split(";")}
+
+        # rebuild only if intervals have changed
+        if intervalsConfig != self._timekprUserIntervalsConfig:
+            # logging
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "rebuilding allowed interval index for \"%s\"" % (self.getUserName()))
+            # save config and build the index
+            self._timekprUserIntervalsConfig = intervalsConfig
+            self._timekprUserIntervals = {rDay: timekprIntervalIndex(rIntervals) for rDay, rIntervals in intervalsConfig.items()}
+
     def deInitUser(self):
         """De-initialize timekpr user"""
         # logging
         log.log(cons.TK_LOG_LEVEL_INFO, "de-initialization of \"%s\" DBUS connections" % (self.getUserName()))
         # deinit
         self._timekprUserNotification.deInitUser()
+        # close journal
+        self._timekprUserControlJournal.closeJournal()
 
     def recalculateTimeLeft(self):
         """Recalculate time left based on spent and configuration"""
@@ -159,84 +191,32 @@ class timekprUser(object):
         # calculate PlayTime time left for week
         self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_LEFTW] = self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_LIMITW] - self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_SPENTW]
 
-        # continous time
-        contTime = True
-        # calculate "lefts"
-        timesLeft = {cons.TK_CTRL_LEFTD: 0, cons.TK_CTRL_LEFTW: self._timekprUserData[cons.TK_CTRL_LEFTW], cons.TK_CTRL_LEFTM: self._timekprUserData[cons.TK_CTRL_LEFTM]}
-
-        # go through days
-        for i in (self._currentDOW, self._timekprUserData[self._currentDOW][cons.TK_CTRL_NDAY]):
-            # reset "lefts"
-            self._timekprUserData[i][cons.TK_CTRL_LEFTD] = 0
-
-            # how many seconds left for that day (not counting hours limits yet)
-            timesLeft[cons.TK_CTRL_LEFTD] = self._timekprUserData[i][cons.TK_CTRL_LIMITD] - self._timekprUserData[i][cons.TK_CTRL_SPENTBD]
-
-            # left is least of the limits
-            secondsLeft = max(min(timesLeft[cons.TK_CTRL_LEFTD], timesLeft[cons.TK_CTRL_LEFTW], timesLeft[cons.TK_CTRL_LEFTM]), 0)
-
-            # this is it (no time or there will be no continous time for this day)
-            if secondsLeft <= 0 or not contTime:
-                break
-
-            # determine current HOD
-            currentHOD = self._currentHOD if self._currentDOW == i else 0
-
-            # go through hours for this day
-            for j in range(currentHOD, 23+1):
-                # reset seconds to add
-                secondsToAddHour = secondsLeftHour = 0
-                # calculate only if hour is enabled
-                if self._timekprUserData[i][str(j)][cons.TK_CTRL_ACT]:
-                    # certain values need to be calculated as per this hour
-                    if self._currentDOW == i and self._currentHOD == j:
-                        # this is how many seconds are actually left in hour (as per generic time calculations)
-                        secondsLeftHour = self._secondsLeftHour
-                        # calculate how many seconds are left in this hour as per configuration
-                        secondsLeftHourLimit = (self._timekprUserData[i][str(j)][cons.TK_CTRL_EMIN] * 60 - self._currentMOH * 60 - self._effectiveDatetime.second) if (self._timekprUserData[i][str(j)][cons.TK_CTRL_SMIN] * 60 <= self._currentMOH * 60 + self._effectiveDatetime.second) else 0
-                    else:
-                        # full hour available
-                        secondsLeftHour = 3600
-                        # calculate how many seconds are left in this hour as per configuration
-                        secondsLeftHourLimit = (self._timekprUserData[i][str(j)][cons.TK_CTRL_EMIN] - self._timekprUserData[i][str(j)][cons.TK_CTRL_SMIN]) * 60
-                        # continous time check for start of the hour (needed to see whether any of next hours are continous before adding to available time)
-                        contTime = (contTime and self._timekprUserData[i][str(j)][cons.TK_CTRL_SMIN] == 0)
-                    # save seconds to subtract for this hour
-                    secondsToAddHour = max(min(secondsLeftHour, secondsLeftHourLimit, secondsLeft), 0)
-
-                    # debug
-                    if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
-                        log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "currentDOW: %s, currentHOD: %i, secondsLeftHour: %i, currentMOH: %i, currentSOM: %i, secondsLeftHourLimit: %i, secondsToAddHour: %i, secondsLeft: %i" % (i, j, secondsLeftHour, self._currentMOH, self._effectiveDatetime.second, secondsLeftHourLimit, secondsToAddHour, secondsLeft))
-                # hour is disabled
-                else:
-                    # time is over already from the start (it won't be added to current session, but we'll count the rest of hours allowed)
-                    contTime = False
-
-                # debug
-                if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
-                    log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "day: %s, hour: %i, enabled: %s, addToHour: %i, contTime: %i, leftD: %i, leftWk: %i, leftMon: %i" % (i, j, self._timekprUserData[i][str(j)][cons.TK_CTRL_ACT], secondsToAddHour, contTime, timesLeft[cons.TK_CTRL_LEFTD], self._timekprUserData[cons.TK_CTRL_LEFTW], self._timekprUserData[cons.TK_CTRL_LEFTM]))
-
-                # adjust left continously
-                self._timekprUserData[cons.TK_CTRL_LEFT] += secondsToAddHour if contTime else 0
-                # adjust left this hour
-                self._timekprUserData[i][cons.TK_CTRL_LEFTD] += secondsToAddHour
-
-                # recalculate "lefts"
-                timesLeft[cons.TK_CTRL_LEFTD] -= secondsToAddHour
-                timesLeft[cons.TK_CTRL_LEFTW] -= secondsToAddHour
-                timesLeft[cons.TK_CTRL_LEFTM] -= secondsToAddHour
-                secondsLeft -= secondsToAddHour
-
-                # recalculate whether time is continous after accounting the time (handles the end of hour)
-                #   time previously was previously continous (no break)
-                #   seconds to add must be at least equal to the seconds left in this hour (all hour is available)
-                #   total seconds left this day cannot be 0 unless it's the end of the day (when seconds for the day ends, the only plausible case is the end of the day)
-                contTime = True if (contTime and not secondsToAddHour < secondsLeftHour and not (secondsLeft <= 0 and j != 23)) else False
-
-                # this is it (time over)
-                if secondsLeft <= 0 or (not contTime and self._currentDOW != i):
-                    # time is over
-                    break
+        # reset "lefts" for today
+        self._timekprUserData[self._currentDOW][cons.TK_CTRL_LEFTD] = 0
+        # left is least of the limits (not counting hours limits yet)
+        secondsLeft = max(min(self._timekprUserData[self._currentDOW][cons.TK_CTRL_LIMITD] - self._timekprUserData[self._currentDOW][cons.TK_CTRL_SPENTBD], self._timekprUserData[cons.TK_CTRL_LEFTW], self._timekprUserData[cons.TK_CTRL_LEFTM]), 0)
+
+        # calculate only if there is time left
+        if secondsLeft > 0:
+            # next day
+            nextDOW = self._timekprUserData[self._currentDOW][cons.TK_CTRL_NDAY]
+            # reset "lefts" for next day
+            self._timekprUserData[nextDOW][cons.TK_CTRL_LEFTD] = 0
+            # continous time and time left today as per allowed intervals
+            secondsLeftContinous, secondsLeftIntervals, isContinousTillEndOfDay = self._timekprUserIntervals[self._currentDOW].getTimeLeftFrom(self._currentHOD * cons.TK_LIMIT_PER_HOUR + self._secondsInHour)
+            # adjust "lefts"
+            self._timekprUserData[cons.TK_CTRL_LEFT] = min(secondsLeftContinous, secondsLeft)
+            self._timekprUserData[self._currentDOW][cons.TK_CTRL_LEFTD] = min(secondsLeftIntervals, secondsLeft)
+
+            # time continues to next day only if it's continous till the end of the day and limits allow that
+            if isContinousTillEndOfDay and secondsLeftContinous <= secondsLeft:
+                # left is least of the limits for next day (week and month limits are reduced by time left today)
+                secondsLeft = max(min(self._timekprUserData[nextDOW][cons.TK_CTRL_LIMITD] - self._timekprUserData[nextDOW][cons.TK_CTRL_SPENTBD], self._timekprUserData[cons.TK_CTRL_LEFTW] - self._timekprUserData[self._currentDOW][cons.TK_CTRL_LEFTD], self._timekprUserData[cons.TK_CTRL_LEFTM] - self._timekprUserData[self._currentDOW][cons.TK_CTRL_LEFTD]), 0)
+                # continous time and time left next day as per allowed intervals
+                secondsLeftContinous, secondsLeftIntervals = self._timekprUserIntervals[nextDOW].getTimeLeftFromStart()
+                # adjust "lefts"
+                self._timekprUserData[cons.TK_CTRL_LEFT] += min(secondsLeftContinous, secondsLeft)
+                self._timekprUserData[nextDOW][cons.TK_CTRL_LEFTD] = min(secondsLeftIntervals, secondsLeft)
 
         # debug
         if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
@@ -293,24 +273,28 @@ class timekprUser(object):
 
             # loop through all days
             for rHour in range(0, 23+1):
+                # index in hour structure
+                hourIdx = timekprUserHours.getIndex(rDay, rHour)
+                # hour in str
+                hourStr = str(rHour)
                 # if day is disabled, it does not matter whether hour is (order of this if is important)
                 if not dayAllowed:
                     # disallowed
                     hourAllowed = False
                 # if hour is allowed
-                elif str(rHour) in allowedHours:
+                elif hourStr in allowedHours:
                     # disallowed
                     hourAllowed = True
                     # set up minutes
-                    self._timekprUserData[rDay][str(rHour)][cons.TK_CTRL_SMIN] = allowedHours[str(rHour)][cons.TK_CTRL_SMIN]
-                    self._timekprUserData[rDay][str(rHour)][cons.TK_CTRL_EMIN] = allowedHours[str(rHour)][cons.TK_CTRL_EMIN]
-                    self._timekprUserData[rDay][str(rHour)][cons.TK_CTRL_UACC] = allowedHours[str(rHour)][cons.TK_CTRL_UACC]
+                    self._timekprUserHours.startMinutes[hourIdx] = allowedHours[hourStr][cons.TK_CTRL_SMIN]
+                    self._timekprUserHours.endMinutes[hourIdx] = allowedHours[hourStr][cons.TK_CTRL_EMIN]
+                    self._timekprUserHours.unaccounted[hourIdx] = allowedHours[hourStr][cons.TK_CTRL_UACC]
                 # disallowed
                 else:
                     hourAllowed = False
 
                 # set up in structure
-                self._timekprUserData[rDay][str(rHour)][cons.TK_CTRL_ACT] = hourAllowed
+                self._timekprUserHours.allowed[hourIdx] = hourAllowed
 
             # days index
             idx = allowedDaysPT.index(rDay) if rDay in allowedDaysPT else -1
@@ -319,6 +303,9 @@ class timekprUser(object):
             # set up PlayTime limits
             self._timekprUserData[cons.TK_CTRL_PTCNT][rDay][cons.TK_CTRL_LIMITD] = limitsPerWeekdayPT[idx] if idx >= 0 else 0
 
+        # rebuild allowed interval index (if allowed hours have changed)
+        self._rebuildIntervalIndex()
+
         # set up PlayTime weekly limit
         self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_LIMITW] = self._timekprUserConfig.getUserPlayTimeWeekLimit()
 
@@ -333,7 +320,10 @@ class timekprUser(object):
         # debug
         if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
             log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "adjustLimitsFromConfig structure: %s" % (str(self._timekprUserData)))
+            log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "adjustLimitsFromConfig hours: %s" % (self._timekprUserHours.getDayDebugString(self._currentDOW)))
 
+        # configuration has changed
+        self._timeLimitsVersion += 1
         # get time limits and send them out if needed
         self.getTimeLimits()
 
@@ -342,10 +332,13 @@ class timekprUser(object):
             # inform
             self._timekprUserNotification.timeConfigurationChangedNotification(cons.TK_PRIO_IMPORTANT_INFO)
 
+        # limits have changed, user has to be evaluated
+        self._evaluationRequested = True
+
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "finish adjustLimitsFromConfig")
 
-    def adjustTimeSpentFromControl(self, pSilent=True, pPreserveSpent=False):
-        """Adjust limits as per loaded configuration"""
+    def adjustTimeSpentFromControl(self, pSilent=True, pPreserveSpent=False, pReplayJournal=False):
+        """Adjust limits as per loaded configuration (time spent journal is replayed on top of saved values when requested, i.e. at startup)"""
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start adjustTimeSpentFromControl")
 
         def _getPlayTimeBalanceSpent(pTimeSpentBeforeReload):
@@ -385,6 +378,13 @@ class timekprUser(object):
 
         # read from config
         self._timekprUserControl.loadUserControl()
+        # replay time spent which was not saved
+        if pReplayJournal:
+            # apply journal
+            entriesApplied = self._timekprUserControl.applyUserTimeSpentJournal(self._timekprUserControlJournal.readEntries())
+            # logging
+            if entriesApplied > 0:
+                log.log(cons.TK_LOG_LEVEL_INFO, "user \"%s\" time spent journal replayed, entries: %i" % (self.getUserName(), entriesApplied))
         # log
         self._timekprUserControl.logUserControl()
 
@@ -403,7 +403,7 @@ class timekprUser(object):
             dayChanged, weekChanged, monthChanged = self._timekprUserControl.getUserDateComponentChanges(self._effectiveDatetime)
 
         # spent this hour
-        spentHour = self._timekprUserData[self._currentDOW][str(self._currentHOD)][cons.TK_CTRL_SPENTH]
+        spentHour = self._timekprUserHours.spent[self._currentHourIdx]
 
         # if day has changed adjust balance
         self._timekprUserData[self._currentDOW][cons.TK_CTRL_SPENTBD] = spentHour if dayChanged else self._timekprUserControl.getUserTimeSpentBalance() + timeSpentBeforeReload
@@ -433,6 +433,9 @@ class timekprUser(object):
             # inform
             self._timekprUserNotification.timeLeftChangedNotification(cons.TK_PRIO_IMPORTANT_INFO)
 
+        # time spent has changed, user has to be evaluated
+        self._evaluationRequested = True
+
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "finish adjustTimeSpentFromControl")
 
     def _isPlayTimeEnabledAccountedActive(self, pSilent=False, pCheckActive=False):
@@ -454,18 +457,19 @@ class timekprUser(object):
         """Adjust time spent (and save it)"""
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start adjustTimeSpentActual")
 
-        def _adjustTimeSpentValues(pDay, pHOD, pSecs, pActive):
+        def _adjustTimeSpentValues(pDay, pHourIdx, pSecs, pActive):
             """Adjust time spent values"""
+            nonlocal timeSpentAccounted
             # if hour is not accounted, we do not account main time
-            if not pActive or self._timekprUserData[pDay][pHOD][cons.TK_CTRL_UACC]:
+            if not pActive or self._timekprUserHours.unaccounted[pHourIdx]:
                 # track sleep time
-                self._timekprUserData[pDay][pHOD][cons.TK_CTRL_SLEEP] += pSecs
+                self._timekprUserHours.sleep[pHourIdx] += pSecs
 
                 # adjust totals for reporting
                 self._timekprUserData[cons.TK_CTRL_SLEEP] += pSecs
             else:
                 # adjust time spent hour
-                self._timekprUserData[pDay][pHOD][cons.TK_CTRL_SPENTH] += pSecs
+                self._timekprUserHours.spent[pHourIdx] += pSecs
                 # adjust time spent day balance
                 self._timekprUserData[pDay][cons.TK_CTRL_SPENTBD] += pSecs
                 # adjust time spent day
@@ -477,11 +481,13 @@ class timekprUser(object):
 
                 # adjust totals for reporting
                 self._timekprUserData[cons.TK_CTRL_SPENT] += pSecs
+                # accounted in this check
+                timeSpentAccounted += pSecs
 
+        # time spent and PlayTime balance / spent accounted in this check (for journal)
+        timeSpentAccounted = timePTBalanceAccounted = timePTSpentAccounted = 0
         # check if dates have changed
         dayChanged, weekChanged, monthChanged = self._timekprUserControl.getUserDateComponentChanges(self._effectiveDatetime, self._timekprUserData[cons.TK_CTRL_LCHECK])
-        # currentHOD in str
-        currentHODStr = str(self._currentHOD)
         # get time spent
         timeSpent = max(int((self._effectiveDatetime - self._timekprUserData[cons.TK_CTRL_LCHECK]).total_seconds()), 0)
         # adjust last time checked
@@ -515,9 +521,11 @@ class timekprUser(object):
         else:
             # set time spent for previous hour (this may be triggered only when day changes)
             if timeSpent > self._secondsInHour:
+                # day of previous hour
+                prevDay = self._timekprUserData[self._currentDOW][cons.TK_CTRL_PDAY] if dayChanged else self._currentDOW
                 # adjust time values (either inactive or actual time)
-                _adjustTimeSpentValues(self._timekprUserData[self._currentDOW][cons.TK_CTRL_PDAY] if dayChanged else self._currentDOW,
-                    "23" if self._currentHOD == 0 else currentHODStr,
+                _adjustTimeSpentValues(prevDay,
+                    timekprUserHours.getIndex(prevDay, 23 if self._currentHOD == 0 else self._currentHOD),
                     timeSpent - self._secondsInHour,
                     userActiveEffective)
 
@@ -528,12 +536,8 @@ class timekprUser(object):
         if dayChanged:
             ### handle day change
             for rDay in (self._currentDOW, self._timekprUserData[self._currentDOW][cons.TK_CTRL_NDAY]):
-                # clean up hours for this day
-                for rHour in range(0, 23+1):
-                    # reset spent for hour
-                    self._timekprUserData[rDay][str(rHour)][cons.TK_CTRL_SPENTH] = 0
-                    # reset sleeping
-                    self._timekprUserData[rDay][str(rHour)][cons.TK_CTRL_SLEEP] = 0
+                # clean up spent and sleeping for hours of this day
+                self._timekprUserHours.resetDaySpent(rDay)
                 # reset balance for day
                 self._timekprUserData[rDay][cons.TK_CTRL_SPENTBD] = 0
                 # reset time spent for this day
@@ -556,7 +560,7 @@ class timekprUser(object):
                 self._timekprUserData[cons.TK_CTRL_SPENTM] = 0
 
         # adjust time values (either sleep or inactive or actual time)
-        _adjustTimeSpentValues(self._currentDOW, currentHODStr, timeSpent, userActiveEffective)
+        _adjustTimeSpentValues(self._currentDOW, self._currentHourIdx, timeSpent, userActiveEffective)
 
         # count PlayTime if enabled
         if userActiveEffective and userActivePT:
@@ -565,10 +569,14 @@ class timekprUser(object):
             if not self._timekprUserConfig.getUserPlayTimeOverrideEnabled():
                 # adjust PlayTime balance this day
                 self._timekprUserData[cons.TK_CTRL_PTCNT][self._currentDOW][cons.TK_CTRL_SPENTBD] += timeSpent
+                # accounted in this check
+                timePTBalanceAccounted = timeSpent
             # adjust PlayTime spent this day
             self._timekprUserData[cons.TK_CTRL_PTCNT][self._currentDOW][cons.TK_CTRL_SPENTD] += timeSpent
             # adjust PlayTime spent this week
             self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_SPENTW] += timeSpent
+            # accounted in this check
+            timePTSpentAccounted = timeSpent
 
         # logging section
         if dayChanged:
@@ -578,16 +586,25 @@ class timekprUser(object):
             if monthChanged:
                 log.log(cons.TK_LOG_LEVEL_INFO, "month change, user: %s, tmon: %i" % (self.getUserName(), self._timekprUserData[cons.TK_CTRL_SPENTM]))
 
-        # check if we need to save progress
-        if abs((self._effectiveDatetime - self._timekprUserData[cons.TK_CTRL_LSAVE]).total_seconds()) >= pTimekprConfig.getTimekprSaveTime() or dayChanged:
+        # save progress on day change (regular saves are spread across save interval by daemon)
+        if dayChanged:
             # save
             self.saveSpent()
+        # journal time spent until the next save (so it's not lost in case of power loss)
+        elif timeSpentAccounted > 0 or timePTSpentAccounted > 0:
+            # journal
+            self._timekprUserControlJournal.appendEntry(self._effectiveDatetime, self._currentHOD, timeSpentAccounted, timePTBalanceAccounted, timePTSpentAccounted)
 
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "finish adjustTimeSpentActual")
 
         # returns if user is active
         return userActiveEffective, userActiveActual, userScreenLocked
 
+    def getTimeLeftSignalStatistics(self):
+        """Get time left signals sent and suppressed since last call"""
+        # result
+        return self._timekprUserNotification.getTimeLeftSignalStatistics()
+
     def getTimeLeft(self, pForceNotifications=False):
         """Get how much time is left (for this day and in a row for max this and next day)"""
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start getTimeLeft")
@@ -595,14 +612,10 @@ class timekprUser(object):
         timeLeftToday = self._timekprUserData[self._currentDOW][cons.TK_CTRL_LEFTD]
         # time left in a row
         timeLeftInARow = self._timekprUserData[cons.TK_CTRL_LEFT]
-        # time spent this session / time inactive this session / time available from intervals
-        timeSpentThisSession = timeInactiveThisSession = timeAvailableIntervals = 0
-
-        # go through hours for this day
-        for j in range(0, 23+1):
-            # for current day (and enabled hours)
-            if self._timekprUserData[self._currentDOW][str(j)][cons.TK_CTRL_ACT]:
-                timeAvailableIntervals += ((self._timekprUserData[self._currentDOW][str(j)][cons.TK_CTRL_EMIN] - self._timekprUserData[self._currentDOW][str(j)][cons.TK_CTRL_SMIN]) * 60)
+        # time spent this session / time inactive this session
+        timeSpentThisSession = timeInactiveThisSession = 0
+        # time available from intervals
+        timeAvailableIntervals = self._timekprUserIntervals[self._currentDOW].getTimeAvailable()
 
         # totals
         timeSpentThisSession = self._timekprUserData[cons.TK_CTRL_SPENT]
@@ -617,8 +630,8 @@ class timekprUser(object):
         # time spent for week
         timeSpentMonth = self._timekprUserData[cons.TK_CTRL_SPENTM]
         # unaccounted hour
-        isCurrentTimeBetweenInterval = self._timekprUserData[self._currentDOW][str(self._currentHOD)][cons.TK_CTRL_SMIN] <= self._currentMOH <= self._timekprUserData[self._currentDOW][str(self._currentHOD)][cons.TK_CTRL_EMIN]
-        timeUnaccountedHour = self._timekprUserData[self._currentDOW][str(self._currentHOD)][cons.TK_CTRL_UACC] if isCurrentTimeBetweenInterval else False
+        isCurrentTimeBetweenInterval = self._timekprUserHours.startMinutes[self._currentHourIdx] <= self._currentMOH <= self._timekprUserHours.endMinutes[self._currentHourIdx]
+        timeUnaccountedHour = bool(self._timekprUserHours.unaccounted[self._currentHourIdx]) if isCurrentTimeBetweenInterval else False
         # debug (bt = since boot / restart)
         log.log(cons.TK_LOG_LEVEL_INFO, "get time for \"%s\", tltd %i, tlrow: %i, tspbal: %i, tspbt: %i, tidbt: %i" % (self.getUserName(), timeLeftToday, timeLeftInARow, timeSpentBalance, timeSpentThisSession, timeInactiveThisSession))
 
@@ -627,6 +640,7 @@ class timekprUser(object):
         timeValues[cons.TK_CTRL_LEFTD] = timeLeftToday
         timeValues[cons.TK_CTRL_LEFT] = timeLeftInARow
         timeValues[cons.TK_CTRL_SPENT] = timeSpentThisSession
+        timeValues[cons.TK_CTRL_SPENTD] = timeSpentDay
         timeValues[cons.TK_CTRL_SPENTW] = timeSpentWeek
         timeValues[cons.TK_CTRL_SPENTM] = timeSpentMonth
         timeValues[cons.TK_CTRL_SLEEP] = timeInactiveThisSession
@@ -681,10 +695,29 @@ class timekprUser(object):
         # result
         return timeLeftPT, isPTEnabled, isPTAccounted, isPTActive
 
-    def saveSpent(self):
-        """Save the time spent by the user"""
-        log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start saveSpent")
+    def _getTimeSpentValues(self):
+        """Get time spent values which are saved to control file"""
+        # result
+        return (
+            self._currentDOW,
+            self._timekprUserData[self._currentDOW][cons.TK_CTRL_SPENTBD],
+            self._timekprUserData[cons.TK_CTRL_SPENTD],
+            self._timekprUserData[cons.TK_CTRL_SPENTW],
+            self._timekprUserData[cons.TK_CTRL_SPENTM],
+            self._timekprUserData[cons.TK_CTRL_PTCNT][self._currentDOW][cons.TK_CTRL_SPENTBD],
+            self._timekprUserData[cons.TK_CTRL_PTCNT][self._currentDOW][cons.TK_CTRL_SPENTD],
+            self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_SPENTW]
+        )
+
+    def isTimeSpentChanged(self):
+        """Whether time spent has changed since the last save"""
+        # result
+        return self._timeSpentSaved != self._getTimeSpentValues()
 
+    def checkUserFilesModified(self):
+        """Reload user config and control if they were modified externally (returns whether anything was reloaded)"""
+        # whether reloaded
+        reloaded = False
         # initial config loaded
         userConfigLastModified = self._timekprUserConfig.getUserConfigLastModified()
         userControlLastModified = self._timekprUserControl.getUserControlLastModified()
@@ -694,6 +727,8 @@ class timekprUser(object):
             log.log(cons.TK_LOG_LEVEL_INFO, "user \"%s\" config changed, prev/now: %s / %s" % (self.getUserName(), self._timekprUserData[cons.TK_CTRL_LCMOD].strftime(cons.TK_LOG_DATETIME_FORMAT), userConfigLastModified.strftime(cons.TK_LOG_DATETIME_FORMAT)))
             # load config
             self.adjustLimitsFromConfig(pSilent=False)
+            # reloaded
+            reloaded = True
 
         # check whether we need to reload file (if externally modified)
         if self._timekprUserData[cons.TK_CTRL_LMOD] != userControlLastModified or self._timekprUserData[cons.TK_CTRL_LCMOD] != userConfigLastModified:
@@ -702,6 +737,19 @@ class timekprUser(object):
                 log.log(cons.TK_LOG_LEVEL_INFO, "user \"%s\" control changed, prev/now: %s / %s" % (self.getUserName(), self._timekprUserData[cons.TK_CTRL_LMOD].strftime(cons.TK_LOG_DATETIME_FORMAT), userControlLastModified.strftime(cons.TK_LOG_DATETIME_FORMAT)))
             # load config
             self.adjustTimeSpentFromControl(pSilent=False, pPreserveSpent=True)
+            # reloaded
+            reloaded = True
+
+        # result
+        return reloaded
+
+    def saveSpent(self, pCheckFilesModified=True):
+        """Save the time spent by the user (returns bytes written)"""
+        log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "start saveSpent")
+
+        # reload externally modified files before save (not needed when changes are watched)
+        if pCheckFilesModified:
+            self.checkUserFilesModified()
 
         # adjust save time as well
         self._timekprUserData[cons.TK_CTRL_LSAVE] = self._effectiveDatetime
@@ -715,17 +763,38 @@ class timekprUser(object):
         self._timekprUserControl.setUserPlayTimeSpentBalance(self._timekprUserData[cons.TK_CTRL_PTCNT][self._currentDOW][cons.TK_CTRL_SPENTBD])
         self._timekprUserControl.setUserPlayTimeSpentDay(self._timekprUserData[cons.TK_CTRL_PTCNT][self._currentDOW][cons.TK_CTRL_SPENTD])
         self._timekprUserControl.setUserPlayTimeSpentWeek(self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_SPENTW])
-        self._timekprUserControl.saveControl()
+        bytesWritten = self._timekprUserControl.saveControl()
+        # journaled time spent is saved now
+        self._timekprUserControlJournal.truncateJournal()
+        # what was saved
+        self._timeSpentSaved = self._getTimeSpentValues()
         # renew last modified
         self._timekprUserData[cons.TK_CTRL_LMOD] = self._timekprUserControl.getUserControlLastModified()
 
         # if debug
         if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
-            log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "save spent structure: %s" % (str(self._timekprUserData[self._currentDOW])))
+            log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "save spent structure: %s, hours: %s" % (str(self._timekprUserData[self._currentDOW]), self._timekprUserHours.getDayDebugString(self._currentDOW)))
 
         log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "finish saveSpent")
 
+        # result
+        return bytesWritten
+
     def getTimeLimits(self):
+        """Send time limits to clients (they are prepared only when configuration has changed)"""
+        # configuration has changed since time limits were prepared
+        if not self._timekprUserNotification.isTimeLimitsPrepared(self._timeLimitsVersion):
+            # prepare and send
+            self._timekprUserNotification.processTimeLimits(self._prepareTimeLimits(), self._timeLimitsVersion)
+        else:
+            # send prepared
+            self._timekprUserNotification.resendTimeLimits()
+
+        # statistics
+        if log.isDebugEnabled():
+            log.log(cons.TK_LOG_LEVEL_DEBUG, "time limits for \"%s\" sent, prepared time limits used: %i, prepared: %i" % ((self.getUserName(),) + self._timekprUserNotification.getTimeLimitsStatistics()))
+
+    def _prepareTimeLimits(self):
         """Calculate time limits for sendout to clients"""
         # main container
         timeLimits = {}
@@ -745,17 +814,17 @@ class timekprUser(object):
 
                 # loop through all days
                 for rHour in range(0, 23+1):
-                    # hour in str
-                    hourStr = str(rHour)
+                    # index in hour structure
+                    hourIdx = timekprUserHours.getIndex(rDay, rHour)
                     # fill up start value
-                    if self._timekprUserData[rDay][hourStr][cons.TK_CTRL_ACT]:
+                    if self._timekprUserHours.allowed[hourIdx]:
                         # no value (interval was changed)
-                        uaccValue = self._timekprUserData[rDay][hourStr][cons.TK_CTRL_UACC] if uaccValue is None else uaccValue
+                        uaccValue = bool(self._timekprUserHours.unaccounted[hourIdx]) if uaccValue is None else uaccValue
                         # calc uacc changes
-                        uaccChanged = self._timekprUserData[rDay][hourStr][cons.TK_CTRL_UACC] != uaccValue
+                        uaccChanged = bool(self._timekprUserHours.unaccounted[hourIdx]) != uaccValue
 
                     # this is needed in case next hour starts with particular minutes, in which case continous interval ends
-                    if startHour is not None and (self._timekprUserData[rDay][hourStr][cons.TK_CTRL_SMIN] != 0 or uaccChanged):
+                    if startHour is not None and (self._timekprUserHours.startMinutes[hourIdx] != 0 or uaccChanged):
                         # fill interval with start and end (because hours are continous, we can count on sequential change)
                         timeLimits[rDay][cons.TK_CTRL_INT].append([int(startHour), int(endHour), uaccValue])
                         # restart hour intervals
@@ -763,18 +832,18 @@ class timekprUser(object):
                         uaccChanged = False
 
                     # if hour is enabled for use, we count the interval
-                    if self._timekprUserData[rDay][hourStr][cons.TK_CTRL_ACT]:
+                    if self._timekprUserHours.allowed[hourIdx]:
                         # uacc value
-                        uaccValue = self._timekprUserData[rDay][hourStr][cons.TK_CTRL_UACC]
+                        uaccValue = bool(self._timekprUserHours.unaccounted[hourIdx])
                         # set start hour only if it has not beed set up, that is to start the interval
                         if startHour is None:
                             # start
-                            startHour = int(((cons.TK_DATETIME_START + timedelta(hours=rHour, minutes=self._timekprUserData[rDay][hourStr][cons.TK_CTRL_SMIN])) - cons.TK_DATETIME_START).total_seconds())
+                            startHour = rHour * cons.TK_LIMIT_PER_HOUR + self._timekprUserHours.startMinutes[hourIdx] * cons.TK_LIMIT_PER_MINUTE
                         # end
-                        endHour = int(((cons.TK_DATETIME_START + timedelta(hours=rHour, minutes=self._timekprUserData[rDay][hourStr][cons.TK_CTRL_EMIN])) - cons.TK_DATETIME_START).total_seconds())
+                        endHour = rHour * cons.TK_LIMIT_PER_HOUR + self._timekprUserHours.endMinutes[hourIdx] * cons.TK_LIMIT_PER_MINUTE
 
                     # interval ends if hour is not allowed or this is the end of the day
-                    if (not self._timekprUserData[rDay][hourStr][cons.TK_CTRL_ACT] and startHour is not None) or self._timekprUserData[rDay][hourStr][cons.TK_CTRL_EMIN] != 60:
+                    if (not self._timekprUserHours.allowed[hourIdx] and startHour is not None) or self._timekprUserHours.endMinutes[hourIdx] != 60:
                         # fill interval with start and end (because end interval is unfinished (break in continuity))
                         timeLimits[rDay][cons.TK_CTRL_INT].append([int(startHour), int(endHour), uaccValue])
                         # restart hour intervals
@@ -824,11 +893,13 @@ class timekprUser(object):
         if log.isDebugEnabled(cons.TK_LOG_LEVEL_EXTRA_DEBUG):
             log.log(cons.TK_LOG_LEVEL_EXTRA_DEBUG, "TL: %s" % (str(timeLimits)))
 
-        # process notifications, if needed
-        self._timekprUserNotification.processTimeLimits(timeLimits)
+        # result
+        return timeLimits
 
     def processUserSessionAttributes(self, pWhat, pKey, pValue):
         """This will set up request or verify actual request for user attribute changes"""
+        # previous value
+        wasScreenSaverActive = self._timekprUserData[cons.TK_CTRL_SCR_N]
         # depends on what attribute
         if pWhat == cons.TK_CTRL_SCR_N:
             # set it to false, e.g. not in force
@@ -863,6 +934,10 @@ class timekprUser(object):
                 # reset key anyway
                 self._timekprUserData[cons.TK_CTRL_SCR_K] = None
 
+        # session attributes influence time accounting, user has to be evaluated when they change
+        if self._timekprUserData[cons.TK_CTRL_SCR_N] != wasScreenSaverActive:
+            self._evaluationRequested = True
+
     def revalidateUserSessionAttributes(self):
         """Actual user session attributes have to be revalidated from time to time. This will take care of that"""
         # increase stuff
@@ -889,26 +964,49 @@ class timekprUser(object):
         hrs = self._timekprUserConfig.getUserWakeupHourInterval()
         hrFrom = int(hrs[0])
         hrTo = int(hrs[1])
-        # loop through all hours for today
-        for rHour in range(self._currentHOD, 23+1):
-            # check if hour is enabled
-            if self._timekprUserData[self._currentDOW][str(rHour)][cons.TK_CTRL_ACT]:
-                # if current hour, we need to check whether it's possible to use it (check +one minute ahead)
-                if rHour == self._currentHOD and self._currentMOH + 1 >= self._timekprUserData[self._currentDOW][str(rHour)][cons.TK_CTRL_SMIN]:
-                    # start can not be used as it is in the past
-                    continue
-                # only if wakeup interval is right
-                elif hrFrom <= rHour <= hrTo:
-                    # check if we have interval
-                    res = int(datetime(self._effectiveDatetime.year, self._effectiveDatetime.month, self._effectiveDatetime.day, rHour, self._timekprUserData[self._currentDOW][str(rHour)][cons.TK_CTRL_SMIN]).strftime("%s"))
-                # this is it
-                break
+        # next interval start (if current hour, it's checked whether it's possible to use it, +one minute ahead)
+        startHour, startMinute = self._timekprUserIntervals[self._currentDOW].findIntervalStartFrom(self._currentHOD, self._currentMOH)
+        # only if wakeup interval is right
+        if startHour is not None and hrFrom <= startHour <= hrTo:
+            # check if we have interval
+            res = int(datetime(self._effectiveDatetime.year, self._effectiveDatetime.month, self._effectiveDatetime.day, startHour, startMinute).strftime("%s"))
         # msg if none found
         if res is None:
             log.log(cons.TK_LOG_LEVEL_INFO, "there is no next interval available today for user \"%s\"" % (self.getUserName()))
         # return
         return res
 
+    def getNextEvaluationDelay(self, pTimeLeftInARow, pTimeLeftPT=None):
+        """Calculate seconds until next interesting instant for the user (limit crossing, hour or interval boundary or notification threshold)"""
+        # deadlines (evaluation can not be deferred longer than max deferral)
+        deadlines = [cons.TK_USER_EVALUATION_MAX_DEFERRAL]
+        # hour boundary
+        deadlines.append(self._secondsLeftHour)
+        # interval boundaries within this hour
+        for rMinute in (self._timekprUserHours.startMinutes[self._currentHourIdx], self._timekprUserHours.endMinutes[self._currentHourIdx]):
+            deadlines.append(rMinute * 60 - self._secondsInHour)
+        # limit crossing, notification levels and thresholds (time left can not decrease faster than time passes)
+        for rThreshold in set(self._timekprUserNotification.getNotificationLevels() + (self._timekprConfig.getTimekprFinalNotificationTime(), self._timekprConfig.getTimekprTerminationTime(), self._timekprConfig.getTimekprFinalWarningTime(), 0)):
+            deadlines.append(pTimeLeftInARow - rThreshold)
+        # PlayTime limit crossing and notification thresholds
+        if pTimeLeftPT is not None:
+            for rThreshold in (self._timekprConfig.getTimekprFinalNotificationTime(), 0):
+                deadlines.append(pTimeLeftPT - rThreshold)
+
+        # nearest deadline (deadlines in the past are disregarded, nearer deadlines than polling time are checked every polling cycle)
+        return max(min([rDeadline for rDeadline in deadlines if rDeadline > 0]), self._timekprConfig.getTimekprPollTime())
+
+    def isEvaluationRequested(self):
+        """Return whether user has to be evaluated as soon as possible (request is considered fulfilled)"""
+        # request and reset it
+        evaluationRequested, self._evaluationRequested = self._evaluationRequested, False
+        # result
+        return evaluationRequested
+
+    def getUserStateVersion(self):
+        """Return version of user state known to login manager (it changes when sessions change)"""
+        return self._timekprUserManager.getStateVersion()
+
     def setPlayTimeActiveActivityCnt(self, pActiveActivityCnt):
         """This sets count of active activities"""
         self._timekprUserData[cons.TK_CTRL_PTCNT][cons.TK_CTRL_PTLSTC] = pActiveActivityCnt
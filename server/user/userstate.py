@@ -0,0 +1,61 @@
+"""
+Created on Oct 17, 2026
+"""
+
+# imports
+from array import array
+
+# timekpr imports
+from timekpr.common.constants import constants as cons
+
+
+class timekprUserHours(object):
+    """Compact per hour accounting state for all days of the week (7x24 matrices backed by arrays)"""
+
+    # fixed layout, no per instance dict
+    __slots__ = ("allowed", "unaccounted", "startMinutes", "endMinutes", "spent", "sleep")
+
+    def __init__(self):
+        """Initialize all hours as disallowed, whole hour intervals, nothing spent"""
+        # hours in a week
+        hoursInWeek = 7 * 24
+        # whether hour is allowed
+        self.allowed = array("b", (0,)) * hoursInWeek
+        # whether hour is unaccounted
+        self.unaccounted = array("b", (0,)) * hoursInWeek
+        # interval start minute in hour
+        self.startMinutes = array("b", (0,)) * hoursInWeek
+        # interval end minute in hour
+        self.endMinutes = array("b", (60,)) * hoursInWeek
+        # time spent in hour
+        self.spent = array("l", (0,)) * hoursInWeek
+        # time spent sleeping (inactive) in hour
+        self.sleep = array("l", (0,)) * hoursInWeek
+
+    @staticmethod
+    def getIndex(pDay, pHour):
+        """Get matrix index for day ("1" - "7") and hour (0 - 23)"""
+        # result
+        return (int(pDay) - 1) * 24 + pHour
+
+    def resetDaySpent(self, pDay):
+        """Reset spent and sleep values for all hours of the day"""
+        # first hour of the day
+        idx = self.getIndex(pDay, 0)
+        # reset spent and sleeping
+        self.spent[idx:idx+24] = array("l", (0,)) * 24
+        self.sleep[idx:idx+24] = array("l", (0,)) * 24
+
+    def getDayIntervals(self, pDay):
+        """Get allowed intervals (in seconds from the start of the day) for the day"""
+        # first hour of the day
+        idx = self.getIndex(pDay, 0)
+        # intervals for enabled hours
+        return tuple((rHour * cons.TK_LIMIT_PER_HOUR + self.startMinutes[idx+rHour] * cons.TK_LIMIT_PER_MINUTE, rHour * cons.TK_LIMIT_PER_HOUR + self.endMinutes[idx+rHour] * cons.TK_LIMIT_PER_MINUTE) for rHour in range(0, 23+1) if self.allowed[idx+rHour])
+
+    def getDayDebugString(self, pDay):
+        """Get hour values of the day for debugging"""
+        # first hour of the day
+        idx = self.getIndex(pDay, 0)
+        # result
+        return ", ".join("%i: %s" % (rHour, [self.allowed[idx+rHour], self.startMinutes[idx+rHour], self.endMinutes[idx+rHour], self.unaccounted[idx+rHour], self.spent[idx+rHour], self.sleep[idx+rHour]]) for rHour in range(0, 23+1))